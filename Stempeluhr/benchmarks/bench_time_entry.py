@@ -0,0 +1,91 @@
+"""Speicherbedarf und Ladezeit pro Stempeleintrag.
+
+Vergleicht die frühere TimeEntry Klasse (mit __dict__), den TimeEntry
+NamedTuple aus der Row Factory und die Spaltenform TimeEntryColumns.
+
+Aufruf (im Verzeichnis Stempeluhr):
+    PYTHONPATH=src python benchmarks/bench_time_entry.py [--entries N]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from stempeluhr.databaselogic.db_handler import DatabaseHandler
+from stempeluhr.databaselogic.employees import ensure_employee
+from stempeluhr.models.time_entry import STATUS_CODES, from_timestamp
+
+
+class LegacyTimeEntry:
+    """Die frühere Klasse, zum Vergleich"""
+    def __init__(self, vorname, nachname, date, time, status, pause_dauer=None):
+        self.vorname = vorname
+        self.nachname = nachname
+        self.date = date
+        self.time = time
+        self.status = status
+        self.pause_dauer = pause_dauer
+
+
+def fill(db: DatabaseHandler, anzahl: int):
+    """Schreibt anzahl Einträge direkt in die Tabelle (4 Stempel pro Tag)"""
+    start = int(datetime(2020, 1, 1, 8).timestamp())
+    codes = [STATUS_CODES[s] for s in ('Ein', 'Pause Start', 'Pause Ende', 'Aus')]
+    offsets = [0, 4 * 3600, 4 * 3600 + 1800, 8 * 3600 + 1800]
+    with db.conn:
+        mitarbeiter_id = ensure_employee(db.conn.cursor(), "Tanja", "Kretschmann").id
+        rows = []
+        for i in range(anzahl):
+            tag, n = divmod(i, 4)
+            rows.append((mitarbeiter_id, start + tag * 86400 + offsets[n], codes[n], 1800 if n == 2 else None))
+        db.conn.executemany(
+            "INSERT INTO stempel (mitarbeiter_id, ts, status_code, pause_sekunden) VALUES (?, ?, ?, ?)", rows
+        )
+
+
+def measure(func):
+    """Liefert (Ergebnis, Sekunden, belegte Bytes)"""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = func()
+    dauer = time.perf_counter() - t0
+    belegt, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, dauer, belegt
+
+
+def legacy_entries(db: DatabaseHandler):
+    """Lädt die Einträge wie vor der Row Factory"""
+    rows = db.conn.execute("""
+        SELECT vorname, nachname, ts, status_code, pause_sekunden
+        FROM stempel JOIN mitarbeiter ON mitarbeiter.id = stempel.mitarbeiter_id
+    """).fetchall()
+    names = {code: name for name, code in STATUS_CODES.items()}
+    return [LegacyTimeEntry(r[0], r[1], *from_timestamp(r[2]), names[r[3]], r[4]) for r in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseHandler(os.path.join(tmp, "bench.db"))
+        try:
+            fill(db, args.entries)
+            for name, func in [
+                ("LegacyTimeEntry", lambda: legacy_entries(db)),
+                ("TimeEntry", lambda: db.get_entries("Tanja", "Kretschmann")),
+                ("TimeEntryColumns", lambda: db.get_entry_columns("Tanja", "Kretschmann")),
+            ]:
+                result, dauer, belegt = measure(func)
+                print(f"{name:18} {len(result):>8} Einträge  {dauer:6.3f} s  {belegt / len(result):7.1f} Bytes/Eintrag")
+                del result
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Lasttest für den lokalen Stempeluhr-Dienst (python -m stempeluhr serve).
+
+Simuliert viele Terminals, die über je eine Keep-Alive-Verbindung im Kreis
+stempeln (Ein, Pause Start, Pause Ende, Aus), und misst die dauerhaft
+erreichbaren Stempel pro Sekunde sowie die Antwortzeiten. Ohne --url wird
+ein Dienst auf einer leeren temporären Datenbank gestartet.
+
+Aufruf (im Verzeichnis Stempeluhr):
+    PYTHONPATH=src python benchmarks/load_test.py --clients 200 --duration 10
+    PYTHONPATH=src python benchmarks/load_test.py --url 127.0.0.1:8765 --clients 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from run_benchmarks import percentile
+from stempeluhr.utils.workload import employee_names
+
+ZYKLUS = ["/clock-in", "/pause-start", "/pause-end", "/clock-out"]
+
+
+async def request(reader, writer, method: str, path: str, body: Optional[Dict] = None) -> Tuple[int, Dict]:
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+def next_step(state: Dict) -> int:
+    """Index in ZYKLUS, der zum aktuellen Zustand passt"""
+    if not state["is_clocked_in"]:
+        return 0
+    if state["is_in_pause"]:
+        return 2
+    return 3 if state["last_entry"]["status"] == "Pause Ende" else 1
+
+
+async def client(host: str, port: int, vorname: str, nachname: str, ende: float,
+                 latenzen: List[float], fehler: List[int]):
+    reader, writer = await asyncio.open_connection(host, port)
+    person = {"vorname": vorname, "nachname": nachname}
+    try:
+        _, state = await request(reader, writer, "GET", f"/state?vorname={vorname}&nachname={nachname}")
+        schritt = next_step(state)
+        while time.perf_counter() < ende:
+            t0 = time.perf_counter()
+            status, body = await request(reader, writer, "POST", ZYKLUS[schritt], person)
+            latenzen.append((time.perf_counter() - t0) * 1000)
+            if status == 200:
+                schritt = (schritt + 1) % len(ZYKLUS)
+            else:
+                fehler.append(status)
+                if "state" in body:
+                    schritt = next_step(body["state"])
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, clients: int, duration: float) -> Dict:
+    latenzen: List[float] = []
+    fehler: List[int] = []
+    t0 = time.perf_counter()
+    ende = t0 + duration
+    await asyncio.gather(*(client(host, port, vorname, nachname, ende, latenzen, fehler)
+                           for vorname, nachname in employee_names(clients)))
+    dauer = time.perf_counter() - t0
+    latenzen.sort()
+    erfolgreich = len(latenzen) - len(fehler)
+    return {
+        "clients": clients,
+        "seconds": dauer,
+        "requests": len(latenzen),
+        "stamps": erfolgreich,
+        "errors": len(fehler),
+        "stamps_per_second": erfolgreich / dauer,
+        "mean_ms": statistics.fmean(latenzen) if latenzen else 0.0,
+        "p50_ms": percentile(latenzen, 50) if latenzen else 0.0,
+        "p90_ms": percentile(latenzen, 90) if latenzen else 0.0,
+        "p99_ms": percentile(latenzen, 99) if latenzen else 0.0,
+        "max_ms": latenzen[-1] if latenzen else 0.0,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_path: str, port: int) -> subprocess.Popen:
+    """Startet den Dienst als eigenen Prozess und wartet, bis er Verbindungen annimmt"""
+    env = dict(os.environ)
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")]))
+    proc = subprocess.Popen([sys.executable, "-m", "stempeluhr", "--db", db_path, "serve", "--port", str(port)],
+                            env=env, stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise RuntimeError("Dienst konnte nicht gestartet werden")
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("Dienst antwortet nicht")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 300], help="Anzahl simulierter Terminals")
+    parser.add_argument("--duration", type=float, default=10, help="Dauer pro Messung in Sekunden")
+    parser.add_argument("--url", help="Laufender Dienst als HOST:PORT (Standard: eigenen starten)")
+    parser.add_argument("--output", help="Ergebnisse als JSON speichern")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        proc = None
+        if args.url:
+            host, _, port = args.url.rpartition(":")
+            port = int(port)
+        else:
+            host, port = "127.0.0.1", free_port()
+            proc = start_server(os.path.join(tmp_dir, "load.db"), port)
+        try:
+            results = []
+            for clients in args.clients:
+                r = asyncio.run(run_load(host, port, clients, args.duration))
+                results.append(r)
+                print(f"{clients:5} Clients: {r['stamps_per_second']:8.0f} Stempel/s  "
+                      f"p50 {r['p50_ms']:7.2f} ms  p99 {r['p99_ms']:7.2f} ms  Fehler {r['errors']}")
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, indent=2)
+        print(f"Ergebnisse gespeichert: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
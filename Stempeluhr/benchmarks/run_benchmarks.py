@@ -0,0 +1,169 @@
+"""Benchmarks für Datenzugriff und Berichte auf synthetischen Daten.
+
+Misst get_entries, get_formatted_history, berechne_monatsuebersicht,
+berechne_teamuebersicht und create_monthly_pdf für mehrere Datengrößen
+(Mitarbeiter x Jahre) und speichert Perzentile und Spitzenspeicher als JSON.
+
+Aufruf (im Verzeichnis Stempeluhr):
+    PYTHONPATH=src python benchmarks/run_benchmarks.py --sizes 5x1 20x2 --output results.json
+    PYTHONPATH=src python benchmarks/run_benchmarks.py --compare alt.json neu.json
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+from typing import Callable, Dict, List
+
+from stempeluhr.databaselogic.db_handler import DatabaseHandler
+from stempeluhr.functions.data_display import get_formatted_history
+from stempeluhr.utils.workload import employee_names, generate_workload
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Perzentil mit linearer Interpolation"""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    pos = (len(sorted_values) - 1) * p / 100
+    unten = int(pos)
+    oben = min(unten + 1, len(sorted_values) - 1)
+    return sorted_values[unten] + (sorted_values[oben] - sorted_values[unten]) * (pos - unten)
+
+
+def measure(func: Callable, repeat: int) -> Dict:
+    """Zeitet func repeat-mal und misst den Spitzenspeicher in einem zusätzlichen Lauf"""
+    func()  # Aufwärmen (Seiten-Cache, Imports)
+    zeiten = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        zeiten.append((time.perf_counter() - t0) * 1000)
+    zeiten.sort()
+
+    # tracemalloc verlangsamt stark, daher getrennt von der Zeitmessung
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "runs": repeat,
+        "mean_ms": statistics.fmean(zeiten),
+        "p50_ms": percentile(zeiten, 50),
+        "p90_ms": percentile(zeiten, 90),
+        "p99_ms": percentile(zeiten, 99),
+        "max_ms": zeiten[-1],
+        "peak_memory_kb": peak / 1024,
+    }
+
+
+def benchmark_size(employees: int, years: float, repeat: int, tmp_dir: str) -> Dict:
+    """Erzeugt eine Datenbank der angegebenen Größe und misst alle Funktionen"""
+    db_path = os.path.join(tmp_dir, f"bench_{employees}x{years}.db")
+    db = DatabaseHandler(db_path)
+    try:
+        t0 = time.perf_counter()
+        anzahl = generate_workload(db, employees=employees, years=years)
+        print(f"{employees} Mitarbeiter x {years} Jahre: {anzahl} Einträge in {time.perf_counter() - t0:.1f} s")
+
+        vorname, nachname = employee_names(1)[0]
+        # Ein Monat aus der Mitte des Zeitraums
+        jahr, monat = 2024, 3
+        cases = {
+            "get_entries(person)": lambda: db.get_entries(vorname, nachname),
+            "get_entries(alle)": lambda: db.get_entries(),
+            "get_formatted_history(person)": lambda: get_formatted_history(vorname, nachname, db),
+            "berechne_monatsuebersicht": lambda: db.berechne_monatsuebersicht(vorname, nachname, jahr, monat),
+        }
+        try:
+            from stempeluhr.functions.team_overview import berechne_teamuebersicht
+            von, bis = date(jahr, 1, 1), date(jahr + 1, 1, 1)
+            cases["berechne_teamuebersicht(alle, Jahr)"] = lambda: berechne_teamuebersicht(db, von, bis)
+        except ImportError:
+            print("numpy nicht installiert, berechne_teamuebersicht wird übersprungen")
+        try:
+            from stempeluhr.functions.pdf_export import create_monthly_pdf
+            pdf_path = os.path.join(tmp_dir, "bench.pdf")
+            cases["create_monthly_pdf"] = lambda: create_monthly_pdf(db, vorname, nachname, jahr, monat, pdf_path)
+        except ImportError:
+            print("reportlab nicht installiert, create_monthly_pdf wird übersprungen")
+
+        results = {}
+        for name, func in cases.items():
+            results[name] = measure(func, repeat)
+            r = results[name]
+            print(f"  {name:32} p50 {r['p50_ms']:9.2f} ms  p99 {r['p99_ms']:9.2f} ms  "
+                  f"Speicher {r['peak_memory_kb']:10.1f} KB")
+        return {"employees": employees, "years": years, "entries": anzahl, "results": results}
+    finally:
+        db.close()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(alt_path: str, neu_path: str):
+    """Gibt die Veränderung von p50 zwischen zwei Ergebnisdateien aus"""
+    with open(alt_path, encoding="utf-8") as f:
+        alt = {(s["employees"], s["years"]): s["results"] for s in json.load(f)["sizes"]}
+    with open(neu_path, encoding="utf-8") as f:
+        neu = json.load(f)["sizes"]
+    for size in neu:
+        key = (size["employees"], size["years"])
+        if key not in alt:
+            continue
+        print(f"{key[0]} Mitarbeiter x {key[1]} Jahre")
+        for name, r in size["results"].items():
+            vorher = alt[key].get(name)
+            if vorher:
+                faktor = r["p50_ms"] / vorher["p50_ms"] if vorher["p50_ms"] else float("inf")
+                print(f"  {name:32} {vorher['p50_ms']:9.2f} -> {r['p50_ms']:9.2f} ms  (x{faktor:.2f})")
+
+
+def parse_size(text: str):
+    employees, years = text.lower().split("x")
+    return int(employees), float(years)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[(5, 1), (20, 1), (50, 2)],
+                        help="Datengrößen als MITARBEITERxJAHRE (Standard: 5x1 20x1 50x2)")
+    parser.add_argument("--repeat", type=int, default=20, help="Messungen pro Funktion")
+    parser.add_argument("--output", help="Ergebnisse als JSON speichern")
+    parser.add_argument("--compare", nargs=2, metavar=("ALT", "NEU"), help="Zwei Ergebnisdateien vergleichen")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sizes = [benchmark_size(employees, years, args.repeat, tmp_dir) for employees, years in args.sizes]
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "sizes": sizes,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Ergebnisse gespeichert: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
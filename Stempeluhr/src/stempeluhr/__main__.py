@@ -1,4 +1,10 @@
-from stempeluhr.app import StempeluhrApp as main
+import sys
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Befehle ohne Oberfläche, z.B. "python -m stempeluhr rebuild-aggregates"
+        from stempeluhr.cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
+    from stempeluhr.app import StempeluhrApp as main
     main().main_loop()
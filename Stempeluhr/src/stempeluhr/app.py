@@ -1,18 +1,32 @@
+import time
+# Beginn des Kaltstarts, vor den Importen von toga und der Oberfläche
+_START = time.perf_counter()
+
 import toga
 from toga.style import Pack
 from toga.style.pack import COLUMN
 from .components.stempeluhr_element import StempelUhrElement
 from .databaselogic.db_handler import DatabaseHandler
+from .databaselogic.async_db_handler import AsyncDatabaseHandler
+from .utils.startup_timing import StartupTimer
 import logging
 import asyncio
+import os
 
 # Setze das Logging-Level für asyncio auf ERROR
 logging.getLogger('asyncio').setLevel(logging.ERROR)
 
 class StempeluhrApp(toga.App):
     def startup(self):
-        # Initialisiere den DatabaseHandler
+        # Startphasen messen, Ergebnis nach dem ersten Laden der Historie
+        self.startup_timer = StartupTimer(_START)
+        self.startup_timer.mark("Importe")
+
+        # Initialisiere den DatabaseHandler und die asynchrone Fassade für die Oberfläche
         self.db_handler = DatabaseHandler()
+        self.async_db = AsyncDatabaseHandler(self.db_handler)
+        self.enable_instrumentation_from_env()
+        self.startup_timer.mark("Datenbank")
         
         # Erstelle den Hauptcontainer
         main_box = toga.Box(
@@ -22,9 +36,10 @@ class StempeluhrApp(toga.App):
         )
 
         # Erstelle die Stempeluhr-Komponente mit dem DatabaseHandler
-        self.stempeluhr = StempelUhrElement("main", self.db_handler)
+        self.stempeluhr = StempelUhrElement("main", self.db_handler, async_db=self.async_db)
         main_box.add(self.stempeluhr.get_card())
-        
+        self.startup_timer.mark("Oberfläche")
+
         # Erstelle das Hauptfenster
         self.main_window = toga.MainWindow(
             title="Stempeluhr",
@@ -34,6 +49,35 @@ class StempeluhrApp(toga.App):
         # Setze den Hauptcontainer als Fensterinhalt
         self.main_window.content = main_box
         self.main_window.show()
+        self.startup_timer.mark("Fenster")
+
+        # Historie und Status füllen das bereits sichtbare Fenster
+        self.loop.create_task(self.load_initial_data())
+
+    async def load_initial_data(self):
+        """Lädt die Startdaten der Stempelkarte und gibt die Startzeiten aus"""
+        await self.stempeluhr.load_initial_async()
+        self.startup_timer.mark("Historie")
+        print(self.startup_timer.report())
+
+    def enable_instrumentation_from_env(self):
+        """Misst die Datenbankzugriffe, wenn STEMPELUHR_SLOW_MS gesetzt ist.
+
+        Langsame Abfragen landen in stempeluhr_slow.log, die Statistik beim
+        Beenden in stempeluhr_stats.json (beide neben der Datenbank).
+        """
+        slow_ms = os.environ.get("STEMPELUHR_SLOW_MS")
+        if not slow_ms:
+            return
+        data_dir = os.path.dirname(os.path.abspath(self.db_handler.db_path))
+        instrumentation = self.db_handler.enable_instrumentation(
+            slow_ms=float(slow_ms), slow_log_path=os.path.join(data_dir, "stempeluhr_slow.log")
+        )
+
+        def on_exit(app, **kwargs):
+            instrumentation.dump(os.path.join(data_dir, "stempeluhr_stats.json"))
+            return True
+        self.on_exit = on_exit
 
 def main():
     return StempeluhrApp("Stempeluhr")
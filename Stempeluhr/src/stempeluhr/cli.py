@@ -0,0 +1,199 @@
+import argparse
+import time
+from datetime import datetime
+from typing import List, Optional
+from .databaselogic.archive import OpenSessionsError
+from .databaselogic.db_handler import DatabaseHandler
+from .databaselogic.instrumentation import DEFAULT_SLOW_MS
+from .functions.importer import DEFAULT_ENCODING, DEFAULT_IMPORT_BATCH_SIZE, import_file
+
+
+def _rebuild_aggregates(args) -> int:
+    """Berechnet die Tages- und Wochensummen einer bestehenden Datenbank neu"""
+    db_handler = DatabaseHandler(args.db)
+    db_handler.rebuild_aggregates()
+    print("Tages- und Wochensummen neu berechnet")
+    return 0
+
+
+def _archive(args) -> int:
+    """Verschiebt ein abgeschlossenes Jahr in eine eigene Archivdatei"""
+    db_handler = DatabaseHandler(args.db)
+    try:
+        anzahl = db_handler.archive_year(args.year, force=args.force)
+    except OpenSessionsError as e:
+        print(f"Archivieren nicht möglich, am {datetime.fromtimestamp(e.grenze):%d.%m.%Y} noch eingestempelt:")
+        for _, vorname, nachname, seit in e.offen:
+            print(f"  {vorname} {nachname} seit {datetime.fromtimestamp(seit):%d.%m.%Y %H:%M}")
+        print("Fehlende Stempel nachtragen oder mit --force archivieren "
+              "(offene Schichten am Jahresende bleiben dann in der Datenbank)")
+        return 1
+    except (ValueError, RuntimeError) as e:
+        print(f"Archivieren nicht möglich: {e}")
+        return 1
+    print(f"{anzahl} Einträge aus {args.year} archiviert: {db_handler.archived_years()[args.year]}")
+    return 0
+
+
+def _restore(args) -> int:
+    """Holt ein archiviertes Jahr zurück in die Datenbank"""
+    db_handler = DatabaseHandler(args.db)
+    try:
+        anzahl = db_handler.restore_year(args.year)
+    except (ValueError, RuntimeError, OSError) as e:
+        print(f"Wiederherstellen nicht möglich: {e}")
+        return 1
+    print(f"{anzahl} Einträge aus {args.year} wiederhergestellt")
+    return 0
+
+
+def _vacuum(args) -> int:
+    """Gibt freien Platz der Datenbankdatei an das Dateisystem zurück"""
+    vorher, nachher = DatabaseHandler(args.db).vacuum()
+    print(f"Freie Seiten: {vorher} vorher, {nachher} nachher")
+    return 0
+
+
+def _report(args) -> int:
+    """Erstellt die Monatsübersichten als PDF"""
+    # Import erst hier, damit die übrigen Befehle ohne reportlab laufen
+    from .functions.batch_report import generate_reports
+    from .functions.pdf_export import default_export_dir
+
+    db_handler = DatabaseHandler(args.db)
+    if args.all_employees:
+        personen = db_handler.get_employees()
+    elif args.vorname and args.nachname:
+        personen = [(args.vorname, args.nachname)]
+    else:
+        # Wie in der Oberfläche: der zuletzt gestempelte Mitarbeiter
+        last_entry = db_handler.get_last_entry()
+        personen = [(last_entry.vorname, last_entry.nachname)] if last_entry else []
+    if not personen:
+        print("Keine Mitarbeiter gefunden")
+        return 1
+
+    output_dir = args.output_dir or default_export_dir()
+    t0 = time.perf_counter()
+    erstellt = 0
+    for pdf_path, dauer in generate_reports(db_handler.db_path, personen, args.year, args.month,
+                                            output_dir, args.workers, not args.no_cache):
+        erstellt += 1
+        print(f"{pdf_path} ({dauer:.2f} s)")
+    print(f"{erstellt} von {len(personen)} PDFs in {time.perf_counter() - t0:.2f} s erstellt")
+    return 0 if erstellt == len(personen) else 1
+
+
+def _key_value(text: str):
+    """Argument der Form SCHLÜSSEL=WERT"""
+    key, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"'{text}' hat nicht die Form SCHLÜSSEL=WERT")
+    return key, value
+
+
+def _import(args) -> int:
+    """Importiert Stempelzeiten aus einer CSV- oder JSON-Lines-Datei"""
+
+    def progress(stand):
+        print(f"{stand.read} gelesen, {stand.saved} gespeichert, {stand.duplicates} doppelt "
+              f"({stand.per_second:,.0f} Datensätze/s)", flush=True)
+
+    db_handler = DatabaseHandler(args.db)
+    result = import_file(
+        db_handler, args.file, fmt=args.format, delimiter=args.delimiter, encoding=args.encoding,
+        mapping=dict(args.map), status_map=dict(args.status_map), batch_size=args.batch_size,
+        validate=args.validate, skip_duplicates=not args.keep_duplicates, progress=progress
+    )
+    print(f"Import abgeschlossen: {result.read} gelesen, {result.saved} gespeichert, "
+          f"{result.duplicates} doppelt, {result.rejected} abgelehnt, {result.invalid} ungültig "
+          f"in {result.seconds:.1f} s ({result.per_second:,.0f} Datensätze/s)")
+    return 0 if result.invalid == 0 and result.rejected == 0 else 1
+
+
+def _serve(args) -> int:
+    """Startet den lokalen HTTP/JSON-Dienst zum Stempeln"""
+    from .server import serve
+
+    serve(DatabaseHandler(args.db), args.host, args.port)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m stempeluhr", description="Stempeluhr ohne Oberfläche")
+    parser.add_argument("--db", default=None, help="Pfad zur Datenbank (Standard: data/stempeluhr.db)")
+    parser.add_argument("--stats", metavar="DATEI", default=None,
+                        help="Abfragen messen und die Statistik als JSON in DATEI schreiben")
+    parser.add_argument("--slow-ms", type=float, default=DEFAULT_SLOW_MS,
+                        help=f"Abfragen ab dieser Dauer mit Query-Plan festhalten (Standard: {DEFAULT_SLOW_MS:g} ms)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser("rebuild-aggregates", help="Tages- und Wochensummen neu berechnen")
+    rebuild.set_defaults(func=_rebuild_aggregates)
+
+    archive = subparsers.add_parser(
+        "archive", help="Abgeschlossenes Jahr in eine eigene Archivdatei verschieben",
+        description="Verschiebt die Stempel eines abgeschlossenen Jahres in eine eigene Archivdatei. "
+                    "Ist an einer Jahresgrenze noch jemand eingestempelt (z.B. vergessenes Ausstempeln "
+                    "im Dezember), werden die offenen Schichten aufgelistet und nichts archiviert."
+    )
+    archive.add_argument("year", type=int, help="Jahr")
+    archive.add_argument("--force", action="store_true",
+                         help="Trotz offener Schichten archivieren; Schichten, die zum Jahresende offen sind, "
+                              "bleiben ab ihrem Beginn in der Datenbank")
+    archive.set_defaults(func=_archive)
+
+    restore = subparsers.add_parser("restore", help="Archiviertes Jahr zurück in die Datenbank holen")
+    restore.add_argument("year", type=int, help="Jahr")
+    restore.set_defaults(func=_restore)
+
+    vacuum = subparsers.add_parser("vacuum", help="Freien Platz der Datenbankdatei zurückgeben")
+    vacuum.set_defaults(func=_vacuum)
+
+    report = subparsers.add_parser("report", help="Monatsübersichten als PDF erstellen")
+    report.add_argument("--year", type=int, required=True, help="Jahr")
+    report.add_argument("--month", type=int, required=True, choices=range(1, 13), metavar="MONTH", help="Monat (1-12)")
+    report.add_argument("--all-employees", action="store_true", help="PDFs für alle Mitarbeiter erstellen")
+    report.add_argument("--vorname", help="Vorname (Standard: zuletzt gestempelter Mitarbeiter)")
+    report.add_argument("--nachname", help="Nachname")
+    report.add_argument("--workers", type=int, default=None, help="Anzahl paralleler Prozesse (Standard: CPU-Kerne)")
+    report.add_argument("--output-dir", default=None, help="Zielordner (Standard: ~/Dokumente/Stempel/exports)")
+    report.add_argument("--no-cache", action="store_true", help="PDFs immer neu erstellen")
+    report.set_defaults(func=_report)
+
+    importer = subparsers.add_parser("import", help="Stempelzeiten aus CSV oder JSON-Lines importieren")
+    importer.add_argument("file", help="Quelldatei")
+    importer.add_argument("--format", choices=["csv", "jsonl"], default=None, help="Standard: nach Dateiendung")
+    importer.add_argument("--delimiter", default=None, help="Trennzeichen für CSV (Standard: erraten)")
+    importer.add_argument("--encoding", default=DEFAULT_ENCODING,
+                          help=f"Zeichenkodierung (Standard: {DEFAULT_ENCODING}, liest UTF-8 mit und ohne BOM)")
+    importer.add_argument("--map", type=_key_value, action="append", default=[], metavar="FELD=SPALTE",
+                          help="Spalte für ein Feld (vorname, nachname, date, time, datetime, ts, status, pause_dauer)")
+    importer.add_argument("--status-map", type=_key_value, action="append", default=[], metavar="WERT=STATUS",
+                          help="Statuswert der Quelle auf Ein, Aus, Pause Start oder Pause Ende abbilden")
+    importer.add_argument("--batch-size", type=int, default=DEFAULT_IMPORT_BATCH_SIZE, help="Einträge pro Transaktion")
+    importer.add_argument("--validate", action="store_true", help="Ungültige Statusfolgen ablehnen")
+    importer.add_argument("--keep-duplicates", action="store_true", help="Bereits vorhandene Einträge nicht überspringen")
+    importer.set_defaults(func=_import)
+
+    server = subparsers.add_parser("serve", help="Lokalen HTTP/JSON-Dienst für mehrere Terminals starten")
+    server.add_argument("--host", default="127.0.0.1", help="Adresse (Standard: 127.0.0.1, nur lokal)")
+    server.add_argument("--port", type=int, default=8765, help="Port (Standard: 8765)")
+    server.set_defaults(func=_serve)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if not args.stats:
+        return args.func(args)
+
+    db_handler = DatabaseHandler(args.db)
+    instrumentation = db_handler.enable_instrumentation(slow_ms=args.slow_ms)
+    try:
+        return args.func(args)
+    finally:
+        instrumentation.dump(args.stats)
+        print(f"Statistik gespeichert: {args.stats} "
+              f"(Statement-Cache: geschätzt {instrumentation.cache_hit_rate:.0%} Treffer)")
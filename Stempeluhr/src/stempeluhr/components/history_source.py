@@ -0,0 +1,135 @@
+import asyncio
+from typing import Iterable, List, Optional, Tuple
+from toga.sources import ListSource
+from ..databaselogic.db_handler import DatabaseHandler
+from ..databaselogic.async_db_handler import AsyncDatabaseHandler
+from ..models.employee import normalize_name
+from ..models.sessions import annotate_entries
+from ..models.time_entry import TimeEntry
+from ..functions.data_display import format_history_entry
+
+# Anzahl der Einträge, die pro Datenbankabfrage geladen werden
+HISTORY_PAGE_SIZE = 50
+
+
+class HistorySource(ListSource):
+    """Datenquelle für die Historien-Tabelle, die Seiten erst bei Bedarf lädt.
+
+    Beim Erstellen wird nur die erste Seite geladen. Fragt die Tabelle eine
+    Zeile nahe dem Ende der bereits geladenen Daten ab (z.B. beim Scrollen),
+    wird die nächste Seite per Keyset-Pagination auf (ts, id) nachgeladen.
+    """
+
+    def __init__(self, accessors: Iterable[str], db_handler: DatabaseHandler, vorname: str, nachname: str,
+                 page_size: int = HISTORY_PAGE_SIZE, prefetch: Optional[int] = None,
+                 first_page: Optional[Tuple[List[TimeEntry], Optional[Tuple[int, int]]]] = None,
+                 async_db: Optional[AsyncDatabaseHandler] = None):
+        super().__init__(accessors)
+        self.db_handler = db_handler
+        # Mit async_db werden weitere Seiten auf dem Datenbank-Thread geladen
+        self.async_db = async_db
+        self.vorname = vorname
+        self.nachname = nachname
+        self.page_size = page_size
+        # Ab wie vielen verbleibenden Zeilen die nächste Seite geladen wird
+        self.prefetch = page_size // 5 if prefetch is None else prefetch
+        self._next_key: Optional[Tuple[int, int]] = None
+        # Geladene Einträge (neueste zuerst), für die Auffälligkeiten neu eingefügter Einträge
+        self._entries: List[TimeEntry] = []
+        self._exhausted = not (vorname and nachname)
+        self._load_pending = False
+        self._loading = False
+        if first_page is not None:
+            # Bereits vorab geladen, z.B. über den AsyncDatabaseHandler
+            self._append_page(*first_page)
+        else:
+            self.load_next_page()
+
+    @property
+    def exhausted(self) -> bool:
+        """True, wenn alle Einträge geladen sind"""
+        return self._exhausted
+
+    def __iter__(self):
+        # Nur die geladenen Zeilen; ohne __iter__ würde Python über __getitem__
+        # iterieren und dabei die komplette Historie nachladen
+        return iter(self._data)
+
+    def __getitem__(self, index: int):
+        if not self._exhausted and index >= len(self._data) - self.prefetch:
+            self._request_next_page()
+        return self._data[index]
+
+    def _request_next_page(self):
+        """Lädt die nächste Seite, nach Möglichkeit außerhalb des laufenden Tabellen-Callbacks"""
+        if self._load_pending:
+            return
+        self._load_pending = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.load_next_page()
+            return
+        if self.async_db is not None:
+            loop.create_task(self.load_next_page_async())
+        else:
+            loop.call_soon(self.load_next_page)
+
+    def load_next_page(self) -> int:
+        """Lädt die nächste Seite und hängt sie an; liefert die Anzahl neuer Zeilen"""
+        self._load_pending = False
+        if self._exhausted:
+            return 0
+        return self._append_page(*self.db_handler.get_entries_page(
+            self.vorname, self.nachname, self.page_size, before=self._next_key
+        ))
+
+    async def load_next_page_async(self) -> int:
+        """Wie load_next_page, die Abfrage läuft aber auf dem Datenbank-Thread"""
+        if self._exhausted or self.async_db is None:
+            return self.load_next_page()
+        # Läuft bereits eine Abfrage, würde dieselbe Seite doppelt angehängt
+        if self._loading:
+            return 0
+        self._loading = True
+        try:
+            page = await self.async_db.get_entries_page(
+                self.vorname, self.nachname, self.page_size, before=self._next_key
+            )
+        finally:
+            self._loading = False
+            self._load_pending = False
+        return self._append_page(*page)
+
+    def _append_page(self, entries: List[TimeEntry], next_key: Optional[Tuple[int, int]]) -> int:
+        """Hängt eine geladene Seite an und merkt sich den Schlüssel der nächsten Seite"""
+        self._next_key = next_key
+        if next_key is None:
+            self._exhausted = True
+        self._entries.extend(entries)
+        # Die Seite beginnt mitten in der Historie: ältere Einträge sind noch nicht geladen
+        for entry, (hinweise, pause_dauer) in zip(entries, annotate_entries(entries, anfang_bekannt=False)):
+            try:
+                self.append(format_history_entry(entry, hinweise, pause_dauer))
+            except Exception as e:
+                print(f"Fehler beim Formatieren eines Eintrags: {e}")
+        return len(entries)
+
+    def shows(self, vorname: str, nachname: str) -> bool:
+        """True, wenn die Quelle die Historie dieses Mitarbeiters zeigt"""
+        return (normalize_name(self.vorname), normalize_name(self.nachname)) == \
+            (normalize_name(vorname), normalize_name(nachname))
+
+    def prepend_entry(self, entry: TimeEntry) -> bool:
+        """Fügt einen gerade gespeicherten Eintrag oben ein, ohne die Datenbank zu fragen.
+
+        Auffälligkeiten und Pausendauer der neuen Zeile ergeben sich aus den
+        bereits geladenen Einträgen; die übrigen Zeilen ändern sich dadurch nicht.
+        Liefert False (und ändert nichts), wenn der Eintrag nicht der neueste ist.
+        """
+        if self._entries and (entry.ts, entry.id) <= (self._entries[0].ts, self._entries[0].id):
+            return False
+        hinweise, pause_dauer = annotate_entries([entry] + self._entries, anfang_bekannt=False)[0]
+        self._entries.insert(0, entry)
+        self.insert(0, format_history_entry(entry, hinweise, pause_dauer))
+        return True
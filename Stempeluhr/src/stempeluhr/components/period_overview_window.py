@@ -0,0 +1,129 @@
+import toga
+from toga.style import Pack
+from toga.style.pack import COLUMN, ROW
+from datetime import date
+from typing import Dict, List, Tuple
+from ..databaselogic.async_db_handler import AsyncDatabaseHandler
+from ..models.time_entry import month_bounds, quarter_bounds, year_bounds
+from ..utils.alerts import show_alert
+
+ZEITRAEUME = ['Monat', 'Quartal', 'Jahr', 'Zeitraum']
+
+
+def period_bounds(art: str, jahr: str, nummer: str, von: str, bis: str) -> Tuple[date, date]:
+    """Beginn und Ende (ausschließlich) des gewählten Zeitraums; ValueError bei ungültiger Eingabe"""
+    if art == 'Zeitraum':
+        return date.fromisoformat(von.strip()), date.fromisoformat(bis.strip())
+    jahr = int(jahr)
+    if art == 'Jahr':
+        start, end = year_bounds(jahr)
+    elif art == 'Quartal':
+        if not 1 <= int(nummer) <= 4:
+            raise ValueError("Quartal muss zwischen 1 und 4 liegen")
+        start, end = quarter_bounds(jahr, int(nummer))
+    else:
+        if not 1 <= int(nummer) <= 12:
+            raise ValueError("Monat muss zwischen 1 und 12 liegen")
+        start, end = month_bounds(jahr, int(nummer))
+    return start.date(), end.date()
+
+
+def _stunden(zeile: Dict) -> Tuple:
+    return (f"{zeile['arbeitszeit']:.2f}", f"{zeile['pausezeit']:.2f}", f"{zeile['gesamtzeit']:.2f}",
+            f"{zeile['ueberstunden']:.2f}")
+
+
+def month_rows(monate: List[Dict]) -> List[Tuple]:
+    return [(f"{m['monat']:02d}/{m['jahr']}",) + _stunden(m) for m in monate]
+
+
+def week_rows(wochen: List[Dict]) -> List[Tuple]:
+    return [(f"KW {w['woche']}/{w['iso_jahr']}", w['von'], w['bis']) + _stunden(w) for w in wochen]
+
+
+class PeriodOverviewWindow:
+    """Fenster mit Wochen- und Monatssummen eines Mitarbeiters für Monat, Quartal, Jahr oder freien Zeitraum"""
+
+    def __init__(self, async_db: AsyncDatabaseHandler, vorname: str, nachname: str):
+        self.async_db = async_db
+        self.monate: List[Dict] = []
+        self.vorname = vorname
+        self.nachname = nachname
+        heute = date.today()
+        self.art_selection = toga.Selection(items=ZEITRAEUME, style=Pack(width=120, padding=(5, 10)))
+        self.jahr_input = toga.TextInput(value=str(heute.year), style=Pack(width=70, padding=(5, 10)))
+        self.nummer_input = toga.TextInput(value=str(heute.month), style=Pack(width=50, padding=(5, 10)))
+        self.von_input = toga.TextInput(value=heute.replace(day=1).isoformat(), style=Pack(width=110, padding=(5, 10)))
+        self.bis_input = toga.TextInput(value=heute.isoformat(), style=Pack(width=110, padding=(5, 10)))
+        self.summe_label = toga.Label('', style=Pack(padding=(5, 10)))
+        stunden = ['Arbeitszeit', 'Pausezeit', 'Gesamtzeit', 'Überstunden']
+        self.monate_table = toga.Table(headings=['Monat'] + stunden, missing_value='', style=Pack(flex=1))
+        self.wochen_table = toga.Table(headings=['Woche', 'Von', 'Bis'] + stunden, missing_value='',
+                                       style=Pack(flex=2))
+
+        self.window = toga.Window(title=f"Übersicht {vorname} {nachname}", size=(800, 600))
+        self.window.content = toga.Box(
+            children=[
+                toga.Box(
+                    children=[
+                        self.art_selection,
+                        toga.Label('Jahr', style=Pack(padding=(10, 0, 5, 10))),
+                        self.jahr_input,
+                        toga.Label('Monat/Quartal', style=Pack(padding=(10, 0, 5, 10))),
+                        self.nummer_input,
+                        toga.Label('Von', style=Pack(padding=(10, 0, 5, 10))),
+                        self.von_input,
+                        toga.Label('Bis (ausschließlich)', style=Pack(padding=(10, 0, 5, 10))),
+                        self.bis_input,
+                        toga.Button('Anzeigen', style=Pack(padding=(5, 10)), on_press=self.on_refresh_press),
+                        toga.Button('PDF Export', style=Pack(padding=(5, 10)), on_press=self.on_pdf_export_press)
+                    ],
+                    style=Pack(direction=ROW)
+                ),
+                self.summe_label,
+                self.monate_table,
+                self.wochen_table
+            ],
+            style=Pack(direction=COLUMN, padding=10, flex=1)
+        )
+
+    async def show(self):
+        self.window.show()
+        await self.refresh()
+
+    async def on_refresh_press(self, widget):
+        await self.refresh()
+
+    async def refresh(self):
+        """Lädt Wochen und Monate des gewählten Zeitraums in einem Durchlauf"""
+        try:
+            start, end = period_bounds(self.art_selection.value, self.jahr_input.value, self.nummer_input.value,
+                                       self.von_input.value, self.bis_input.value)
+        except ValueError as e:
+            show_alert(self.window, 'Fehler', f'Ungültiger Zeitraum: {e}')
+            return
+        uebersicht = await self.async_db.berechne_zeitraumuebersicht(self.vorname, self.nachname, start, end)
+        summe = uebersicht['summe']
+        self.summe_label.text = (
+            f"{start.isoformat()} bis {end.isoformat()}: Arbeitszeit {summe['arbeitszeit']:.2f} h, "
+            f"Pausezeit {summe['pausezeit']:.2f} h, Gesamtzeit {summe['gesamtzeit']:.2f} h, "
+            f"Überstunden {summe['ueberstunden']:.2f} h"
+        )
+        self.monate = uebersicht['monate']
+        self.monate_table.data = month_rows(self.monate)
+        self.wochen_table.data = week_rows(uebersicht['wochen'])
+
+    async def on_pdf_export_press(self, widget):
+        """Exportiert für jeden Monat des angezeigten Zeitraums die Monatsübersicht als PDF"""
+        if not self.monate:
+            show_alert(self.window, 'PDF Export', 'Keine Monate im Zeitraum.')
+            return
+        try:
+            from ..functions.pdf_export import export_monthly_pdf
+            pfade = []
+            for monat in self.monate:
+                pfade.append(await self.async_db.run(export_monthly_pdf, self.async_db.db_handler, self.vorname,
+                                                     self.nachname, monat['jahr'], monat['monat']))
+            show_alert(self.window, 'PDF Export', f"{len(pfade)} PDF(s) gespeichert unter\n{pfade[-1]}")
+        except Exception as e:
+            self.window.error_dialog("Fehler beim PDF Export", f"Es ist ein Fehler aufgetreten: {str(e)}")
@@ -3,29 +3,40 @@ from toga.style import Pack
 from toga.style.pack import COLUMN, ROW, CENTER
 from datetime import datetime
 import logging
+from typing import Optional
 from ..functions.time_tracking import clock_in, clock_out, start_break, end_break
-from ..functions.data_display import get_formatted_history, get_last_user
-from ..functions.status_management import get_application_state
+from .history_source import HistorySource, HISTORY_PAGE_SIZE
+from ..functions.status_management import get_card_data, get_initial_card_data
 from ..utils.alerts import show_alert
+from ..utils.debounce import Debouncer, DEFAULT_DEBOUNCE_DELAY
 from ..databaselogic.db_handler import DatabaseHandler
-import os
+from ..databaselogic.async_db_handler import AsyncDatabaseHandler
+from ..models.employee import normalize_name
+from ..models.name_index import NameIndex
 
 class StempelUhrElement:
-    def __init__(self, element_id: str, db_handler: DatabaseHandler):
+    def __init__(self, element_id: str, db_handler: DatabaseHandler, history_page_size: int = HISTORY_PAGE_SIZE,
+                 name_debounce_delay: float = DEFAULT_DEBOUNCE_DELAY, async_db: AsyncDatabaseHandler = None):
         self.card_id = element_id
         self.db_handler = db_handler
+        # Abfragen aus den Button-Handlern laufen über den Datenbank-Thread
+        self.async_db = async_db or AsyncDatabaseHandler(db_handler)
+        self.history_page_size = history_page_size
         self.is_clocked_in = False
         self.is_in_pause = False
         self.pause_start_time = None
         self.name_changed = False
         self.last_vorname = ""
         self.last_nachname = ""
+        self._updating_user = False
+        # Namensindex für die Vorschläge; nur der Datenbank-Thread tauscht ihn aus,
+        # der GUI-Thread sucht darin ohne Datenbankzugriff
+        self.name_index: Optional[NameIndex] = None
+        # Namensänderungen erst nach einer Tipppause verarbeiten
+        self.name_debouncer = Debouncer(self._reload_for_name, delay=name_debounce_delay)
+        # Letzter Benutzer, Historie und Status kommen erst mit load_initial_async,
+        # damit das Fenster schon vorher erscheinen kann
         self.card = self.create_card()
-        # Lade zuerst den letzten Benutzer
-        self.load_last_user()
-        # Dann lade die Historie und den Status
-        self.load_history()
-        self.restore_state()
 
     def create_card(self):
         # Erstelle einen Container für die Eingabefelder
@@ -40,6 +51,9 @@ class StempelUhrElement:
             on_change=self.on_name_change
         )
 
+        # Bekannte Namen passend zur Eingabe, ein Klick übernimmt den Namen
+        self.suggestion_box = toga.Box(style=Pack(direction=ROW, padding=(0, 10)))
+
         input_container = toga.Box(
             children=[
                 toga.Box(
@@ -48,7 +62,8 @@ class StempelUhrElement:
                         self.nachname_input
                     ],
                     style=Pack(direction=ROW, padding=(5, 0))
-                )
+                ),
+                self.suggestion_box
             ],
             style=Pack(direction=COLUMN)
         )
@@ -81,7 +96,7 @@ class StempelUhrElement:
 
         # Neue Buttons für Monatsübersicht und PDF-Export
         self.monatsuebersicht_button = toga.Button(
-            'Monatsübersicht',
+            'Übersicht',
             style=Pack(padding=(5, 10), width=200),
             on_press=self.on_monatsuebersicht_press
         )
@@ -92,13 +107,20 @@ class StempelUhrElement:
             on_press=self.on_pdf_export_press
         )
 
+        self.teamuebersicht_button = toga.Button(
+            'Teamübersicht',
+            style=Pack(padding=(5, 10), width=200),
+            on_press=self.on_teamuebersicht_press
+        )
+
         button_box = toga.Box(
             children=[
                 self.clock_in_button,
                 self.pause_button,
                 self.clock_out_button,
                 self.monatsuebersicht_button,
-                self.pdf_export_button
+                self.pdf_export_button,
+                self.teamuebersicht_button
             ],
             style=Pack(direction=ROW, padding=(5, 10))
         )
@@ -110,10 +132,18 @@ class StempelUhrElement:
             style=Pack(flex=1)
         )
 
+        # Lädt weitere Seiten für Backends, die Zeilen nicht erst beim Scrollen abfragen
+        self.more_history_button = toga.Button(
+            'Ältere Einträge laden',
+            style=Pack(padding=(5, 0)),
+            on_press=self.on_more_history_press
+        )
+
         # Container für die Tabelle mit automatischer Skalierung
         table_box = toga.Box(
-            children=[self.table],
+            children=[self.table, self.more_history_button],
             style=Pack(
+                direction=COLUMN,
                 padding=5,
                 flex=1
             )
@@ -139,61 +169,185 @@ class StempelUhrElement:
 
     def on_name_change(self, widget):
         """Wird aufgerufen, wenn sich der Name ändert"""
+        if self._updating_user:
+            return
         if self.vorname_input.value != self.last_vorname or self.nachname_input.value != self.last_nachname:
             self.name_changed = True
             self.last_vorname = self.vorname_input.value
             self.last_nachname = self.nachname_input.value
-            # Lade die Historie für den neuen Benutzer
-            self.load_history()
-            self.restore_state()
+            self.show_suggestions()
+            # Historie und Status erst laden, wenn nicht mehr getippt wird
+            self.name_debouncer.trigger()
+
+    def show_suggestions(self):
+        """Zeigt bekannte Namen, die zur Eingabe passen.
 
-    def load_history(self):
-        """Lädt die Historie für den aktuellen Benutzer"""
+        Gesucht wird nur im Namensindex im Speicher, nie in der Datenbank;
+        solange er noch nicht geladen ist, gibt es keine Vorschläge.
+        """
+        vorname = self.vorname_input.value
+        nachname = self.nachname_input.value
+        index = self.name_index
+        vorschlaege = index.suggest(vorname, nachname) if index is not None else []
+        # Ein vollständig eingegebener Name braucht keinen Vorschlag mehr
+        if vorschlaege == [(normalize_name(vorname), normalize_name(nachname))]:
+            vorschlaege = []
+        for child in list(self.suggestion_box.children):
+            self.suggestion_box.remove(child)
+        for vorschlag_vorname, vorschlag_nachname in vorschlaege:
+            self.suggestion_box.add(toga.Button(
+                f"{vorschlag_vorname} {vorschlag_nachname}",
+                style=Pack(padding=(0, 5)),
+                on_press=lambda widget, v=vorschlag_vorname, n=vorschlag_nachname: self.select_suggestion(v, n)
+            ))
+
+    def select_suggestion(self, vorname: str, nachname: str):
+        """Übernimmt einen vorgeschlagenen Namen und lädt dessen Historie"""
+        self.update_user_info(vorname, nachname)
+        self.show_suggestions()
+        self.name_changed = True
+        self.name_debouncer.trigger()
+
+    async def _reload_for_name(self, generation: int):
+        """Lädt Historie und Status für den eingegebenen Namen, sofern die Eingabe noch aktuell ist"""
         vorname = self.vorname_input.value
         nachname = self.nachname_input.value
-        self.table.data.clear()
-        
         try:
-            # Lade Historie für den aktuellen Benutzer
-            self.table.data = get_formatted_history(vorname, nachname)
+            card = await self._fetch_card_data(vorname, nachname)
         except Exception as e:
             print(f"Fehler beim Laden der Historie: {e}")
-            self.table.data = []
+            card = None
+        # Ergebnisse einer veralteten Eingabe nicht anzeigen
+        if not self.name_debouncer.is_current(generation):
+            return
+        if card is None:
+            self._show_load_error(vorname, nachname)
+            return
+        self._apply_card_data(vorname, nachname, *card)
+        # Hat ein anderes Terminal inzwischen neue Mitarbeiter angelegt, kommen sie so in die Vorschläge
+        await self._refresh_name_index()
 
-    def load_last_user(self):
-        """Lädt den letzten Benutzer"""
+    async def _refresh_name_index(self):
+        """Holt den aktuellen Namensindex über den Datenbank-Thread"""
         try:
-            # Hole den letzten Benutzer
-            last_user = get_last_user()
-            if last_user:
-                self.update_user_info(last_user['vorname'], last_user['nachname'])
-                # Lade die Historie für den gefundenen Benutzer
-                self.load_history()
-                # Stelle den Status wieder her
-                self.restore_state()
+            self.name_index = await self.async_db.name_index()
+        except Exception as e:
+            print(f"Fehler beim Laden der Namensvorschläge: {e}")
+
+    async def _fetch_card_data(self, vorname: str, nachname: str):
+        """Holt die erste Seite der Historie und den Status in einem Lesevorgang über den Datenbank-Thread.
+
+        Liefert (erste Seite, Status) oder None, wenn das Laden fehlschlug.
+        """
+        card = await self.async_db.run(get_card_data, self.db_handler, self.history_page_size, vorname, nachname)
+        if card is None:
+            return None
+        return card[2], card[3]
+
+    def _show_load_error(self, vorname: str, nachname: str):
+        """Leert Historie und Status nach einem fehlgeschlagenen Laden und meldet den Fehler"""
+        # Historie und Buttons des vorherigen Mitarbeiters dürfen nicht stehen bleiben
+        self.table.data = []
+        self.more_history_button.enabled = False
+        self.apply_state(None)
+        show_alert(self.vorname_input.window, 'Fehler',
+                   f'Die Daten von {vorname} {nachname} konnten nicht geladen werden. Bitte erneut versuchen.')
+
+    def _apply_card_data(self, vorname: str, nachname: str, first_page, state):
+        """Zeigt bereits geladene Historie und Status an"""
+        source = HistorySource(
+            self.table.accessors,
+            self.db_handler,
+            vorname,
+            nachname,
+            page_size=self.history_page_size,
+            first_page=first_page,
+            async_db=self.async_db
+        )
+        self.table.data = source
+        self.more_history_button.enabled = not source.exhausted
+        self.apply_state(state)
+
+    async def refresh_async(self):
+        """Lädt letzten Benutzer, Historie und Status in einem Lesevorgang, ohne die Oberfläche zu blockieren"""
+        try:
+            card = await self.async_db.run(get_card_data, self.db_handler, self.history_page_size)
+            if card is None:
+                return
+            vorname, nachname, first_page, state = card
+            self.update_user_info(vorname, nachname)
+            self._apply_card_data(vorname, nachname, first_page, state)
+        except Exception as e:
+            print(f"Fehler beim Aktualisieren der Anzeige: {e}")
+
+    @property
+    def reloads_saved(self) -> int:
+        """Anzahl der durch die Entprellung eingesparten Neuladevorgänge (Telemetrie)"""
+        return self.name_debouncer.saved
+
+    async def on_more_history_press(self, widget):
+        """Lädt die nächste Seite der Historie"""
+        if isinstance(self.table.data, HistorySource):
+            await self.table.data.load_next_page_async()
+            self.more_history_button.enabled = not self.table.data.exhausted
+
+    async def load_initial_async(self) -> bool:
+        """Lädt letzten Benutzer, erste Seite der Historie und Status mit einer Abfrage.
+
+        Hat der Benutzer inzwischen selbst einen Namen eingegeben, wird das
+        Ergebnis verworfen. Liefert True, wenn etwas angezeigt wurde.
+        """
+        generation = self.name_debouncer.generation
+        try:
+            card = await self.async_db.run(get_initial_card_data, self.db_handler, self.history_page_size)
         except Exception as e:
             print(f"Fehler beim Laden des letzten Benutzers: {e}")
+            card = None
+        angezeigt = card is not None and self.name_debouncer.is_current(generation)
+        if angezeigt:
+            vorname, nachname, first_page, state = card
+            self.update_user_info(vorname, nachname)
+            self._apply_card_data(vorname, nachname, first_page, state)
+        # Namensindex nach der ersten Anzeige im Hintergrund aufbauen, damit Vorschläge nie auf die Datenbank warten
+        await self._refresh_name_index()
+        return angezeigt
 
     def update_user_info(self, vorname, nachname):
         """Aktualisiert die Benutzerinformationen"""
-        self.vorname_input.value = vorname
-        self.nachname_input.value = nachname
+        # Programmatische Änderungen sollen kein zusätzliches Neuladen auslösen
+        self._updating_user = True
+        try:
+            self.vorname_input.value = vorname
+            self.nachname_input.value = nachname
+        finally:
+            self._updating_user = False
         self.last_vorname = vorname
         self.last_nachname = nachname
         self.name_changed = False
 
-    def restore_state(self):
-        vorname = self.vorname_input.value
-        nachname = self.nachname_input.value
-        state = get_application_state(self.db_handler, vorname, nachname)
-        if state:
-            self.is_clocked_in = state['is_clocked_in']
-            self.is_in_pause = state['is_in_pause']
-            self.pause_start_time = state['pause_start_time']
-            self.pause_button.text = state['pause_button_text']
-            self.pause_button.enabled = state['pause_button_enabled']
-
-    def on_pause_press(self, button):
+    def apply_state(self, state):
+        """Übernimmt einen Status aus get_application_state in die Oberfläche.
+
+        Ohne Status (Laden fehlgeschlagen) wird auf den Grundzustand
+        zurückgesetzt und nicht gestempelt, bis ein Status geladen ist.
+        """
+        if not state:
+            self.is_clocked_in = False
+            self.is_in_pause = False
+            self.pause_start_time = None
+            self.pause_button.text = 'Pause anfangen'
+            for button in (self.clock_in_button, self.pause_button, self.clock_out_button):
+                button.enabled = False
+            return
+        self.is_clocked_in = state['is_clocked_in']
+        self.is_in_pause = state['is_in_pause']
+        self.pause_start_time = state['pause_start_time']
+        self.pause_button.text = state['pause_button_text']
+        self.pause_button.enabled = state['pause_button_enabled']
+        self.clock_in_button.enabled = True
+        self.clock_out_button.enabled = True
+
+    async def on_pause_press(self, button):
         """Behandelt das Drücken des Pause-Buttons"""
         vorname = self.vorname_input.value.strip()
         nachname = self.nachname_input.value.strip()
@@ -202,20 +356,12 @@ class StempelUhrElement:
             show_alert(self.vorname_input.window, 'Fehler', 'Bitte Vor- und Nachnamen eingeben!')
             return
         
-        last_entry = self.db_handler.get_last_entry(vorname, nachname)
-        if not last_entry:
-            if start_break(vorname, nachname, self.vorname_input.window, self.db_handler):
-                self.load_history()
-                self.load_last_user()
+        state = await self.async_db.get_state(vorname, nachname)
+        if state.is_in_pause:
+            action = end_break
         else:
-            if last_entry.status == "Pause Start":
-                if end_break(vorname, nachname, self.vorname_input.window, self.db_handler):
-                    self.load_history()
-                    self.load_last_user()
-            else:
-                if start_break(vorname, nachname, self.vorname_input.window, self.db_handler):
-                    self.load_history()
-                    self.load_last_user()
+            action = start_break
+        await self._stamp(action, vorname, nachname)
 
     async def on_kommen_press(self, widget):
         if self.is_clocked_in:
@@ -223,12 +369,13 @@ class StempelUhrElement:
         else:
             vorname = self.vorname_input.value
             nachname = self.nachname_input.value
-            if clock_in(vorname, nachname, self.vorname_input.window, self.db_handler):
-                self.load_history()
-                self.load_last_user()
-                self.restore_state()
+            # Meldungen nur im GUI-Thread anzeigen, daher vor dem Speichern prüfen
+            if not vorname or not nachname:
+                show_alert(self.vorname_input.window, 'Fehler', 'Bitte Vor- und Nachnamen eingeben!')
+                return
+            await self._stamp(clock_in, vorname, nachname)
 
-    def on_gehen_press(self, widget):
+    async def on_gehen_press(self, widget):
         if not self.is_clocked_in:
             show_alert(self.vorname_input.window, 'Fehler', 'Sie sind nicht eingestempelt!')
         elif self.is_in_pause:
@@ -236,10 +383,36 @@ class StempelUhrElement:
         else:
             vorname = self.vorname_input.value
             nachname = self.nachname_input.value
-            if clock_out(vorname, nachname, self.vorname_input.window, self.db_handler):
-                self.load_history()
-                self.load_last_user()
-                self.restore_state()
+            await self._stamp(clock_out, vorname, nachname)
+
+    async def _stamp(self, action, vorname: str, nachname: str) -> bool:
+        """Speichert einen Stempel und zeigt ihn an, ohne Historie und Status neu zu laden.
+
+        Den gespeicherten Eintrag liefert der Zustands-Cache, in den save_entry
+        schreibt. Er wird oben in die Tabelle eingefügt, die Buttons folgen aus
+        dem neuen Zustand. Zeigt die Tabelle gerade einen anderen Namen (die
+        Eingabe wurde noch nicht neu geladen) oder ist der Eintrag nicht der
+        neueste, wird wie bisher alles neu geladen.
+        """
+        window = self.vorname_input.window
+
+        def stamp():
+            if not action(vorname, nachname, window, self.db_handler):
+                return None
+            return self.db_handler.get_state(vorname, nachname)
+
+        state = await self.async_db.run(stamp)
+        if state is None:
+            return False
+        source = self.table.data
+        if (state.last_entry is not None and isinstance(source, HistorySource)
+                and source.shows(vorname, nachname) and source.prepend_entry(state.last_entry)):
+            self.apply_state(state.to_dict())
+        else:
+            await self.refresh_async()
+        # Ein neuer Mitarbeiter steht danach im Index des Datenbank-Threads
+        await self._refresh_name_index()
+        return True
 
     def get_card(self):
         return self.card
@@ -260,7 +433,7 @@ class StempelUhrElement:
             self.vorname_input.window.app.exit()
 
     async def on_monatsuebersicht_press(self, widget):
-        """Zeigt die Monatsübersicht an."""
+        """Zeigt die Übersicht für Monat, Quartal, Jahr oder einen freien Zeitraum an."""
         vorname = self.vorname_input.value
         nachname = self.nachname_input.value
         
@@ -268,42 +441,14 @@ class StempelUhrElement:
             show_alert(self.vorname_input.window, 'Fehler', 'Bitte geben Sie Vor- und Nachname ein.')
             return
         
-        # Aktuelles Datum
-        jetzt = datetime.now()
-        jahr = jetzt.year
-        monat = jetzt.month
-        
-        # Berechne und speichere die Übersicht
-        wochen_uebersichten = self.db_handler.speichere_monatsuebersicht(vorname, nachname, jahr, monat)
-        
-        # Erstelle die Nachricht
-        nachricht = "Monatsübersicht:\n\n"
-        for woche in wochen_uebersichten:
-            nachricht += f"Kalenderwoche {woche['woche']}:\n"
-            nachricht += f"Arbeitszeit: {woche['arbeitszeit']:.2f} Stunden\n"
-            nachricht += f"Pausezeit: {woche['pausezeit']:.2f} Stunden\n"
-            nachricht += f"Gesamtzeit: {woche['gesamtzeit']:.2f} Stunden\n"
-            nachricht += f"Überstunden: {woche['ueberstunden']:.2f} Stunden\n\n"
-        
-        # Summen berechnen
-        summen = {
-            "arbeitszeit": sum(w['arbeitszeit'] for w in wochen_uebersichten),
-            "pausezeit": sum(w['pausezeit'] for w in wochen_uebersichten),
-            "gesamtzeit": sum(w['gesamtzeit'] for w in wochen_uebersichten),
-            "ueberstunden": sum(w['ueberstunden'] for w in wochen_uebersichten)
-        }
-        
-        nachricht += "Summen:\n"
-        nachricht += f"Gesamte Arbeitszeit: {summen['arbeitszeit']:.2f} Stunden\n"
-        nachricht += f"Gesamte Pausezeit: {summen['pausezeit']:.2f} Stunden\n"
-        nachricht += f"Gesamte Zeit: {summen['gesamtzeit']:.2f} Stunden\n"
-        nachricht += f"Gesamte Überstunden: {summen['ueberstunden']:.2f} Stunden"
-        
-        # Zeige Dialog
-        self.vorname_input.window.info_dialog(
-            'Monatsübersicht',
-            nachricht
-        )
+        # Startet mit dem aktuellen Monat, Zeitraum im Fenster wählbar
+        from .period_overview_window import PeriodOverviewWindow
+        await PeriodOverviewWindow(self.async_db, vorname, nachname).show()
+
+    async def on_teamuebersicht_press(self, widget):
+        """Zeigt Arbeitszeit und Überstunden aller Mitarbeiter im aktuellen Monat"""
+        from .team_overview_window import TeamOverviewWindow
+        await TeamOverviewWindow(self.async_db).show()
 
     async def on_pdf_export_press(self, widget):
         """Exportiert die Monatsübersicht als PDF"""
@@ -311,23 +456,15 @@ class StempelUhrElement:
             # Hole den aktuellen Monat und Jahr
             current_date = datetime.now()
             
-            # Erstelle den Dateinamen
-            filename = f"Arbeitszeiterfassung_{self.vorname_input.value}_{self.nachname_input.value}_{current_date.year}_{current_date.month:02d}.pdf"
-            
-            # Erstelle den Pfad im Dokumente-Ordner
-            output_path = os.path.join(os.path.expanduser("~"), "Dokumente", "Stempel", "exports")
-            os.makedirs(output_path, exist_ok=True)
-            pdf_path = os.path.join(output_path, filename)
-            
-            # Erstelle die PDF
-            from ..functions.pdf_export import create_monthly_pdf
-            create_monthly_pdf(
+            # Erstelle die PDF im Dokumente-Ordner
+            from ..functions.pdf_export import export_monthly_pdf
+            pdf_path = await self.async_db.run(
+                export_monthly_pdf,
                 self.db_handler,
                 self.vorname_input.value,
                 self.nachname_input.value,
                 current_date.year,
-                current_date.month,
-                pdf_path
+                current_date.month
             )
             
             # Zeige Erfolgsmeldung
@@ -0,0 +1,75 @@
+import toga
+from toga.style import Pack
+from toga.style.pack import COLUMN, ROW
+from datetime import date
+from typing import Dict, List, Tuple
+from ..databaselogic.async_db_handler import AsyncDatabaseHandler
+from ..utils.alerts import show_alert
+
+
+def current_month() -> Tuple[date, date]:
+    """Erster Tag dieses und des nächsten Monats"""
+    heute = date.today()
+    start = heute.replace(day=1)
+    ende = date(start.year + 1, 1, 1) if start.month == 12 else date(start.year, start.month + 1, 1)
+    return start, ende
+
+
+def table_rows(zeilen: List[Dict]) -> List[Tuple]:
+    """Zeilen der Teamübersicht für die Tabelle (Stunden mit zwei Nachkommastellen)"""
+    return [(z['vorname'], z['nachname'], f"{z['arbeitszeit']:.2f}", f"{z['pausezeit']:.2f}",
+             f"{z['gesamtzeit']:.2f}", f"{z['ueberstunden']:.2f}") for z in zeilen]
+
+
+class TeamOverviewWindow:
+    """Fenster mit Arbeitszeit und Überstunden aller Mitarbeiter für einen Zeitraum"""
+
+    def __init__(self, async_db: AsyncDatabaseHandler):
+        self.async_db = async_db
+        start, ende = current_month()
+        self.start_input = toga.TextInput(value=start.isoformat(), style=Pack(width=120, padding=(5, 10)))
+        self.ende_input = toga.TextInput(value=ende.isoformat(), style=Pack(width=120, padding=(5, 10)))
+        self.refresh_button = toga.Button('Aktualisieren', style=Pack(padding=(5, 10)),
+                                          on_press=self.on_refresh_press)
+        self.table = toga.Table(
+            headings=['Vorname', 'Nachname', 'Arbeitszeit', 'Pausezeit', 'Gesamtzeit', 'Überstunden'],
+            missing_value='',
+            style=Pack(flex=1)
+        )
+        self.window = toga.Window(title="Teamübersicht", size=(700, 500))
+        self.window.content = toga.Box(
+            children=[
+                toga.Box(
+                    children=[
+                        toga.Label('Von', style=Pack(padding=(10, 0, 5, 10))),
+                        self.start_input,
+                        toga.Label('Bis (ausschließlich)', style=Pack(padding=(10, 0, 5, 10))),
+                        self.ende_input,
+                        self.refresh_button
+                    ],
+                    style=Pack(direction=ROW)
+                ),
+                self.table
+            ],
+            style=Pack(direction=COLUMN, padding=10, flex=1)
+        )
+
+    async def show(self):
+        self.window.show()
+        await self.refresh()
+
+    async def on_refresh_press(self, widget):
+        await self.refresh()
+
+    async def refresh(self):
+        """Berechnet die Übersicht auf dem Datenbank-Thread neu"""
+        try:
+            start = date.fromisoformat(self.start_input.value.strip())
+            ende = date.fromisoformat(self.ende_input.value.strip())
+        except ValueError:
+            show_alert(self.window, 'Fehler', 'Bitte Datum im Format JJJJ-MM-TT eingeben.')
+            return
+        # NumPy erst laden, wenn die Übersicht gebraucht wird
+        from ..functions.team_overview import berechne_teamuebersicht
+        zeilen = await self.async_db.run(berechne_teamuebersicht, self.async_db.db_handler, start, ende)
+        self.table.data = table_rows(zeilen)
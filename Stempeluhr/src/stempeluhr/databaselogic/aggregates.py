@@ -0,0 +1,287 @@
+import json
+import sqlite3
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+from ..models.sessions import day_totals, iter_sessions, local_date
+from ..models.time_entry import STATUS_CODES, TimeEntryColumns
+
+# Sollarbeitszeit, ab der Überstunden gezählt werden
+SOLL_SEKUNDEN_TAG = 8 * 3600
+SOLL_SEKUNDEN_WOCHE = 40 * 3600
+
+EIN = STATUS_CODES['Ein']
+AUS = STATUS_CODES['Aus']
+PAUSE_START = STATUS_CODES['Pause Start']
+PAUSE_ENDE = STATUS_CODES['Pause Ende']
+
+# Zu welchem Beginn-Status ein End-Status gehört
+_PARTNER = {AUS: EIN, PAUSE_ENDE: PAUSE_START}
+
+# Nur die Stempel der laufenden Datenbank; archivierte Jahre liegen in
+# angehängten Datenbanken (siehe DatabaseHandler.stempel_tables)
+LIVE_TABLES = ("stempel",)
+
+
+def union_all(select: str, tabellen: Sequence[str]) -> str:
+    """Dieselbe Abfrage über mehrere Stempeltabellen, verbunden mit UNION ALL"""
+    return " UNION ALL ".join(select.format(tabelle=tabelle) for tabelle in tabellen)
+
+
+def create_tables(cursor: sqlite3.Cursor):
+    """Legt die Tabellen für Tages- und Wochensummen an"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS tagesaggregate (
+        mitarbeiter_id INTEGER NOT NULL,
+        datum TEXT NOT NULL,
+        arbeit_sekunden INTEGER NOT NULL DEFAULT 0,
+        pause_sekunden INTEGER NOT NULL DEFAULT 0,
+        ueberstunden_sekunden INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (mitarbeiter_id, datum)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS wochenaggregate (
+        mitarbeiter_id INTEGER NOT NULL,
+        iso_jahr INTEGER NOT NULL,
+        iso_woche INTEGER NOT NULL,
+        arbeit_sekunden INTEGER NOT NULL DEFAULT 0,
+        pause_sekunden INTEGER NOT NULL DEFAULT 0,
+        ueberstunden_sekunden INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (mitarbeiter_id, iso_jahr, iso_woche)
+    ) WITHOUT ROWID
+    """)
+
+
+def compute_day_totals(events: Iterable[Tuple[int, int]]) -> Dict[date, list]:
+    """Paart chronologisch sortierte (ts, status_code) Ereignisse zu Arbeits- und Pausenzeiten.
+
+    Die Paarung übernimmt die Sitzungs-Engine (models.sessions). Liefert
+    {datum: [arbeit, pause]} in Sekunden.
+    """
+    return day_totals(iter_sessions(events))
+
+
+def extended_start(cursor: sqlite3.Cursor, mitarbeiter_id: int, von: int,
+                   tabellen: Sequence[str] = LIVE_TABLES) -> int:
+    """Ladebeginn vor von, sodass eine bei von laufende Schicht bzw. Pause vollständig ist"""
+    beginn = von
+    for beginn_status in (EIN, PAUSE_START):
+        ts = _neighbour_ts(cursor, mitarbeiter_id, von, beginn_status, before=True, tabellen=tabellen)
+        if ts is not None:
+            beginn = min(beginn, ts)
+    return beginn
+
+
+def extended_end(cursor: sqlite3.Cursor, mitarbeiter_id: int, bis: int,
+                 tabellen: Sequence[str] = LIVE_TABLES) -> Optional[int]:
+    """Ladegrenze hinter bis, sodass Schichten und Pausen, die vor bis beginnen, vollständig sind.
+
+    Das ist der Zeitpunkt nach dem ersten "Aus" und dem ersten "Pause Ende" ab
+    bis, oder None (bis zum Ende der Historie laden).
+    """
+    ende = bis
+    for end_status in (AUS, PAUSE_ENDE):
+        ts = _neighbour_ts(cursor, mitarbeiter_id, bis, end_status, before=False, tabellen=tabellen)
+        if ts is None:
+            return None
+        ende = max(ende, ts + 1)
+    return ende
+
+
+def load_columns(cursor: sqlite3.Cursor, mitarbeiter_id: int, start_ts: Optional[int] = None,
+                 end_ts: Optional[int] = None, tabellen: Sequence[str] = LIVE_TABLES) -> TimeEntryColumns:
+    """Lädt die Einträge eines Mitarbeiters im Zeitraum [start_ts, end_ts) chronologisch als Spalten"""
+    select = """
+        SELECT ts, status_code, COALESCE(pause_sekunden, -1), id FROM {tabelle}
+        WHERE mitarbeiter_id = ? AND ts >= ? AND ts < ?"""
+    cursor.execute(union_all(select, tabellen) + " ORDER BY ts, id", (
+        mitarbeiter_id,
+        start_ts if start_ts is not None else -2 ** 63,
+        end_ts if end_ts is not None else 2 ** 63 - 1
+    ) * len(tabellen))
+    return TimeEntryColumns.from_rows(cursor.fetchall())
+
+
+def load_team_columns(cursor: sqlite3.Cursor, mitarbeiter_ids: Sequence[Optional[int]], von: int, bis: int,
+                      tabellen: Sequence[str] = LIVE_TABLES) -> Tuple[array, TimeEntryColumns]:
+    """Lädt die Einträge mehrerer Mitarbeiter ab von in einer Abfrage als Spalten.
+
+    Pro Mitarbeiter wird wie mit extended_end bis zum ersten "Aus" und
+    "Pause Ende" ab bis geladen. Liefert die Position des Mitarbeiters in
+    mitarbeiter_ids je Eintrag und die Spalten, sortiert nach Position und
+    dann chronologisch. Unbekannte Mitarbeiter (id None) haben keine Einträge.
+    """
+    def erstes_ab(status_code: int) -> str:
+        # MIN ignoriert Tabellen ohne Treffer
+        return "(SELECT MIN(ts) FROM (" + union_all(f"""
+            SELECT (SELECT ts FROM {{tabelle}}
+                    WHERE mitarbeiter_id = personen.mitarbeiter_id AND ts >= :bis AND status_code = {status_code}
+                    ORDER BY ts LIMIT 1) AS ts""", tabellen) + "))"
+
+    # Das mehrstellige MAX ist NULL, sobald ein Ende fehlt; dann bis zum Ende der Historie laden
+    cursor.execute(f"""
+        WITH personen AS (
+            SELECT key AS position, value AS mitarbeiter_id FROM json_each(:ids)
+        ), grenzen AS (
+            SELECT position, mitarbeiter_id,
+                   COALESCE(MAX(:bis, {erstes_ab(AUS)} + 1, {erstes_ab(PAUSE_ENDE)} + 1), {2 ** 63 - 1}) AS ende
+            FROM personen
+        )
+    """ + union_all("""
+        SELECT grenzen.position, stempel.ts, stempel.status_code, COALESCE(stempel.pause_sekunden, -1), stempel.id
+        FROM grenzen JOIN {tabelle} AS stempel
+            ON stempel.mitarbeiter_id = grenzen.mitarbeiter_id AND stempel.ts >= :von AND stempel.ts < grenzen.ende""",
+        tabellen) + " ORDER BY 1, 2, 5", {"ids": json.dumps(list(mitarbeiter_ids)), "von": von, "bis": bis})
+    rows = cursor.fetchall()
+    return array('q', (row[0] for row in rows)), TimeEntryColumns.from_rows([row[1:] for row in rows])
+
+
+def _add_day(cursor: sqlite3.Cursor, mitarbeiter_id: int, datum: date, arbeit: int, pause: int):
+    """Addiert Arbeits- und Pausenzeit auf einen Tag und aktualisiert die Überstunden"""
+    cursor.execute("""
+        INSERT INTO tagesaggregate (mitarbeiter_id, datum, arbeit_sekunden, pause_sekunden, ueberstunden_sekunden)
+        VALUES (?, ?, ?, ?, MAX(0, ? - ? - ?))
+        ON CONFLICT (mitarbeiter_id, datum) DO UPDATE SET
+            arbeit_sekunden = arbeit_sekunden + excluded.arbeit_sekunden,
+            pause_sekunden = pause_sekunden + excluded.pause_sekunden,
+            ueberstunden_sekunden = MAX(0, arbeit_sekunden + excluded.arbeit_sekunden
+                                           - pause_sekunden - excluded.pause_sekunden - ?)
+    """, (mitarbeiter_id, datum.isoformat(), arbeit, pause, arbeit, pause, SOLL_SEKUNDEN_TAG, SOLL_SEKUNDEN_TAG))
+
+
+def _refresh_week(cursor: sqlite3.Cursor, mitarbeiter_id: int, datum: date):
+    """Berechnet die Wochensumme der ISO-Woche eines Datums aus den Tageswerten neu"""
+    iso_jahr, iso_woche, wochentag = datum.isocalendar()
+    montag = datum - timedelta(days=wochentag - 1)
+    sonntag = montag + timedelta(days=6)
+    cursor.execute("""
+        DELETE FROM wochenaggregate WHERE mitarbeiter_id = ? AND iso_jahr = ? AND iso_woche = ?
+    """, (mitarbeiter_id, iso_jahr, iso_woche))
+    # Wochen ohne Tageswerte bekommen keine Zeile
+    cursor.execute("""
+        INSERT INTO wochenaggregate
+            (mitarbeiter_id, iso_jahr, iso_woche, arbeit_sekunden, pause_sekunden, ueberstunden_sekunden)
+        SELECT ?, ?, ?, SUM(arbeit_sekunden), SUM(pause_sekunden),
+               MAX(0, SUM(arbeit_sekunden) - SUM(pause_sekunden) - ?)
+        FROM tagesaggregate
+        WHERE mitarbeiter_id = ? AND datum >= ? AND datum <= ?
+        HAVING COUNT(*) > 0
+    """, (mitarbeiter_id, iso_jahr, iso_woche, SOLL_SEKUNDEN_WOCHE,
+          mitarbeiter_id, montag.isoformat(), sonntag.isoformat()))
+
+
+def apply_entry(cursor: sqlite3.Cursor, mitarbeiter_id: int, entry_id: int, ts: int, status_code: int) -> bool:
+    """Aktualisiert die Summen nach dem Speichern eines Eintrags (in derselben Transaktion).
+
+    Liefert True, wenn der Eintrag der neueste des Mitarbeiters ist.
+    """
+    # Liegt der Eintrag nicht am Ende der Historie, kann sich die Paarung der
+    # Nachbarn ändern; dann werden die betroffenen Tage neu berechnet
+    cursor.execute("""
+        SELECT 1 FROM stempel
+        WHERE mitarbeiter_id = ? AND (ts, id) > (?, ?)
+        LIMIT 1
+    """, (mitarbeiter_id, ts, entry_id))
+    if cursor.fetchone():
+        refresh_range(cursor, mitarbeiter_id, ts, ts)
+        return False
+
+    beginn_status = _PARTNER.get(status_code)
+    if beginn_status is None:
+        return True
+    cursor.execute("""
+        SELECT ts, status_code FROM stempel
+        WHERE mitarbeiter_id = ? AND (ts, id) < (?, ?) AND status_code IN (?, ?)
+        ORDER BY ts DESC, id DESC
+        LIMIT 1
+    """, (mitarbeiter_id, ts, entry_id, beginn_status, status_code))
+    row = cursor.fetchone()
+    if not row or row[1] != beginn_status:
+        return True
+    datum = local_date(row[0])
+    dauer = ts - row[0]
+    if status_code == AUS:
+        _add_day(cursor, mitarbeiter_id, datum, dauer, 0)
+    else:
+        _add_day(cursor, mitarbeiter_id, datum, 0, dauer)
+    _refresh_week(cursor, mitarbeiter_id, datum)
+    return True
+
+
+def day_start(tag: date) -> int:
+    """Zeitstempel von 0 Uhr (lokal) eines Tages"""
+    return int(datetime(tag.year, tag.month, tag.day).timestamp())
+
+
+def _neighbour_ts(cursor: sqlite3.Cursor, mitarbeiter_id: int, ts: int, status_code: int,
+                  before: bool, tabellen: Sequence[str] = LIVE_TABLES) -> Optional[int]:
+    """Zeitstempel des letzten Eintrags eines Status vor ts bzw. des ersten ab ts"""
+    if before:
+        sql = union_all("SELECT ts, id FROM {tabelle} WHERE mitarbeiter_id = ? AND ts < ? AND status_code = ?",
+                        tabellen) + " ORDER BY ts DESC, id DESC LIMIT 1"
+    else:
+        sql = union_all("SELECT ts, id FROM {tabelle} WHERE mitarbeiter_id = ? AND ts >= ? AND status_code = ?",
+                        tabellen) + " ORDER BY ts, id LIMIT 1"
+    row = cursor.execute(sql, (mitarbeiter_id, ts, status_code) * len(tabellen)).fetchone()
+    return row[0] if row else None
+
+
+def refresh_range(cursor: sqlite3.Cursor, mitarbeiter_id: int, min_ts: int, max_ts: int):
+    """Berechnet die Summen aller Tage neu, die neue Einträge zwischen min_ts und max_ts verändern können.
+
+    Mit Einträgen ab min_ts kann höchstens das letzte "Ein" bzw. "Pause Start"
+    davor neu gepaart werden; betroffen sind also die Tage von dessen Beginn
+    bis zum Tag von max_ts. Für diese Tage werden die Einträge bis zum ersten
+    "Aus" und "Pause Ende" nach Tagesende geladen und die Summen ersetzt.
+    """
+    erster_tag = local_date(min_ts)
+    for beginn_status in (EIN, PAUSE_START):
+        beginn = _neighbour_ts(cursor, mitarbeiter_id, min_ts, beginn_status, before=True)
+        if beginn is not None:
+            erster_tag = min(erster_tag, local_date(beginn))
+    letzter_tag = local_date(max_ts)
+    von = day_start(erster_tag)
+    bis = day_start(letzter_tag + timedelta(days=1))
+
+    # Offene Paare des letzten Tages enden erst mit dem nächsten "Aus" bzw. "Pause Ende"
+    spalten = load_columns(cursor, mitarbeiter_id, von, extended_end(cursor, mitarbeiter_id, bis))
+    totals = compute_day_totals(zip(spalten.ts, spalten.status_codes))
+
+    tage_alt = [date.fromisoformat(row[0]) for row in cursor.execute("""
+        SELECT datum FROM tagesaggregate WHERE mitarbeiter_id = ? AND datum >= ? AND datum <= ?
+    """, (mitarbeiter_id, erster_tag.isoformat(), letzter_tag.isoformat())).fetchall()]
+    cursor.execute("""
+        DELETE FROM tagesaggregate WHERE mitarbeiter_id = ? AND datum >= ? AND datum <= ?
+    """, (mitarbeiter_id, erster_tag.isoformat(), letzter_tag.isoformat()))
+    tage_neu = [d for d in totals if erster_tag <= d <= letzter_tag]
+    for datum in tage_neu:
+        arbeit, pause = totals[datum]
+        _add_day(cursor, mitarbeiter_id, datum, arbeit, pause)
+    for montag in {d - timedelta(days=d.weekday()) for d in tage_alt + tage_neu}:
+        _refresh_week(cursor, mitarbeiter_id, montag)
+
+
+def rebuild(cursor: sqlite3.Cursor, mitarbeiter_id: Optional[int] = None, tabellen: Sequence[str] = LIVE_TABLES):
+    """Berechnet die Summen aus allen Einträgen neu (für einen oder alle Mitarbeiter).
+
+    Die Summen archivierter Jahre bleiben nur erhalten, wenn ihre Archive in
+    tabellen enthalten sind.
+    """
+    if mitarbeiter_id is not None:
+        personen = [mitarbeiter_id]
+        cursor.execute("DELETE FROM tagesaggregate WHERE mitarbeiter_id = ?", (mitarbeiter_id,))
+        cursor.execute("DELETE FROM wochenaggregate WHERE mitarbeiter_id = ?", (mitarbeiter_id,))
+    else:
+        alle = union_all("SELECT mitarbeiter_id FROM {tabelle}", tabellen)
+        personen = [row[0] for row in cursor.execute(f"SELECT DISTINCT mitarbeiter_id FROM ({alle})").fetchall()]
+        cursor.execute("DELETE FROM tagesaggregate")
+        cursor.execute("DELETE FROM wochenaggregate")
+
+    for person in personen:
+        spalten = load_columns(cursor, person, tabellen=tabellen)
+        totals = compute_day_totals(zip(spalten.ts, spalten.status_codes))
+        for datum, (arbeit, pause) in totals.items():
+            _add_day(cursor, person, datum, arbeit, pause)
+        for datum in {d - timedelta(days=d.weekday()) for d in totals}:
+            _refresh_week(cursor, person, datum)
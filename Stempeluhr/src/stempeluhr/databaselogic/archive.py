@@ -0,0 +1,163 @@
+import os
+import sqlite3
+from datetime import datetime
+from typing import List, Sequence, Tuple
+from ..models.time_entry import STATUS_CODES
+
+EIN = STATUS_CODES['Ein']
+AUS = STATUS_CODES['Aus']
+PAUSE_START = STATUS_CODES['Pause Start']
+PAUSE_ENDE = STATUS_CODES['Pause Ende']
+
+# Name, unter dem eine Archivdatei beim Archivieren und Wiederherstellen angehängt wird
+ZIEL = "archiv_ziel"
+
+
+def create_table(cursor: sqlite3.Cursor):
+    """Legt die Tabelle der archivierten Jahre an (Dateiname relativ zur Datenbank)"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS archivjahre (
+        jahr INTEGER PRIMARY KEY,
+        pfad TEXT NOT NULL,
+        eintraege INTEGER NOT NULL,
+        archiviert_am TEXT NOT NULL
+    )
+    """)
+
+
+def archive_file_name(db_path: str, jahr: int) -> str:
+    """Dateiname des Archivs eines Jahres, z.B. stempeluhr_2023.db"""
+    name, endung = os.path.splitext(os.path.basename(db_path))
+    return f"{name}_{jahr}{endung or '.db'}"
+
+
+def year_bounds(jahr: int) -> Tuple[int, int]:
+    """Zeitstempel von Jahresbeginn und Beginn des Folgejahres (lokale Zeit)"""
+    return int(datetime(jahr, 1, 1).timestamp()), int(datetime(jahr + 1, 1, 1).timestamp())
+
+
+class OpenSessionsError(ValueError):
+    """Beim Archivieren laufen an einer Jahresgrenze noch Schichten oder Pausen"""
+
+    def __init__(self, grenze: int, offen: List[Tuple[int, str, str, int]]):
+        self.grenze = grenze
+        self.offen = offen
+        namen = ", ".join(f"{vorname} {nachname} (seit {datetime.fromtimestamp(seit):%d.%m.%Y %H:%M})"
+                          for _, vorname, nachname, seit in offen)
+        super().__init__(f"Am {datetime.fromtimestamp(grenze):%d.%m.%Y} noch eingestempelt: {namen}")
+
+
+def open_sessions(cursor: sqlite3.Cursor, ts: int) -> List[Tuple[int, str, str, int]]:
+    """Mitarbeiter, bei denen zum Zeitpunkt ts eine Schicht oder Pause läuft.
+
+    Liefert (mitarbeiter_id, vorname, nachname, seit); seit ist der Beginn
+    der offenen Schicht bzw. Pause, bei beiden der frühere.
+    """
+    def letzter(spalte: str, beginn: int, ende: int) -> str:
+        return f"""(SELECT {spalte} FROM stempel
+                    WHERE mitarbeiter_id = mitarbeiter.id AND ts < :ts AND status_code IN ({beginn}, {ende})
+                    ORDER BY ts DESC, id DESC LIMIT 1)"""
+
+    rows = cursor.execute(f"""
+        SELECT id, vorname, nachname,
+               {letzter('status_code', EIN, AUS)}, {letzter('ts', EIN, AUS)},
+               {letzter('status_code', PAUSE_START, PAUSE_ENDE)}, {letzter('ts', PAUSE_START, PAUSE_ENDE)}
+        FROM mitarbeiter
+        ORDER BY nachname, vorname
+    """, {"ts": ts}).fetchall()
+    offen = []
+    for mitarbeiter_id, vorname, nachname, schicht, schicht_ts, pause, pause_ts in rows:
+        seit = [beginn_ts for status, beginn_ts in ((schicht, schicht_ts), (pause, pause_ts))
+                if status in (EIN, PAUSE_START)]
+        if seit:
+            offen.append((mitarbeiter_id, vorname, nachname, min(seit)))
+    return offen
+
+
+def year_condition(von: int, bis: int, uebertrag: Sequence[Tuple[int, int]] = ()) -> Tuple[str, tuple]:
+    """Bedingung für die Stempel im Zeitraum [von, bis) ohne übertragene offene Schichten.
+
+    uebertrag enthält (mitarbeiter_id, seit); deren Stempel ab seit bleiben
+    in der laufenden Datenbank.
+    """
+    sql = "ts >= ? AND ts < ?"
+    params = [von, bis]
+    for mitarbeiter_id, seit in uebertrag:
+        sql += " AND NOT (mitarbeiter_id = ? AND ts >= ?)"
+        params += [mitarbeiter_id, seit]
+    return sql, tuple(params)
+
+
+def create_archive_tables(cursor: sqlite3.Cursor):
+    """Schema der Archivdatei: Stempel eines Jahres und die dazugehörigen Mitarbeiter"""
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {ZIEL}.mitarbeiter (
+        id INTEGER PRIMARY KEY,
+        vorname TEXT NOT NULL,
+        nachname TEXT NOT NULL
+    )
+    """)
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {ZIEL}.stempel (
+        id INTEGER PRIMARY KEY,
+        mitarbeiter_id INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        status_code INTEGER NOT NULL,
+        pause_sekunden INTEGER
+    )
+    """)
+    # Derselbe deckende Index wie in der laufenden Datenbank
+    cursor.execute(f"""
+        CREATE INDEX IF NOT EXISTS {ZIEL}.idx_stempel_mitarbeiter_ts
+        ON stempel (mitarbeiter_id, ts, id, status_code, pause_sekunden)
+    """)
+
+
+def copy_year(cursor: sqlite3.Cursor, von: int, bis: int, uebertrag: Sequence[Tuple[int, int]] = ()) -> int:
+    """Kopiert die Stempel im Zeitraum [von, bis) und ihre Mitarbeiter in die angehängte Archivdatei"""
+    bedingung, params = year_condition(von, bis, uebertrag)
+    cursor.execute(f"""
+        INSERT INTO {ZIEL}.mitarbeiter (id, vorname, nachname)
+        SELECT id, vorname, nachname FROM main.mitarbeiter
+        WHERE id IN (SELECT mitarbeiter_id FROM main.stempel WHERE {bedingung})
+    """, params)
+    cursor.execute(f"""
+        INSERT INTO {ZIEL}.stempel (id, mitarbeiter_id, ts, status_code, pause_sekunden)
+        SELECT id, mitarbeiter_id, ts, status_code, pause_sekunden FROM main.stempel
+        WHERE {bedingung}
+        ORDER BY mitarbeiter_id, ts, id
+    """, params)
+    return cursor.rowcount
+
+
+def copy_back(cursor: sqlite3.Cursor) -> int:
+    """Übernimmt Mitarbeiter und Stempel aus der angehängten Archivdatei wieder in die Datenbank"""
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO main.mitarbeiter (id, vorname, nachname)
+        SELECT id, vorname, nachname FROM {ZIEL}.mitarbeiter
+    """)
+    # Bereits vorhandene IDs (z.B. nach einem abgebrochenen Wiederherstellen) nicht doppelt einfügen
+    cursor.execute(f"""
+        INSERT INTO main.stempel (id, mitarbeiter_id, ts, status_code, pause_sekunden)
+        SELECT id, mitarbeiter_id, ts, status_code, pause_sekunden FROM {ZIEL}.stempel
+        WHERE id NOT IN (SELECT id FROM main.stempel)
+    """)
+    return cursor.rowcount
+
+
+def vacuum(conn: sqlite3.Connection) -> Tuple[int, int]:
+    """Gibt freie Seiten der Datenbankdatei an das Dateisystem zurück.
+
+    Datenbanken von vor dem Archivieren laufen ohne auto_vacuum; sie werden
+    einmal komplett mit VACUUM umgestellt, danach genügt incremental_vacuum.
+    Liefert die Anzahl freier Seiten vorher und nachher.
+    """
+    vorher = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    else:
+        # Jede Ergebniszeile gibt Seiten frei, daher alle abholen
+        conn.execute("PRAGMA incremental_vacuum").fetchall()
+    nachher = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return vorher, nachher
@@ -0,0 +1,74 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from ..models.name_index import NameIndex
+from ..models.time_entry import TimeEntry
+from ..models.stamp_state import StampState
+from .db_handler import DEFAULT_BATCH_SIZE, DatabaseHandler, SaveResult
+
+
+class AsyncDatabaseHandler:
+    """Asynchrone Fassade für den DatabaseHandler.
+
+    Alle Abfragen laufen auf einem eigenen Worker-Thread, damit eine langsame
+    Festplatte oder eine gesperrte Datenbank die Ereignisschleife von toga
+    nicht blockiert. Die Methoden entsprechen denen des DatabaseHandler und
+    können in den async Handlern der Oberfläche mit await aufgerufen werden.
+    """
+
+    def __init__(self, db_handler: DatabaseHandler):
+        self.db_handler = db_handler
+        # Ein einzelner Worker: die Verbindung wird nie parallel benutzt
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stempeluhr-db")
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Führt eine beliebige Funktion auf dem Datenbank-Thread aus"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def save_entry(self, entry: TimeEntry, pause_dauer: int = None) -> bool:
+        """Speichert einen neuen Zeiteintrag"""
+        return await self.run(self.db_handler.save_entry, entry, pause_dauer)
+
+    async def save_entries(self, entries: Iterable[TimeEntry], batch_size: int = DEFAULT_BATCH_SIZE) -> SaveResult:
+        """Speichert viele Einträge in Batches"""
+        return await self.run(self.db_handler.save_entries, entries, batch_size)
+
+    async def get_entries(self, vorname: str = None, nachname: str = None) -> List[TimeEntry]:
+        """Holt alle Einträge"""
+        return await self.run(self.db_handler.get_entries, vorname, nachname)
+
+    async def get_last_entry(self, vorname: str = None, nachname: str = None) -> Optional[TimeEntry]:
+        """Holt den letzten Eintrag"""
+        return await self.run(self.db_handler.get_last_entry, vorname, nachname)
+
+    async def get_state(self, vorname: str, nachname: str = None) -> StampState:
+        """Liefert den Stempelzustand eines Mitarbeiters"""
+        return await self.run(self.db_handler.get_state, vorname, nachname)
+
+    async def name_index(self) -> NameIndex:
+        """Präfix-Index der Mitarbeiternamen, nach fremden Schreibvorgängen neu aufgebaut"""
+        return await self.run(self.db_handler.name_index)
+
+    async def get_entries_page(self, vorname: str, nachname: str, limit: int,
+                               before: Optional[Tuple[int, int]] = None) -> Tuple[List[TimeEntry], Optional[Tuple[int, int]]]:
+        """Holt eine Seite der Historie"""
+        return await self.run(self.db_handler.get_entries_page, vorname, nachname, limit, before)
+
+    async def get_entries_between(self, vorname: str, nachname: str, start: datetime, end: datetime) -> List[TimeEntry]:
+        """Holt die Einträge eines Zeitraums"""
+        return await self.run(self.db_handler.get_entries_between, vorname, nachname, start, end)
+
+    async def berechne_monatsuebersicht(self, vorname: str, nachname: str, jahr: int, monat: int) -> List[Dict]:
+        """Berechnet die Arbeitszeit pro Woche für einen Monat"""
+        return await self.run(self.db_handler.berechne_monatsuebersicht, vorname, nachname, jahr, monat)
+
+    async def berechne_zeitraumuebersicht(self, vorname: str, nachname: str, start: date, end: date) -> Dict:
+        """Berechnet Wochen, Monate und Summe eines Zeitraums"""
+        return await self.run(self.db_handler.berechne_zeitraumuebersicht, vorname, nachname, start, end)
+
+    def close(self):
+        """Wartet auf laufende Abfragen und beendet den Worker-Thread"""
+        self._executor.shutdown(wait=True)
@@ -1,30 +1,188 @@
 import sqlite3
+import inspect
 import os
-from typing import List, Optional, Dict
-from datetime import datetime, timedelta
-from ..models.time_entry import TimeEntry
+import pathlib
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+from array import array
+from itertools import islice
+from typing import (
+    TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, TypeVar, Union
+)
+from datetime import date, datetime, timedelta
+from ..models.time_entry import (
+    TimeEntry, TimeEntryColumns, STATUS_NAMES, STATUS_UNBEKANNT, month_bounds, status_to_code, to_timestamp
+)
+from . import aggregates, archive, employees
+from .migrations import SCHEMA_VERSION, get_schema_version, migrate
+from ..models.employee import Employee, normalize_name
+from ..models.name_index import DEFAULT_SUGGESTIONS, NameIndex
+from ..models.sessions import Session, iter_sessions
+from ..models.stamp_state import StampState, transition_error
+
+if TYPE_CHECKING:
+    # Die Messung wird erst beim Einschalten geladen (kürzerer Kaltstart)
+    from .instrumentation import Instrumentation
+
+T = TypeVar('T')
+
+# Spalten für TimeEntry ohne Namen; Datum und Uhrzeit formatiert bereits SQLite
+_ENTRY_COLUMNS = """strftime('%Y-%m-%d', stempel.ts, 'unixepoch', 'localtime'),
+                      strftime('%H:%M:%S', stempel.ts, 'unixepoch', 'localtime'),
+                      stempel.status_code, stempel.pause_sekunden, stempel.ts, stempel.id"""
+# Namen kommen bei Abfragen über alle Mitarbeiter aus der Tabelle mitarbeiter
+_NAMED_ENTRY_FROM = "stempel JOIN mitarbeiter ON mitarbeiter.id = stempel.mitarbeiter_id"
+
+
+def _person_entry_factory(vorname: str, nachname: str):
+    """Row factory für Abfragen eines Mitarbeiters; alle Einträge teilen sich die Namen"""
+    vorname, nachname = sys.intern(vorname), sys.intern(nachname)
+    status_names = STATUS_NAMES
+    unbekannt = STATUS_NAMES[STATUS_UNBEKANNT]
+    new = tuple.__new__
+
+    def factory(cursor, row):
+        return new(TimeEntry, (vorname, nachname, row[0], row[1],
+                               status_names.get(row[2], unbekannt), row[3], row[4], row[5]))
+    return factory
+
+
+def _entry_factory(cursor, row, _intern=sys.intern, _new=tuple.__new__,
+                   _status_names=STATUS_NAMES, _unbekannt=STATUS_NAMES[STATUS_UNBEKANNT]):
+    """Row factory für (mitarbeiter.vorname, mitarbeiter.nachname, _ENTRY_COLUMNS); die Namen werden interniert"""
+    return _new(TimeEntry, (_intern(row[0]), _intern(row[1]), row[2], row[3],
+                            _status_names.get(row[4], _unbekannt), row[5], row[6], row[7]))
+
+
+# Wie lange SQLite auf eine Sperre eines anderen Prozesses wartet (Millisekunden)
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+# Weitere Versuche einer Schreibtransaktion, wenn die Datenbank danach noch gesperrt ist
+DEFAULT_WRITE_RETRIES = 5
+# Wartezeit vor dem ersten Wiederholen, verdoppelt sich je Versuch (Sekunden)
+RETRY_BASE_DELAY = 0.05
+RETRY_MAX_DELAY = 1.0
+# Einträge pro Transaktion bei save_entries
+DEFAULT_BATCH_SIZE = 1000
+# Übersetzte Anweisungen, die jede Verbindung vorhält (sqlite3-Standard: 128); reicht für alle
+# Anweisungen des Handlers einschließlich ihrer Varianten über angehängte Archive
+STATEMENT_CACHE_SIZE = 256
+# Höchstens so viele Archivdateien bleiben an der Leseverbindung hängen (SQLite erlaubt 10)
+MAX_ATTACHED_ARCHIVES = 8
+
+
+class SaveResult(NamedTuple):
+    """Ergebnis von save_entries: Anzahl gespeicherter, abgelehnter (mit Grund) und doppelter Einträge"""
+    saved: int
+    rejected: List[Tuple[TimeEntry, str]]
+    duplicates: int = 0
+
+
+class CardSnapshot(NamedTuple):
+    """Alles für die Stempelkarte aus einem Lesevorgang (siehe get_card_snapshot)"""
+    # Neuester Eintrag insgesamt, also der letzte Benutzer
+    last_entry: Optional[TimeEntry]
+    # Mitarbeiter der Karte; id None, wenn er noch nie gestempelt hat
+    employee: Optional[Employee]
+    state: StampState
+    entries: List[TimeEntry]
+    next_key: Optional[Tuple[int, int]]
+
+
+def _is_person(vorname: Union[str, Employee, None], nachname: Optional[str]) -> bool:
+    """True, wenn ein einzelner Mitarbeiter gemeint ist (Employee oder beide Namen)"""
+    return isinstance(vorname, Employee) or bool(vorname and nachname)
+
+
+def _file_uri(path: str, mode: Optional[str] = None) -> str:
+    """URI einer Datenbankdatei; Verbindungen mit uri=True können damit auch Archive schreibgeschützt anhängen"""
+    uri = pathlib.Path(os.path.abspath(path)).as_uri()
+    return f"{uri}?mode={mode}" if mode else uri
+
+
+def _is_locked(error: sqlite3.OperationalError) -> bool:
+    """True, wenn die Datenbank von einer anderen Verbindung gesperrt ist"""
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
 
 class DatabaseHandler:
-    _instance = None
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(DatabaseHandler, cls).__new__(cls)
-        return cls._instance
-    
-    def __init__(self):
-        """Initialisiert die Datenbankverbindung"""
+    _instances: Dict[Tuple[str, bool], 'DatabaseHandler'] = {}
+
+    def __new__(cls, db_path: str = None, read_only: bool = False, *args, **kwargs):
+        key = (os.path.abspath(db_path or cls.default_db_path()), read_only)
+        if key not in cls._instances:
+            cls._instances[key] = super(DatabaseHandler, cls).__new__(cls)
+        return cls._instances[key]
+
+    @staticmethod
+    def default_db_path() -> str:
+        """Pfad zur Datenbank im data Verzeichnis"""
+        return os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'data', 'stempeluhr.db')
+
+    def __init__(self, db_path: str = None, read_only: bool = False,
+                 busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS, write_retries: int = DEFAULT_WRITE_RETRIES):
+        """Initialisiert die Datenbankverbindungen (read_only z.B. für Berichte in eigenen Prozessen).
+
+        Mehrere Prozesse (Terminals) können dieselbe Datenbank benutzen: sie
+        läuft im WAL-Modus, geschrieben wird über self.conn, gelesen über
+        self.read_conn, sodass Abfragen nicht auf laufende Schreibvorgänge warten.
+        get_card_snapshot liest über eine eigene Verbindung (self.snapshot_conn),
+        damit seine Lesetransaktion keine anderen Abfragen einschließt.
+        """
         # Verhindere mehrfache Initialisierung
         if hasattr(self, 'initialized'):
             return
             
         try:
-            # Verwende den absoluten Pfad zur Datenbank im data Verzeichnis
-            self.db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'data', 'stempeluhr.db')
+            # Ohne Angabe wird die Datenbank im data Verzeichnis verwendet
+            self.db_path = db_path or self.default_db_path()
+            self.read_only = read_only
             print(f"Verwende Datenbank: {self.db_path}")
             
-            # Stelle Verbindung her und erstelle Tabelle falls nicht vorhanden
-            self.conn = sqlite3.connect(self.db_path)
+            self.write_retries = write_retries
+            
+            # Stelle Verbindungen her und bringe das Schema auf den aktuellen Stand.
+            # Die Verbindungen werden auch vom Worker-Thread des AsyncDatabaseHandler benutzt.
+            timeout = busy_timeout_ms / 1000
+            if read_only:
+                self.conn = sqlite3.connect(_file_uri(self.db_path, "ro"), uri=True, timeout=timeout,
+                                            check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+                self.read_conn = self.conn
+                self.snapshot_conn = sqlite3.connect(_file_uri(self.db_path, "ro"), uri=True, timeout=timeout,
+                                                     check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+            else:
+                self.conn = sqlite3.connect(_file_uri(self.db_path), uri=True, timeout=timeout,
+                                            check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+                self.conn.execute("PRAGMA journal_mode=WAL")
+                self.read_conn = sqlite3.connect(_file_uri(self.db_path), uri=True, timeout=timeout,
+                                                 check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+                self.snapshot_conn = sqlite3.connect(_file_uri(self.db_path), uri=True, timeout=timeout,
+                                                     check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+            self.lock = threading.RLock()
+            # Nur für get_card_snapshot; hält dessen Transaktion zusammen
+            self._snapshot_lock = threading.Lock()
+            # Ändert sich, sobald ein anderer Prozess etwas geschrieben hat
+            self._data_version: Optional[int] = None
+            # Write-through Cache: Zustand pro Mitarbeiter-ID und letzter Eintrag insgesamt
+            self._state_cache: Dict[int, StampState] = {}
+            # Bereits gespeicherte Mitarbeiter nach (vereinheitlichtem) Namen; IDs ändern sich nie
+            self._employees: Dict[Tuple[str, str], Employee] = {}
+            # Präfix-Index aller Namen für die Vorschläge, wird erst bei Bedarf aufgebaut
+            self._name_index: Optional[NameIndex] = None
+            self._last_entry_cache: Optional[StampState] = None
+            # Archivierte Jahre mit Pfad ihrer Datei und die davon je Leseverbindung angehängten
+            # (zuletzt benutzt am Ende)
+            self._archivjahre: Optional[Dict[int, str]] = None
+            self._angehaengt: Dict[str, 'OrderedDict[int, str]'] = {
+                'read_conn': OrderedDict(), 'snapshot_conn': OrderedDict()
+            }
+            # Werden nach jedem gespeicherten Eintrag mit (vorname, nachname, ts) aufgerufen
+            self._write_listeners: List[Callable[[str, str, int], None]] = []
+            # Messung ist standardmäßig aus und kostet dann nichts (siehe enable_instrumentation)
+            self.instrumentation: Optional['Instrumentation'] = None
             self.init_db()
             print("Datenbank initialisiert")
             self.initialized = True
@@ -35,180 +193,990 @@ class DatabaseHandler:
     def init_db(self):
         """Initialisiert die Datenbankstruktur"""
         try:
-            cursor = self.conn.cursor()
-            
-            # Prüfe ob die pause_dauer Spalte existiert
-            cursor.execute("PRAGMA table_info(stempel)")
-            columns = cursor.fetchall()
-            has_pause_dauer = any(column[1] == 'pause_dauer' for column in columns)
-            
-            if not has_pause_dauer:
-                # Füge die neue Spalte hinzu
-                cursor.execute("ALTER TABLE stempel ADD COLUMN pause_dauer TEXT")
-                self.conn.commit()
-                print("Spalte pause_dauer wurde hinzugefügt")
-                
-            # Erstelle Tabelle falls nicht vorhanden
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS stempel (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                vorname TEXT NOT NULL,
-                nachname TEXT NOT NULL,
-                date TEXT NOT NULL,
-                time TEXT NOT NULL,
-                status TEXT NOT NULL,
-                pause_dauer TEXT
-            )
-            """)
-            self.conn.commit()
+            if self.read_only:
+                # Ohne Schreibrecht kann nicht migriert werden
+                if get_schema_version(self.conn) != SCHEMA_VERSION:
+                    raise RuntimeError("Die Datenbank muss zuerst mit Schreibrecht geöffnet werden (Schema veraltet)")
+            else:
+                migrate(self.conn)
         except Exception as e:
             print(f"Fehler bei der Tabelleninitialisierung: {e}")
             raise
 
-    def save_entry(self, entry: TimeEntry, pause_dauer: str = None) -> bool:
-        """Speichert einen neuen Zeiteintrag in der Datenbank"""
+    # Methoden, die bei eingeschalteter Messung nicht umhüllt werden
+    _NOT_INSTRUMENTED = {'enable_instrumentation', 'disable_instrumentation', 'close', 'default_db_path'}
+
+    def enable_instrumentation(self, slow_ms: Optional[float] = None,
+                               slow_log_path: Optional[str] = None) -> 'Instrumentation':
+        """Schaltet die Messung aller öffentlichen Methoden und SQL-Anweisungen ein.
+
+        Die Methoden werden nur für diese Instanz umhüllt und die Verbindung
+        durch eine messende Hülle ersetzt; ausgeschaltet bleibt alles unverändert.
+        Ohne slow_ms gilt DEFAULT_SLOW_MS aus instrumentation. Die Treffer des
+        Statement-Caches (STATEMENT_CACHE_SIZE) meldet sqlite3 nicht; sie werden
+        nachgebildet und sind nur eine Schätzung (StatementCacheMirror).
+        """
+        if self.instrumentation is not None:
+            return self.instrumentation
+        from .instrumentation import DEFAULT_SLOW_MS, Instrumentation, InstrumentedConnection
+        if slow_ms is None:
+            slow_ms = DEFAULT_SLOW_MS
+        instrumentation = Instrumentation(slow_ms, slow_log_path)
+        for name, _ in inspect.getmembers(type(self), inspect.isfunction):
+            if name.startswith('_') or name in self._NOT_INSTRUMENTED:
+                continue
+            setattr(self, name, instrumentation.wrap_method(name, getattr(self, name)))
+        if self.read_conn is self.conn:
+            self.conn = self.read_conn = InstrumentedConnection(self.conn, instrumentation, STATEMENT_CACHE_SIZE)
+        else:
+            self.conn = InstrumentedConnection(self.conn, instrumentation, STATEMENT_CACHE_SIZE)
+            self.read_conn = InstrumentedConnection(self.read_conn, instrumentation, STATEMENT_CACHE_SIZE)
+        self.snapshot_conn = InstrumentedConnection(self.snapshot_conn, instrumentation, STATEMENT_CACHE_SIZE)
+        self.instrumentation = instrumentation
+        return instrumentation
+
+    def disable_instrumentation(self) -> Optional['Instrumentation']:
+        """Schaltet die Messung wieder aus und liefert die gesammelten Werte"""
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return None
+        for name in list(vars(self)):
+            if name in dir(type(self)) and not name.startswith('_'):
+                delattr(self, name)
+        self.conn = self.conn._conn
+        self.read_conn = self.read_conn._conn
+        self.snapshot_conn = self.snapshot_conn._conn
+        self.instrumentation = None
+        return instrumentation
+
+    def close(self):
+        """Schließt die Verbindungen und entfernt die Instanz"""
+        self.snapshot_conn.close()
+        if self.read_conn is not self.conn:
+            self.read_conn.close()
+        self.conn.close()
+        DatabaseHandler._instances.pop((os.path.abspath(self.db_path), self.read_only), None)
+
+    def save_entry(self, entry: TimeEntry, pause_dauer: int = None) -> bool:
+        """Speichert einen neuen Zeiteintrag in der Datenbank (Pausendauer in Sekunden)"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                INSERT INTO stempel (vorname, nachname, date, time, status, pause_dauer)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (entry.vorname, entry.nachname, entry.date, entry.time, entry.status, pause_dauer))
-            self.conn.commit()
+            ts = to_timestamp(entry.date, entry.time)
+            status_code = status_to_code(entry.status)
+            archiviert_bis = self._archived_until()
+            if archiviert_bis is not None and ts < archive.year_bounds(archiviert_bis)[1]:
+                raise ValueError(f"Einträge bis {archiviert_bis} sind archiviert")
+
+            def insert(cursor):
+                employee = self._employee_for_write(cursor, entry.vorname, entry.nachname)
+                cursor.execute("""
+                    INSERT INTO stempel (mitarbeiter_id, ts, status_code, pause_sekunden)
+                    VALUES (?, ?, ?, ?)
+                """, (employee.id, ts, status_code, pause_dauer))
+                # Tages- und Wochensummen in derselben Transaktion nachführen
+                entry_id = cursor.lastrowid
+                return employee, entry_id, aggregates.apply_entry(cursor, employee.id, entry_id, ts, status_code)
+
+            with self.lock:
+                employee, entry_id, is_latest = self._write_transaction(insert)
+                self._remember_employee(employee)
+                self._update_state_cache(employee, entry, pause_dauer, ts, entry_id, is_latest)
+            self._notify_write(employee.vorname, employee.nachname, ts)
             return True
         except Exception as e:
             print(f"Fehler beim Speichern des Eintrags: {e}")
             return False
 
-    def get_entries(self, vorname: str = None, nachname: str = None) -> List[TimeEntry]:
-        """Holt alle Einträge aus der Datenbank"""
+    def save_entries(self, entries: Iterable[TimeEntry], batch_size: int = DEFAULT_BATCH_SIZE,
+                     validate: bool = True, skip_duplicates: bool = False) -> SaveResult:
+        """Speichert viele Einträge, z.B. beim Nachtragen aus alten Terminals.
+
+        Je batch_size Einträge wird eine Transaktion mit executemany geschrieben.
+        Mit validate werden die Statusfolgen pro Mitarbeiter geprüft, zusammen
+        mit den gespeicherten Einträgen davor, dazwischen und dem ersten danach;
+        ungültige Einträge werden nicht gespeichert, sondern mit Grund
+        zurückgegeben. Passt ein gespeicherter Eintrag nicht mehr hinter die
+        neuen, werden die neuen direkt davor abgelehnt, bis er wieder passt.
+        Fehlt bei "Pause Ende" die Pausendauer, wird sie aus dem vorherigen
+        "Pause Start" berechnet.
+        Mit skip_duplicates werden Einträge übersprungen, die mit Mitarbeiter,
+        Zeitpunkt und Status schon gespeichert sind (z.B. beim erneuten Import).
+        Summen, Zustands-Cache und Listener werden einmal pro Batch nachgeführt.
+        """
+        saved = 0
+        duplicates = 0
+        rejected: List[Tuple[TimeEntry, str]] = []
+        iterator = iter(entries)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            with self.lock:
+                rows, batch_rejected, batch_duplicates = self._write_transaction(
+                    lambda cursor: self._insert_batch(cursor, batch, validate, skip_duplicates)
+                )
+                self._after_batch(rows)
+            saved += len(rows)
+            duplicates += batch_duplicates
+            rejected.extend(batch_rejected)
+        return SaveResult(saved, rejected, duplicates)
+
+    def _insert_batch(self, cursor: sqlite3.Cursor, batch: List[TimeEntry], validate: bool,
+                      skip_duplicates: bool) -> Tuple[List[tuple], List[Tuple[TimeEntry, str]], int]:
+        """Prüft und schreibt einen Batch innerhalb der laufenden Transaktion"""
+        rejected = []
+        duplicates = 0
+        # Archivierte Jahre sind abgeschlossen, dort wird nichts mehr nachgetragen
+        archiviert_bis = self._archived_until()
+        grenze = archive.year_bounds(archiviert_bis)[1] if archiviert_bis is not None else None
+        # Namen, die sich nur im Leerraum unterscheiden, gehören zum selben Mitarbeiter
+        personen: Dict[Tuple[str, str], List[Tuple[int, int, TimeEntry]]] = {}
+        for position, entry in enumerate(batch):
+            try:
+                ts = to_timestamp(entry.date, entry.time)
+            except (TypeError, ValueError) as e:
+                rejected.append((entry, f"Ungültiges Datum/Uhrzeit: {e}"))
+                continue
+            if grenze is not None and ts < grenze:
+                rejected.append((entry, f"Einträge bis {archiviert_bis} sind archiviert"))
+                continue
+            key = (normalize_name(entry.vorname), normalize_name(entry.nachname))
+            personen.setdefault(key, []).append((ts, position, entry))
+
+        rows = []
+        # Zurückgenommene Zeilen (nach id), werden am Ende herausgefiltert
+        zurueckgenommen = set()
+        for (vorname, nachname), eintraege in personen.items():
+            eintraege.sort(key=lambda item: (item[0], item[1]))
+            employee = self._employee_for_write(cursor, vorname, nachname)
+            von, bis = eintraege[0][0], eintraege[-1][0]
+            cursor.execute("""
+                SELECT ts, status_code FROM stempel
+                WHERE mitarbeiter_id = ? AND ts < ?
+                ORDER BY ts DESC, id DESC
+                LIMIT 1
+            """, (employee.id, von))
+            row = cursor.fetchone()
+            vorher_ts, vorher = (row[0], STATUS_NAMES.get(row[1])) if row else (None, None)
+            # Gespeicherte Einträge zwischen den neuen und der erste danach werden mit geprüft
+            gespeichert = cursor.execute("""
+                SELECT ts, status_code FROM stempel
+                WHERE mitarbeiter_id = ? AND ts >= ? AND ts <= ?
+                ORDER BY ts, id
+            """, (employee.id, von, bis)).fetchall()
+            gespeichert += cursor.execute("""
+                SELECT ts, status_code FROM stempel
+                WHERE mitarbeiter_id = ? AND ts > ?
+                ORDER BY ts, id
+                LIMIT 1
+            """, (employee.id, bis)).fetchall()
+            vorhanden = set(gespeichert) if skip_duplicates else set()
+            # Gespeicherte Einträge stehen bei gleichem Zeitpunkt vor neuen (kleinere id)
+            folge = sorted([(ts, 0, i, None) for i, (ts, _) in enumerate(gespeichert)]
+                           + [(ts, 1, position, entry) for ts, position, entry in eintraege],
+                           key=lambda item: item[:3])
+            # Seit dem letzten gespeicherten Eintrag übernommene: (Zeile, Zustand davor)
+            offen: List[Tuple[tuple, Tuple[Optional[int], Optional[str]]]] = []
+            for ts, _, index, entry in folge:
+                if entry is None:
+                    status = STATUS_NAMES.get(gespeichert[index][1])
+                    # Neue Einträge, nach denen der gespeicherte nicht mehr passt, werden zurückgenommen
+                    while validate and offen and transition_error(vorher, status):
+                        zeile, (vorher_ts, vorher) = offen.pop()
+                        zurueckgenommen.add(id(zeile))
+                        vorhanden.discard(zeile[1:3])
+                        rejected.append((zeile[4], f"Passt nicht vor den gespeicherten Eintrag '{status}' "
+                                                   f"vom {datetime.fromtimestamp(ts):%d.%m.%Y %H:%M}"))
+                    offen = []
+                    vorher, vorher_ts = status, ts
+                    continue
+                status_code = status_to_code(entry.status)
+                status = STATUS_NAMES[status_code]
+                if skip_duplicates and (ts, status_code) in vorhanden:
+                    duplicates += 1
+                    vorher, vorher_ts = status, ts
+                    continue
+                if validate:
+                    fehler = transition_error(vorher, status)
+                    if fehler:
+                        rejected.append((entry, fehler))
+                        continue
+                pause = entry.pause_dauer
+                if status == 'Pause Ende' and pause is None and vorher == 'Pause Start':
+                    pause = ts - vorher_ts
+                zeile = (employee, ts, status_code, pause, entry)
+                rows.append(zeile)
+                offen.append((zeile, (vorher_ts, vorher)))
+                vorhanden.add((ts, status_code))
+                vorher, vorher_ts = status, ts
+        rows = [zeile[:4] for zeile in rows if id(zeile) not in zurueckgenommen]
+
+        cursor.executemany("""
+            INSERT INTO stempel (mitarbeiter_id, ts, status_code, pause_sekunden)
+            VALUES (?, ?, ?, ?)
+        """, [(employee.id, ts, status_code, pause) for employee, ts, status_code, pause in rows])
+        # Summen einmal pro Mitarbeiter und Batch für den betroffenen Zeitraum neu berechnen
+        bereiche: Dict[int, List[int]] = {}
+        for employee, ts, _, _ in rows:
+            bereich = bereiche.setdefault(employee.id, [ts, ts])
+            bereich[0] = min(bereich[0], ts)
+            bereich[1] = max(bereich[1], ts)
+        for mitarbeiter_id, (min_ts, max_ts) in bereiche.items():
+            aggregates.refresh_range(cursor, mitarbeiter_id, min_ts, max_ts)
+        return rows, rejected, duplicates
+
+    def _after_batch(self, rows: List[tuple]):
+        """Caches und Listener nach einem gespeicherten Batch nachführen"""
+        monate = {}
+        for employee, ts, _, _ in rows:
+            self._remember_employee(employee)
+            self._state_cache.pop(employee.id, None)
+            tag = datetime.fromtimestamp(ts)
+            monate.setdefault((employee.vorname, employee.nachname, tag.year, tag.month), ts)
+        if rows:
+            self._last_entry_cache = None
+        # Ein Aufruf pro Mitarbeiter und Monat statt pro Eintrag
+        for (vorname, nachname, _, _), ts in monate.items():
+            self._notify_write(vorname, nachname, ts)
+
+    def _write_transaction(self, work: Callable[[sqlite3.Cursor], T]) -> T:
+        """Führt work(cursor) in einer Schreibtransaktion aus und liefert das Ergebnis.
+
+        Ist die Datenbank auch nach dem Busy-Timeout noch von einem anderen
+        Prozess gesperrt, wird die Transaktion mit wachsender Wartezeit bis zu
+        write_retries Mal wiederholt.
+        """
+        versuch = 0
+        with self.lock:
+            while True:
+                cursor = self.conn.cursor()
+                try:
+                    # Sperre sofort holen, sonst kann das spätere Hochstufen im WAL-Modus scheitern
+                    cursor.execute("BEGIN IMMEDIATE")
+                    result = work(cursor)
+                    self.conn.commit()
+                    return result
+                except sqlite3.OperationalError as e:
+                    self.conn.rollback()
+                    if not _is_locked(e) or versuch >= self.write_retries:
+                        raise
+                except Exception:
+                    self.conn.rollback()
+                    raise
+                versuch += 1
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (versuch - 1))
+                print(f"Datenbank gesperrt, neuer Versuch {versuch}/{self.write_retries} in {delay:.2f} s")
+                time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def add_write_listener(self, listener: Callable[[str, str, int], None]):
+        """Registriert eine Funktion, die nach jedem gespeicherten Eintrag aufgerufen wird"""
+        if listener not in self._write_listeners:
+            self._write_listeners.append(listener)
+
+    def _notify_write(self, vorname: str, nachname: str, ts: int):
+        for listener in self._write_listeners:
+            try:
+                listener(vorname, nachname, ts)
+            except Exception as e:
+                print(f"Fehler in einem Schreib-Listener: {e}")
+
+    def get_employees(self) -> List[Tuple[str, str]]:
+        """Alle Mitarbeiter (vorname, nachname), die schon gestempelt haben (auch nur in archivierten Jahren)"""
+        cursor = self.read_conn.cursor()
+        cursor.execute("""
+            SELECT vorname, nachname FROM mitarbeiter
+            ORDER BY nachname, vorname
+        """)
+        return cursor.fetchall()
+
+    def get_employee(self, vorname: Union[str, Employee], nachname: Optional[str] = None) -> Optional[Employee]:
+        """Liefert den Mitarbeiter zu einem Namen, oder None, wenn er noch nie gestempelt hat.
+
+        Die Namen werden vereinheitlicht (normalize_name). Ein übergebener
+        Employee wird unverändert zurückgegeben.
+        """
+        if isinstance(vorname, Employee):
+            return vorname
+        key = (normalize_name(vorname), normalize_name(nachname))
+        employee = self._employees.get(key)
+        if employee is None:
+            employee = employees.find_employee(self.read_conn.cursor(), *key)
+            if employee is not None:
+                self._remember_employee(employee)
+        return employee
+
+    def _resolve(self, vorname: Union[str, Employee], nachname: Optional[str]) -> Employee:
+        """Wie get_employee, aber unbekannte Mitarbeiter mit id None (Abfragen finden dann nichts)"""
+        employee = self.get_employee(vorname, nachname)
+        if employee is None:
+            return Employee(None, normalize_name(vorname), normalize_name(nachname))
+        return employee
+
+    def _remember_employee(self, employee: Employee):
+        self._employees[(employee.vorname, employee.nachname)] = employee
+        # Neue Mitarbeiter sind sofort als Vorschlag verfügbar
+        if self._name_index is not None:
+            self._name_index.add(employee.vorname, employee.nachname)
+
+    def name_index(self) -> NameIndex:
+        """Präfix-Index aller Mitarbeiternamen; beim ersten Aufruf mit einer Abfrage aufgebaut"""
+        self._check_external_writes()
+        index = self._name_index
+        if index is None:
+            index = self._name_index = NameIndex(self.get_employees())
+        return index
+
+    def suggest_employees(self, vorname: str, nachname: str = '',
+                          limit: int = DEFAULT_SUGGESTIONS) -> List[Tuple[str, str]]:
+        """Bekannte Namen (vorname, nachname), die mit der Eingabe beginnen, ohne Groß-/Kleinschreibung"""
+        return self.name_index().suggest(vorname, nachname, limit)
+
+    def _employee_for_write(self, cursor: sqlite3.Cursor, vorname: str, nachname: str) -> Employee:
+        """Mitarbeiter für einen neuen Eintrag; unbekannte werden in der laufenden Transaktion angelegt.
+
+        In den Cache kommt ein neuer Mitarbeiter erst nach dem Commit.
+        """
+        employee = self._employees.get((normalize_name(vorname), normalize_name(nachname)))
+        return employee or employees.ensure_employee(cursor, vorname, nachname)
+
+    def get_entries(self, vorname: Union[str, Employee] = None, nachname: str = None) -> List[TimeEntry]:
+        """Holt alle Einträge aus der Datenbank (eines Mitarbeiters oder aller, einschließlich Archiven)"""
         try:
-            cursor = self.conn.cursor()
-            if vorname and nachname:
-                cursor.execute("""
-                    SELECT vorname, nachname, date, time, status, pause_dauer
-                    FROM stempel
-                    WHERE vorname = ? AND nachname = ?
-                    ORDER BY date DESC, time DESC
-                """, (vorname, nachname))
+            tabellen = self.stempel_tables()
+            cursor = self.read_conn.cursor()
+            if _is_person(vorname, nachname):
+                employee = self._resolve(vorname, nachname)
+                cursor.row_factory = _person_entry_factory(employee.vorname, employee.nachname)
+                cursor.execute(aggregates.union_all(f"""
+                    SELECT {_ENTRY_COLUMNS}
+                    FROM {{tabelle}} AS stempel
+                    WHERE mitarbeiter_id = ?""", tabellen) + " ORDER BY ts DESC, id DESC",
+                    (employee.id,) * len(tabellen))
             else:
-                cursor.execute("""
-                    SELECT vorname, nachname, date, time, status, pause_dauer
-                    FROM stempel
-                    ORDER BY date DESC, time DESC
-                """)
-            
-            entries = []
-            for row in cursor.fetchall():
-                try:
-                    entry = TimeEntry(
-                        vorname=row[0],
-                        nachname=row[1],
-                        date=row[2],
-                        time=row[3],
-                        status=row[4]
-                    )
-                    entries.append(entry)
-                except Exception as e:
-                    print(f"Fehler beim Verarbeiten eines Eintrags: {e}")
-                    continue
-            return entries
+                cursor.row_factory = _entry_factory
+                cursor.execute(aggregates.union_all(f"""
+                    SELECT mitarbeiter.vorname, mitarbeiter.nachname, {_ENTRY_COLUMNS}
+                    FROM {{tabelle}} AS stempel
+                    JOIN main.mitarbeiter AS mitarbeiter ON mitarbeiter.id = stempel.mitarbeiter_id""",
+                    tabellen) + " ORDER BY stempel.ts DESC, stempel.id DESC")
+            return cursor.fetchall()
         except Exception as e:
             print(f"Fehler beim Laden der Einträge: {e}")
             return []
 
-    def get_last_entry(self, vorname: str = None, nachname: str = None) -> Optional[TimeEntry]:
-        """Holt den letzten Eintrag aus der Datenbank"""
+    def _update_state_cache(self, employee: Employee, entry: TimeEntry, pause_dauer: Optional[int], ts: int,
+                            entry_id: int, is_latest: bool):
+        """Übernimmt einen gespeicherten Eintrag in den Zustands-Cache"""
+        saved = TimeEntry(employee.vorname, employee.nachname, entry.date, entry.time,
+                          STATUS_NAMES[status_to_code(entry.status)], pause_dauer, ts, entry_id)
+        if is_latest:
+            self._state_cache[employee.id] = StampState(saved)
+        else:
+            # Nachgetragener Eintrag: beim nächsten Zugriff neu laden
+            self._state_cache.pop(employee.id, None)
+        if self._last_entry_cache is not None and (
+                self._last_entry_cache.last_ts is None or ts >= self._last_entry_cache.last_ts):
+            self._last_entry_cache = StampState(saved)
+        else:
+            self._last_entry_cache = None
+
+    def invalidate_caches(self):
+        """Verwirft alle zwischengespeicherten Zustände"""
+        self._state_cache.clear()
+        self._last_entry_cache = None
+        self._archivjahre = None
+        self._name_index = None
+
+    def _check_external_writes(self):
+        """Verwirft die Caches, wenn seit der letzten Prüfung ein anderer Prozess geschrieben hat"""
+        with self.lock:
+            # data_version der Schreibverbindung ändert sich nur durch fremde Commits
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            if self._data_version is not None:
+                self.invalidate_caches()
+            self._data_version = version
+
+    def get_state(self, vorname: Union[str, Employee], nachname: str = None) -> StampState:
+        """Liefert den Stempelzustand eines Mitarbeiters; nur beim ersten Zugriff wird die Datenbank gelesen"""
+        self._check_external_writes()
+        employee = self.get_employee(vorname, nachname)
+        if employee is None:
+            # Noch nie gestempelt
+            return StampState()
+        state = self._state_cache.get(employee.id)
+        if state is None:
+            state = StampState(self._query_last_entry(employee))
+            self._state_cache[employee.id] = state
+        return state
+
+    def get_last_entry(self, vorname: Union[str, Employee] = None, nachname: str = None) -> Optional[TimeEntry]:
+        """Holt den letzten Eintrag (aus dem Zustands-Cache)"""
+        if _is_person(vorname, nachname):
+            return self.get_state(vorname, nachname).last_entry
+        self._check_external_writes()
+        if self._last_entry_cache is None:
+            self._last_entry_cache = StampState(self._query_last_entry())
+        return self._last_entry_cache.last_entry
+
+    def _query_last_entry(self, employee: Optional[Employee] = None,
+                          cursor: Optional[sqlite3.Cursor] = None) -> Optional[TimeEntry]:
+        """Holt den letzten Eintrag (eines Mitarbeiters oder insgesamt) aus der Datenbank"""
         try:
-            cursor = self.conn.cursor()
-            if vorname and nachname:
-                cursor.execute("""
-                    SELECT vorname, nachname, date, time, status, pause_dauer
+            cursor = cursor or self.read_conn.cursor()
+            if employee is not None:
+                cursor.row_factory = _person_entry_factory(employee.vorname, employee.nachname)
+                cursor.execute(f"""
+                    SELECT {_ENTRY_COLUMNS}
                     FROM stempel
-                    WHERE vorname = ? AND nachname = ?
-                    ORDER BY date DESC, time DESC
+                    WHERE mitarbeiter_id = ?
+                    ORDER BY ts DESC, id DESC
                     LIMIT 1
-                """, (vorname, nachname))
+                """, (employee.id,))
             else:
-                cursor.execute("""
-                    SELECT vorname, nachname, date, time, status, pause_dauer
-                    FROM stempel
-                    ORDER BY date DESC, time DESC
+                cursor.row_factory = _entry_factory
+                cursor.execute(f"""
+                    SELECT mitarbeiter.vorname, mitarbeiter.nachname, {_ENTRY_COLUMNS}
+                    FROM {_NAMED_ENTRY_FROM}
+                    ORDER BY stempel.ts DESC, stempel.id DESC
                     LIMIT 1
                 """)
-            
-            row = cursor.fetchone()
-            if row:
-                return TimeEntry(
-                    vorname=row[0],
-                    nachname=row[1],
-                    date=row[2],
-                    time=row[3],
-                    status=row[4]
+            return cursor.fetchone()
+        except Exception as e:
+            print(f"Fehler beim Laden des letzten Eintrags: {e}")
+            return None
+
+    def get_initial_card(self, limit: int) -> Optional[Tuple[str, str, List[TimeEntry], Optional[Tuple[int, int]]]]:
+        """Alles für den Programmstart in einer Abfrage: letzter Benutzer und seine erste Seite der Historie.
+
+        Liefert (vorname, nachname, einträge, schlüssel der nächsten Seite) oder
+        None bei leerer Datenbank. Der neueste Eintrag bestimmt auch den
+        Stempelzustand; er wird in die Caches übernommen, sodass get_state und
+        get_last_entry danach ohne weitere Abfrage auskommen.
+        """
+        self._check_external_writes()
+        try:
+            rows = self.read_conn.execute(f"""
+                SELECT mitarbeiter.id, mitarbeiter.vorname, mitarbeiter.nachname, {_ENTRY_COLUMNS}
+                FROM {_NAMED_ENTRY_FROM}
+                WHERE stempel.mitarbeiter_id = (
+                    SELECT mitarbeiter_id FROM stempel ORDER BY ts DESC, id DESC LIMIT 1
                 )
+                ORDER BY stempel.ts DESC, stempel.id DESC
+                LIMIT ?
+            """, (limit,)).fetchall()
+        except Exception as e:
+            print(f"Fehler beim Laden der Startdaten: {e}")
+            return None
+        if not rows:
             return None
+        employee = Employee(*rows[0][:3])
+        factory = _person_entry_factory(employee.vorname, employee.nachname)
+        entries = [factory(None, row[3:]) for row in rows]
+        state = StampState(entries[0])
+        self._remember_employee(employee)
+        self._state_cache[employee.id] = state
+        self._last_entry_cache = state
+        next_key = (entries[-1].ts, entries[-1].id) if len(entries) == limit else None
+        return employee.vorname, employee.nachname, entries, next_key
+
+    def get_card_snapshot(self, employee: Union[Employee, Tuple[str, str], None],
+                          page_size: int) -> Optional[CardSnapshot]:
+        """Letzter Benutzer, Zustand und erste Seite der Historie eines Mitarbeiters in einem Lesevorgang.
+
+        Die Abfragen laufen in einer Lesetransaktion auf self.snapshot_conn und
+        sehen denselben Stand der Datenbank, auch wenn ein anderer Prozess gerade
+        stempelt. Reicht die laufende Datenbank nicht für eine Seite, werden die
+        Archive in derselben Transaktion gelesen. Ohne employee gilt der letzte
+        Benutzer. Der Zustand folgt aus dem neuesten Eintrag der Seite; er und
+        der letzte Eintrag kommen in die Caches. None bei einem Fehler.
+        """
+        self._check_external_writes()
+        try:
+            with self._snapshot_lock:
+                # Archive können nur außerhalb einer Transaktion angehängt werden, also schon vorher
+                archive_tabellen, aelter_bis = self._snapshot_archive_tables()
+                self.snapshot_conn.execute("BEGIN")
+                try:
+                    cursor = self.snapshot_conn.cursor()
+                    last_entry = self._query_last_entry(cursor=cursor)
+                    if employee is None:
+                        employee = (last_entry.vorname, last_entry.nachname) if last_entry else None
+                    entries: List[TimeEntry] = []
+                    next_key = None
+                    if employee is not None:
+                        if not isinstance(employee, Employee):
+                            key = (normalize_name(employee[0]), normalize_name(employee[1]))
+                            employee = (self._employees.get(key) or employees.find_employee(cursor, *key)
+                                        or Employee(None, *key))
+                        cursor.row_factory = _person_entry_factory(employee.vorname, employee.nachname)
+                        entries = self._page(cursor, ["stempel"], employee, page_size, None)
+                        if len(entries) < page_size and employee.id is not None and archive_tabellen:
+                            entries = self._page(cursor, ["stempel"] + archive_tabellen, employee, page_size, None)
+                        if len(entries) == page_size:
+                            next_key = (entries[-1].ts, entries[-1].id)
+                        elif aelter_bis is not None and employee.id is not None:
+                            # Noch ältere Archive liest erst die nächste Seite (get_entries_page)
+                            next_key = (entries[-1].ts, entries[-1].id) if entries else (aelter_bis, 0)
+                finally:
+                    self.snapshot_conn.commit()
         except Exception as e:
-            print(f"Fehler beim Laden des letzten Eintrags: {e}")
+            print(f"Fehler beim Laden der Stempelkarte: {e}")
             return None
 
+        state = StampState(entries[0] if entries else None)
+        if employee is not None and employee.id is not None:
+            self._remember_employee(employee)
+            self._state_cache[employee.id] = state
+        self._last_entry_cache = StampState(last_entry)
+        return CardSnapshot(last_entry, employee, state, entries, next_key)
+
+    def _snapshot_archive_tables(self) -> Tuple[List[str], Optional[int]]:
+        """Hängt die neuesten Archive an self.snapshot_conn und liefert ihre Stempeltabellen.
+
+        Es werden höchstens MAX_ATTACHED_ARCHIVES Jahre angehängt. Bleiben
+        ältere übrig, kommt als Zweites der Beginn des ältesten angehängten
+        Jahres zurück, sonst None.
+        """
+        jahre = sorted(self.archived_years().items(), reverse=True)
+        tabellen = [f"{self._attach_archive(jahr, pfad, 'snapshot_conn')}.stempel"
+                    for jahr, pfad in jahre[:MAX_ATTACHED_ARCHIVES]]
+        if len(jahre) > MAX_ATTACHED_ARCHIVES:
+            return tabellen, archive.year_bounds(jahre[MAX_ATTACHED_ARCHIVES - 1][0])[0]
+        return tabellen, None
+
+    def get_entries_page(self, vorname: Union[str, Employee], nachname: Optional[str], limit: int,
+                         before: Optional[Tuple[int, int]] = None) -> Tuple[List[TimeEntry], Optional[Tuple[int, int]]]:
+        """Holt eine Seite der Historie (neueste zuerst) per Keyset-Pagination auf (ts, id).
+
+        Liefert die Einträge und den Schlüssel für die nächste Seite, oder None
+        wenn keine weiteren Einträge vorhanden sind.
+        """
+        try:
+            employee = self._resolve(vorname, nachname)
+            cursor = self.read_conn.cursor()
+            cursor.row_factory = _person_entry_factory(employee.vorname, employee.nachname)
+            entries = self._page(cursor, ["stempel"], employee, limit, before)
+            if len(entries) < limit:
+                # Erst wenn die laufende Datenbank nicht mehr reicht, kommen die älteren Archive dazu
+                archive_davor = self.stempel_tables(bis=before[0] + 1 if before else None)[1:]
+                if archive_davor:
+                    entries = self._page(cursor, ["stempel"] + archive_davor, employee, limit, before)
+            next_key = (entries[-1].ts, entries[-1].id) if len(entries) == limit else None
+            return entries, next_key
+        except Exception as e:
+            print(f"Fehler beim Laden der Historie: {e}")
+            return [], None
+
+    @staticmethod
+    def _page(cursor: sqlite3.Cursor, tabellen: List[str], employee: Employee, limit: int,
+              before: Optional[Tuple[int, int]]) -> List[TimeEntry]:
+        """Eine Seite der Historie aus den angegebenen Stempeltabellen"""
+        bedingung = "mitarbeiter_id = ?" if before is None else "mitarbeiter_id = ? AND (ts, id) < (?, ?)"
+        params = (employee.id,) if before is None else (employee.id, before[0], before[1])
+        cursor.execute(aggregates.union_all(f"""
+            SELECT {_ENTRY_COLUMNS}
+            FROM {{tabelle}} AS stempel
+            WHERE {bedingung}""", tabellen) + " ORDER BY ts DESC, id DESC LIMIT ?",
+            params * len(tabellen) + (limit,))
+        return cursor.fetchall()
+
+    def iter_entries_between(self, vorname: Union[str, Employee], nachname: Optional[str], start: datetime,
+                             end: datetime, batch_size: int = 500) -> Iterator[TimeEntry]:
+        """Liefert die Einträge eines Mitarbeiters im Zeitraum [start, end) chronologisch als Stream"""
+        employee = self._resolve(vorname, nachname)
+        von, bis = int(start.timestamp()), int(end.timestamp())
+        tabellen = self.stempel_tables(von, bis)
+        cursor = self.read_conn.cursor()
+        cursor.row_factory = _person_entry_factory(employee.vorname, employee.nachname)
+        cursor.execute(aggregates.union_all(f"""
+            SELECT {_ENTRY_COLUMNS}
+            FROM {{tabelle}} AS stempel
+            WHERE mitarbeiter_id = ? AND ts >= ? AND ts < ?""", tabellen) + " ORDER BY ts, id",
+            (employee.id, von, bis) * len(tabellen))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+
+    def get_entries_between(self, vorname: Union[str, Employee], nachname: Optional[str], start: datetime,
+                            end: datetime) -> List[TimeEntry]:
+        """Holt die Einträge eines Mitarbeiters im Zeitraum [start, end) in chronologischer Reihenfolge"""
+        try:
+            return list(self.iter_entries_between(vorname, nachname, start, end))
+        except Exception as e:
+            print(f"Fehler beim Laden der Einträge: {e}")
+            return []
+
+    def get_entry_columns(self, vorname: Union[str, Employee], nachname: Optional[str],
+                          start: Optional[datetime] = None, end: Optional[datetime] = None) -> TimeEntryColumns:
+        """Holt die Einträge eines Mitarbeiters chronologisch als Spalten (für Auswertungen)"""
+        von = int(start.timestamp()) if start else None
+        bis = int(end.timestamp()) if end else None
+        return aggregates.load_columns(self.read_conn.cursor(), self._resolve(vorname, nachname).id,
+                                       von, bis, self.stempel_tables(von, bis))
+
+    def get_team_columns(self, personen: Sequence[Union[Tuple[str, str], Employee]], start: datetime,
+                         end: datetime) -> Tuple[array, TimeEntryColumns]:
+        """Einträge mehrerer Mitarbeiter ab start in einer Abfrage als Spalten (für die Teamübersicht).
+
+        Schichten und Pausen, die vor end beginnen, werden bis zu ihrem Ende
+        geladen. Liefert je Eintrag die Position des Mitarbeiters in personen
+        und die Spalten, sortiert nach Position und dann chronologisch.
+        """
+        von, bis = int(start.timestamp()), int(end.timestamp())
+        ids = [person.id if isinstance(person, Employee) else self._resolve(*person).id for person in personen]
+        return aggregates.load_team_columns(self.read_conn.cursor(), ids, von, bis, self.stempel_tables(von, bis))
+
+    def get_sessions(self, vorname: Union[str, Employee], nachname: Optional[str], start: datetime,
+                     end: datetime) -> List[Session]:
+        """Arbeitssitzungen (mit Pausen und Auffälligkeiten), die im Zeitraum [start, end) beginnen.
+
+        Geladen wird ab dem letzten "Ein" bzw. "Pause Start" vor start und bis zum
+        ersten "Aus" und "Pause Ende" nach end, damit Schichten an den Rändern
+        vollständig sind und ihre Pausen nicht doppelt erscheinen.
+        """
+        mitarbeiter_id = self._resolve(vorname, nachname).id
+        von, bis = int(start.timestamp()), int(end.timestamp())
+        # Archivierte Jahre sind abgeschlossen, über ihre Grenzen reicht keine Schicht
+        tabellen = self.stempel_tables(von, bis)
+        cursor = self.read_conn.cursor()
+        laden_ab = aggregates.extended_start(cursor, mitarbeiter_id, von, tabellen)
+        spalten = aggregates.load_columns(cursor, mitarbeiter_id, laden_ab,
+                                          aggregates.extended_end(cursor, mitarbeiter_id, bis, tabellen), tabellen)
+        erster_tag, letzter_tag = start.date(), end.date()
+        sessions = []
+        for session in iter_sessions(zip(spalten.ts, spalten.status_codes), anfang_bekannt=False):
+            # Das "Aus" einer Schicht, die vor dem Zeitraum begann, gehört nicht dazu
+            if session.start is None and not session.pausen and not session.anomalien:
+                continue
+            if erster_tag <= session.datum < letzter_tag:
+                sessions.append(session)
+        return sessions
+
     def get_wochennummer(self, datum: datetime) -> int:
         """Berechnet die Kalenderwoche für ein Datum."""
         return datum.isocalendar()[1]
 
-    def berechne_monatsuebersicht(self, vorname: str, nachname: str, jahr: int, monat: int) -> List[Dict]:
+    def rebuild_aggregates(self, vorname: Union[str, Employee] = None, nachname: str = None):
+        """Berechnet die Tages- und Wochensummen aus allen Einträgen neu (eines Mitarbeiters oder aller).
+
+        Die archivierten Jahre werden dafür an die Schreibverbindung angehängt,
+        damit ihre Summen erhalten bleiben.
+        """
+        mitarbeiter_id = None
+        if _is_person(vorname, nachname):
+            employee = self.get_employee(vorname, nachname)
+            if employee is None:
+                return
+            mitarbeiter_id = employee.id
+        with self.lock:
+            jahre = list(self.archived_years().items())
+            for jahr, pfad in jahre:
+                self.conn.execute(f"ATTACH DATABASE ? AS archiv_{jahr}", (_file_uri(pfad, "ro"),))
+            tabellen = ["stempel"] + [f"archiv_{jahr}.stempel" for jahr, _ in jahre]
+            try:
+                self._write_transaction(lambda cursor: aggregates.rebuild(cursor, mitarbeiter_id, tabellen))
+            finally:
+                for jahr, _ in jahre:
+                    self.conn.execute(f"DETACH DATABASE archiv_{jahr}")
+
+    def archived_years(self) -> Dict[int, str]:
+        """Archivierte Jahre mit dem Pfad ihrer Archivdatei"""
+        self._check_external_writes()
+        if self._archivjahre is None:
+            verzeichnis = os.path.dirname(os.path.abspath(self.db_path))
+            rows = self.read_conn.execute("SELECT jahr, pfad FROM archivjahre ORDER BY jahr").fetchall()
+            self._archivjahre = {jahr: os.path.join(verzeichnis, pfad) for jahr, pfad in rows}
+        return self._archivjahre
+
+    def _archived_until(self) -> Optional[int]:
+        """Letztes archiviertes Jahr; bis dahin werden keine Einträge mehr angenommen"""
+        return max(self.archived_years(), default=None)
+
+    def stempel_tables(self, von: Optional[int] = None, bis: Optional[int] = None) -> List[str]:
+        """Stempeltabellen für eine Abfrage im Zeitraum [von, bis): die laufende und die betroffenen Archive.
+
+        Archivdateien werden erst hier und nur bei Bedarf schreibgeschützt an
+        die Leseverbindung angehängt; ohne archivierte Jahre im Zeitraum bleibt
+        es bei der Tabelle stempel.
+        """
+        tabellen = ["stempel"]
+        for jahr, pfad in self.archived_years().items():
+            beginn, ende = archive.year_bounds(jahr)
+            if (von is None or von < ende) and (bis is None or bis > beginn):
+                tabellen.append(f"{self._attach_archive(jahr, pfad)}.stempel")
+        return tabellen
+
+    def _attach_archive(self, jahr: int, pfad: str, verbindung: str = 'read_conn') -> str:
+        """Hängt ein Archiv an eine Leseverbindung (falls noch nicht geschehen) und liefert seinen Schemanamen"""
+        schema = f"archiv_{jahr}"
+        angehaengt = self._angehaengt[verbindung]
+        with self.lock:
+            if jahr in angehaengt:
+                angehaengt.move_to_end(jahr)
+                return schema
+            # Am längsten nicht benutzte Archive wieder lösen
+            while len(angehaengt) >= MAX_ATTACHED_ARCHIVES:
+                if not self._detach_archive(next(iter(angehaengt)), verbindung):
+                    break
+            getattr(self, verbindung).execute(f"ATTACH DATABASE ? AS {schema}", (_file_uri(pfad, "ro"),))
+            angehaengt[jahr] = schema
+        return schema
+
+    def _detach_archive(self, jahr: int, verbindung: str = 'read_conn') -> bool:
+        """Löst ein angehängtes Archiv von einer Leseverbindung; False, wenn es gerade benutzt wird"""
+        angehaengt = self._angehaengt[verbindung]
+        with self.lock:
+            schema = angehaengt.get(jahr)
+            if schema is None:
+                return True
+            try:
+                getattr(self, verbindung).execute(f"DETACH DATABASE {schema}")
+            except sqlite3.OperationalError as e:
+                print(f"Archiv {jahr} konnte nicht gelöst werden: {e}")
+                return False
+            del angehaengt[jahr]
+            return True
+
+    def archive_year(self, jahr: int, force: bool = False) -> int:
+        """Verschiebt die Stempel eines abgeschlossenen Jahres in eine eigene Archivdatei.
+
+        Die Datei liegt neben der Datenbank (stempeluhr_2023.db). Erst wird sie
+        gefüllt und geprüft, danach werden die Stempel in einer zweiten
+        Transaktion aus der Datenbank gelöscht; ein Abbruch dazwischen verliert
+        nichts. Tages- und Wochensummen bleiben in der Datenbank, die
+        Übersichten brauchen das Archiv also nicht. Liefert die Anzahl der
+        archivierten Einträge.
+
+        Läuft an einer Jahresgrenze noch eine Schicht oder Pause (z.B. ein
+        vergessenes Ausstempeln), wird archive.OpenSessionsError mit den
+        offenen Schichten ausgelöst. Mit force werden Schichten, die zum
+        Jahresende offen sind, ab ihrem Beginn in der laufenden Datenbank
+        gelassen, damit ihr "Aus" im neuen Jahr sie schließt; über den
+        Jahresbeginn laufende Schichten werden mit archiviert.
+        """
+        if self.read_only:
+            raise RuntimeError("Archivieren braucht Schreibrecht")
+        if jahr >= date.today().year:
+            raise ValueError(f"Das Jahr {jahr} ist noch nicht abgeschlossen")
+        if jahr in self.archived_years():
+            raise ValueError(f"Das Jahr {jahr} ist bereits archiviert")
+        von, bis = archive.year_bounds(jahr)
+        name = archive.archive_file_name(self.db_path, jahr)
+        pfad = os.path.join(os.path.dirname(os.path.abspath(self.db_path)), name)
+        uebertrag: List[Tuple[int, int]] = []
+
+        def fill(cursor):
+            # Schichten oder Pausen über die Jahresgrenzen würden beim Nachtragen neu gepaart
+            for grenze in (von, bis):
+                offen = archive.open_sessions(cursor, grenze)
+                if offen and not force:
+                    raise archive.OpenSessionsError(grenze, offen)
+                if grenze == bis:
+                    uebertrag[:] = [(mitarbeiter_id, seit) for mitarbeiter_id, _, _, seit in offen]
+                    for _, vorname, nachname, seit in offen:
+                        print(f"Offene Schicht von {vorname} {nachname} seit "
+                              f"{datetime.fromtimestamp(seit):%d.%m.%Y %H:%M} bleibt in der Datenbank")
+            archive.create_archive_tables(cursor)
+            return archive.copy_year(cursor, von, bis, uebertrag)
+
+        def move(cursor):
+            bedingung, params = archive.year_condition(von, bis, uebertrag)
+            cursor.execute(f"SELECT COUNT(*) FROM main.stempel WHERE {bedingung}", params)
+            anzahl = cursor.fetchone()[0]
+            cursor.execute(f"SELECT COUNT(*) FROM {archive.ZIEL}.stempel")
+            if cursor.fetchone()[0] != anzahl:
+                raise RuntimeError(f"Archiv {name} ist unvollständig")
+            cursor.execute(f"DELETE FROM main.stempel WHERE {bedingung}", params)
+            cursor.execute("""
+                INSERT INTO archivjahre (jahr, pfad, eintraege, archiviert_am) VALUES (?, ?, ?, ?)
+            """, (jahr, name, anzahl, datetime.now().isoformat(timespec='seconds')))
+            return anzahl
+
+        with self.lock:
+            # Reste eines abgebrochenen Versuchs (nicht in archivjahre eingetragen) verwerfen
+            if os.path.exists(pfad):
+                os.remove(pfad)
+            self.conn.execute(f"ATTACH DATABASE ? AS {archive.ZIEL}", (_file_uri(pfad),))
+            try:
+                self._write_transaction(fill)
+                anzahl = self._write_transaction(move)
+            except Exception:
+                self.conn.execute(f"DETACH DATABASE {archive.ZIEL}")
+                if os.path.exists(pfad):
+                    os.remove(pfad)
+                raise
+            self.conn.execute(f"DETACH DATABASE {archive.ZIEL}")
+            self.invalidate_caches()
+        self.vacuum()
+        return anzahl
+
+    def restore_year(self, jahr: int) -> int:
+        """Holt ein archiviertes Jahr zurück in die Datenbank und entfernt die Archivdatei.
+
+        Liefert die Anzahl der zurückgeholten Einträge.
+        """
+        if self.read_only:
+            raise RuntimeError("Wiederherstellen braucht Schreibrecht")
+        pfad = self.archived_years().get(jahr)
+        if pfad is None:
+            raise ValueError(f"Das Jahr {jahr} ist nicht archiviert")
+
+        def restore(cursor):
+            anzahl = archive.copy_back(cursor)
+            cursor.execute("DELETE FROM archivjahre WHERE jahr = ?", (jahr,))
+            return anzahl
+
+        with self.lock:
+            self.conn.execute(f"ATTACH DATABASE ? AS {archive.ZIEL}", (_file_uri(pfad, "ro"),))
+            try:
+                anzahl = self._write_transaction(restore)
+            finally:
+                self.conn.execute(f"DETACH DATABASE {archive.ZIEL}")
+            for verbindung in self._angehaengt:
+                self._detach_archive(jahr, verbindung)
+            self.invalidate_caches()
+        os.remove(pfad)
+        return anzahl
+
+    def vacuum(self) -> Tuple[int, int]:
+        """Gibt freie Seiten an das Dateisystem zurück; liefert die Anzahl freier Seiten vorher und nachher"""
+        with self.lock:
+            return archive.vacuum(self.conn)
+
+    @staticmethod
+    def _uebersicht(woche: int, arbeit_sekunden: int, pause_sekunden: int) -> Dict:
+        """Erzeugt einen Eintrag der Wochenübersicht (Stunden)"""
+        arbeitszeit = arbeit_sekunden / 3600
+        pausezeit = pause_sekunden / 3600
+        gesamtstunden = arbeitszeit - pausezeit
+        return {
+            "woche": woche,
+            "arbeitszeit": arbeitszeit,
+            "pausezeit": pausezeit,
+            "gesamtzeit": gesamtstunden,
+            # Überstunden: mehr als 40 Stunden pro Woche
+            "ueberstunden": max(0, gesamtstunden - aggregates.SOLL_SEKUNDEN_WOCHE / 3600)
+        }
+
+    def berechne_monatsuebersicht(self, vorname: Union[str, Employee], nachname: Optional[str], jahr: int,
+                                  monat: int) -> List[Dict]:
         """Berechnet die Arbeitszeit pro Woche für einen bestimmten Monat."""
-        entries = self.get_entries(vorname, nachname)
-        
-        # Filtere Einträge für den gewählten Monat
-        monats_eintraege = [
-            e for e in entries 
-            if datetime.strptime(e.date, "%Y-%m-%d").year == jahr and 
-               datetime.strptime(e.date, "%Y-%m-%d").month == monat
-        ]
-        
-        # Gruppiere Einträge nach Wochen
-        wochen_eintraege = {}
-        for eintrag in monats_eintraege:
-            datum = datetime.strptime(eintrag.date, "%Y-%m-%d")
-            woche = self.get_wochennummer(datum)
-            if woche not in wochen_eintraege:
-                wochen_eintraege[woche] = []
-            wochen_eintraege[woche].append(eintrag)
-        
-        # Berechne Zeiten pro Woche
-        wochen_uebersichten = []
-        for woche, eintraege in wochen_eintraege.items():
-            arbeitszeit = timedelta()
-            pausezeit = timedelta()
-            letzter_kommen = None
-            letzter_pause_start = None
-            
-            for eintrag in eintraege:
-                zeit = datetime.strptime(f"{eintrag.date} {eintrag.time}", "%Y-%m-%d %H:%M:%S")
-                
-                if eintrag.status == "Ein":
-                    letzter_kommen = zeit
-                elif eintrag.status == "Aus" and letzter_kommen:
-                    arbeitszeit += zeit - letzter_kommen
-                elif eintrag.status == "Pause Start":
-                    letzter_pause_start = zeit
-                elif eintrag.status == "Pause Ende" and letzter_pause_start:
-                    pausezeit += zeit - letzter_pause_start
-            
-            gesamtzeit = arbeitszeit - pausezeit
-            gesamtstunden = gesamtzeit.total_seconds() / 3600
-            
-            # Berechne Überstunden (mehr als 40 Stunden pro Woche)
-            ueberstunden = max(0, gesamtstunden - 40)
-            
-            wochen_uebersichten.append({
-                "woche": woche,
-                "arbeitszeit": arbeitszeit.total_seconds() / 3600,
-                "pausezeit": pausezeit.total_seconds() / 3600,
-                "gesamtzeit": gesamtstunden,
-                "ueberstunden": ueberstunden
-            })
-        
-        # Sortiere nach Kalenderwoche
-        wochen_uebersichten.sort(key=lambda x: x["woche"])
-        
-        return wochen_uebersichten 
\ No newline at end of file
+        start, end = month_bounds(jahr, monat)
+
+        # Tagessummen des Monats nach Kalenderwoche zusammenfassen
+        cursor = self.read_conn.cursor()
+        cursor.execute("""
+            SELECT datum, arbeit_sekunden, pause_sekunden
+            FROM tagesaggregate
+            WHERE mitarbeiter_id = ? AND datum >= ? AND datum < ?
+        """, (self._resolve(vorname, nachname).id, start.date().isoformat(), end.date().isoformat()))
+        wochen = {}
+        for datum, arbeit, pause in cursor.fetchall():
+            woche = self.get_wochennummer(date.fromisoformat(datum))
+            summe = wochen.setdefault(woche, [0, 0])
+            summe[0] += arbeit
+            summe[1] += pause
+
+        return [self._uebersicht(woche, arbeit, pause) for woche, (arbeit, pause) in sorted(wochen.items())]
+
+    def berechne_wochenuebersicht(self, vorname: Union[str, Employee], nachname: Optional[str], iso_jahr: int,
+                                  iso_woche: int) -> Optional[Dict]:
+        """Liefert die Arbeitszeit einer ganzen ISO-Kalenderwoche."""
+        cursor = self.read_conn.cursor()
+        cursor.execute("""
+            SELECT arbeit_sekunden, pause_sekunden
+            FROM wochenaggregate
+            WHERE mitarbeiter_id = ? AND iso_jahr = ? AND iso_woche = ?
+        """, (self._resolve(vorname, nachname).id, iso_jahr, iso_woche))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return self._uebersicht(iso_woche, row[0], row[1])
+
+    @staticmethod
+    def _summen(arbeit_sekunden: int, pause_sekunden: int, ueberstunden_sekunden: int) -> Dict:
+        """Stunden eines Monats oder Zeitraums (Überstunden bereits je Woche ermittelt)"""
+        return {
+            "arbeitszeit": arbeit_sekunden / 3600,
+            "pausezeit": pause_sekunden / 3600,
+            "gesamtzeit": arbeit_sekunden / 3600 - pause_sekunden / 3600,
+            "ueberstunden": ueberstunden_sekunden / 3600
+        }
+
+    def berechne_zeitraumuebersicht(self, vorname: Union[str, Employee], nachname: Optional[str], start: date,
+                                    end: date) -> Dict:
+        """Wochen, Monate und Summe eines Zeitraums [start, end) aus einer einzigen Abfrage.
+
+        "wochen" enthält jede ISO-Kalenderwoche, die den Zeitraum berührt, vollständig,
+        auch wenn sie über eine Monats- oder Jahresgrenze läuft. "monate" entspricht
+        den Summen von berechne_monatsuebersicht, dort werden Wochen an der Monatsgrenze
+        geteilt. Für die Überstunden der "summe" zählen nur die Tage im Zeitraum.
+        """
+        start = start.date() if isinstance(start, datetime) else start
+        end = end.date() if isinstance(end, datetime) else end
+        if end <= start:
+            return {"wochen": [], "monate": [], "summe": self._summen(0, 0, 0)}
+        letzter_tag = end - timedelta(days=1)
+        erster_montag = start - timedelta(days=start.weekday())
+        letzter_sonntag = letzter_tag + timedelta(days=6 - letzter_tag.weekday())
+
+        cursor = self.read_conn.cursor()
+        cursor.execute("""
+            SELECT datum, arbeit_sekunden, pause_sekunden
+            FROM tagesaggregate
+            WHERE mitarbeiter_id = ? AND datum >= ? AND datum <= ?
+        """, (self._resolve(vorname, nachname).id, erster_montag.isoformat(), letzter_sonntag.isoformat()))
+        wochen: Dict[date, List[int]] = {}
+        monate: Dict[Tuple[int, int], List[int]] = {}
+        # Netto-Sekunden der Wochenteile je Monat bzw. im Zeitraum, für die Überstunden
+        monatswochen: Dict[Tuple[int, int, date], int] = {}
+        zeitraumwochen: Dict[date, int] = {}
+        arbeit_gesamt = pause_gesamt = 0
+        for datum, arbeit, pause in cursor.fetchall():
+            tag = date.fromisoformat(datum)
+            montag = tag - timedelta(days=tag.weekday())
+            summe = wochen.setdefault(montag, [0, 0])
+            summe[0] += arbeit
+            summe[1] += pause
+            if not start <= tag < end:
+                continue
+            summe = monate.setdefault((tag.year, tag.month), [0, 0])
+            summe[0] += arbeit
+            summe[1] += pause
+            key = (tag.year, tag.month, montag)
+            monatswochen[key] = monatswochen.get(key, 0) + arbeit - pause
+            zeitraumwochen[montag] = zeitraumwochen.get(montag, 0) + arbeit - pause
+            arbeit_gesamt += arbeit
+            pause_gesamt += pause
+
+        soll = aggregates.SOLL_SEKUNDEN_WOCHE
+        wochen_liste = []
+        montag = erster_montag
+        while montag <= letzter_sonntag:
+            arbeit, pause = wochen.get(montag, (0, 0))
+            iso_jahr, iso_woche, _ = montag.isocalendar()
+            woche = self._uebersicht(iso_woche, arbeit, pause)
+            woche.update(iso_jahr=iso_jahr, von=montag.isoformat(), bis=(montag + timedelta(days=6)).isoformat())
+            wochen_liste.append(woche)
+            montag += timedelta(days=7)
+
+        ueberstunden_monat: Dict[Tuple[int, int], int] = {}
+        for (jahr, monat, _), netto in monatswochen.items():
+            ueberstunden_monat[(jahr, monat)] = ueberstunden_monat.get((jahr, monat), 0) + max(0, netto - soll)
+        monate_liste = []
+        jahr, monat = start.year, start.month
+        while (jahr, monat) <= (letzter_tag.year, letzter_tag.month):
+            arbeit, pause = monate.get((jahr, monat), (0, 0))
+            eintrag = self._summen(arbeit, pause, ueberstunden_monat.get((jahr, monat), 0))
+            eintrag.update(jahr=jahr, monat=monat)
+            monate_liste.append(eintrag)
+            jahr, monat = (jahr + 1, 1) if monat == 12 else (jahr, monat + 1)
+
+        ueberstunden = sum(max(0, netto - soll) for netto in zeitraumwochen.values())
+        return {
+            "wochen": wochen_liste,
+            "monate": monate_liste,
+            "summe": self._summen(arbeit_gesamt, pause_gesamt, ueberstunden)
+        }
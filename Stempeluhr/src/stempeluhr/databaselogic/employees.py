@@ -0,0 +1,32 @@
+import sqlite3
+from typing import Optional
+from ..models.employee import Employee, normalize_name
+
+
+def create_table(cursor: sqlite3.Cursor):
+    """Legt die Tabelle der Mitarbeiter an; jeder Name kommt nur einmal vor"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS mitarbeiter (
+        id INTEGER PRIMARY KEY,
+        vorname TEXT NOT NULL,
+        nachname TEXT NOT NULL,
+        UNIQUE (vorname, nachname)
+    )
+    """)
+
+
+def find_employee(cursor: sqlite3.Cursor, vorname: str, nachname: str) -> Optional[Employee]:
+    """Sucht einen Mitarbeiter nach (vereinheitlichtem) Namen"""
+    vorname, nachname = normalize_name(vorname), normalize_name(nachname)
+    row = cursor.execute("SELECT id FROM mitarbeiter WHERE vorname = ? AND nachname = ?",
+                         (vorname, nachname)).fetchone()
+    return Employee(row[0], vorname, nachname) if row else None
+
+
+def ensure_employee(cursor: sqlite3.Cursor, vorname: str, nachname: str) -> Employee:
+    """Liefert den Mitarbeiter und legt ihn bei Bedarf an (innerhalb einer Schreibtransaktion)"""
+    vorname, nachname = normalize_name(vorname), normalize_name(nachname)
+    cursor.execute("INSERT OR IGNORE INTO mitarbeiter (vorname, nachname) VALUES (?, ?)", (vorname, nachname))
+    if cursor.rowcount:
+        return Employee(cursor.lastrowid, vorname, nachname)
+    return find_employee(cursor, vorname, nachname)
@@ -0,0 +1,334 @@
+import functools
+import inspect
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Ab dieser Dauer gilt eine Abfrage als langsam (Millisekunden)
+DEFAULT_SLOW_MS = 50.0
+# Anzahl langsamer Abfragen, die im Speicher gehalten werden
+MAX_SLOW_ENTRIES = 200
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Fasst Leerraum zusammen, damit gleiche Abfragen gleich gezählt werden"""
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class Stats:
+    """Zähler für eine Methode oder eine SQL-Anweisung"""
+    __slots__ = ('calls', 'total', 'max', 'rows')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'total_ms': self.total * 1000,
+            'mean_ms': self.total * 1000 / self.calls if self.calls else 0.0,
+            'max_ms': self.max * 1000,
+            'rows': self.rows,
+        }
+
+
+class StatementCacheMirror:
+    """Bildet den Statement-Cache einer sqlite3-Verbindung nach, um seine Treffer zu schätzen.
+
+    sqlite3 hält pro Verbindung die zuletzt benutzten übersetzten Anweisungen
+    (LRU über den SQL-Text, Größe cached_statements), meldet aber keine
+    Treffer. Die Nachbildung kennt nur die Anweisungen ab dem Einschalten der
+    Messung und nicht die internen Regeln von sqlite3; die Zahlen sind daher
+    eine Schätzung, keine Messung.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._sql: 'OrderedDict[str, None]' = OrderedDict()
+
+    def lookup(self, sql: str) -> bool:
+        """True, wenn die Anweisung noch übersetzt im Cache liegt"""
+        if sql in self._sql:
+            self._sql.move_to_end(sql)
+            return True
+        self._sql[sql] = None
+        if len(self._sql) > self.size:
+            self._sql.popitem(last=False)
+        return False
+
+
+class Instrumentation:
+    """Sammelt Laufzeiten von DatabaseHandler-Methoden und SQL-Anweisungen.
+
+    Wird über DatabaseHandler.enable_instrumentation() eingeschaltet. Langsame
+    Anweisungen werden mit ihrem EXPLAIN QUERY PLAN festgehalten und, falls
+    slow_log_path gesetzt ist, zusätzlich an diese Datei angehängt.
+    """
+
+    def __init__(self, slow_ms: float = DEFAULT_SLOW_MS, slow_log_path: Optional[str] = None):
+        self.slow_ms = slow_ms
+        self.slow_log_path = slow_log_path
+        self.started = datetime.now()
+        self.methods: Dict[str, Stats] = {}
+        self.statements: Dict[str, Stats] = {}
+        self.slow: List[Dict] = []
+        self.cache_size = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._lock = threading.Lock()
+
+    def record_method(self, name: str, duration: float, rows: int = 0):
+        with self._lock:
+            self._add(self.methods, name, duration, rows)
+
+    def record_statement(self, sql: str, duration: float, rows: int, conn: sqlite3.Connection,
+                         params=None):
+        sql = normalize_sql(sql)
+        with self._lock:
+            self._add(self.statements, sql, duration, rows)
+        if duration * 1000 >= self.slow_ms:
+            self._log_slow(sql, duration, rows, conn, params)
+
+    def record_cache(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Geschätzter Anteil der Anweisungen, die ohne erneutes Übersetzen liefen (siehe StatementCacheMirror)"""
+        gesamt = self.cache_hits + self.cache_misses
+        return self.cache_hits / gesamt if gesamt else 0.0
+
+    @staticmethod
+    def _add(table: Dict[str, Stats], key: str, duration: float, rows: int):
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = Stats()
+        stats.calls += 1
+        stats.total += duration
+        stats.rows += rows
+        if duration > stats.max:
+            stats.max = duration
+
+    def _log_slow(self, sql: str, duration: float, rows: int, conn: sqlite3.Connection, params):
+        try:
+            plan = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ())]
+        except sqlite3.Error as e:
+            plan = [f"(kein Plan: {e})"]
+        eintrag = {
+            'time': datetime.now().isoformat(timespec='milliseconds'),
+            'duration_ms': duration * 1000,
+            'rows': rows,
+            'sql': sql,
+            'plan': plan,
+        }
+        with self._lock:
+            self.slow.append(eintrag)
+            del self.slow[:-MAX_SLOW_ENTRIES]
+        if self.slow_log_path:
+            try:
+                with open(self.slow_log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(eintrag, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"Fehler beim Schreiben des Slow-Query-Logs: {e}")
+
+    def snapshot(self) -> Dict:
+        """Aktueller Stand aller Zähler als JSON-fähiges Dict"""
+        with self._lock:
+            return {
+                'started': self.started.isoformat(timespec='seconds'),
+                'snapshot': datetime.now().isoformat(timespec='seconds'),
+                'slow_ms': self.slow_ms,
+                'methods': {name: stats.to_dict() for name, stats in self.methods.items()},
+                'statements': {sql: stats.to_dict() for sql, stats in self.statements.items()},
+                'statement_cache': {
+                    'size': self.cache_size,
+                    'hits': self.cache_hits,
+                    'misses': self.cache_misses,
+                    'hit_rate': self.cache_hit_rate,
+                    # Nachgebildet, nicht von sqlite3 gemeldet
+                    'estimated': True,
+                },
+                'slow': list(self.slow),
+            }
+
+    def dump(self, path: str) -> str:
+        """Schreibt den Snapshot als JSON-Datei"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self.methods.clear()
+            self.statements.clear()
+            self.slow.clear()
+            self.cache_hits = 0
+            self.cache_misses = 0
+            self.started = datetime.now()
+
+    def wrap_method(self, name: str, method):
+        """Umhüllt eine Methode; Generatoren werden bis zum Ende des Durchlaufs gemessen"""
+        if inspect.isgeneratorfunction(method):
+            @functools.wraps(method)
+            def generator_wrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                rows = 0
+                try:
+                    for item in method(*args, **kwargs):
+                        rows += 1
+                        yield item
+                finally:
+                    self.record_method(name, time.perf_counter() - t0, rows)
+            return generator_wrapper
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            result = None
+            try:
+                result = method(*args, **kwargs)
+                return result
+            finally:
+                self.record_method(name, time.perf_counter() - t0,
+                                   len(result) if isinstance(result, list) else 0)
+        return wrapper
+
+
+class InstrumentedCursor:
+    """Cursor-Hülle, die Ausführung und Abholen der Zeilen pro Anweisung misst"""
+
+    def __init__(self, cursor: sqlite3.Cursor, instrumentation: Instrumentation, conn: sqlite3.Connection,
+                 cache: Optional[StatementCacheMirror] = None):
+        object.__setattr__(self, '_cursor', cursor)
+        object.__setattr__(self, '_instrumentation', instrumentation)
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_cache', cache)
+        object.__setattr__(self, '_pending', None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        # z.B. row_factory
+        setattr(self._cursor, name, value)
+
+    def _finish(self):
+        """Verbucht die laufende Anweisung"""
+        pending = self._pending
+        if pending is not None:
+            object.__setattr__(self, '_pending', None)
+            sql, params, duration, rows = pending
+            self._instrumentation.record_statement(sql, duration, rows, self._conn, params)
+
+    def _add(self, duration: float, rows: int):
+        if self._pending is not None:
+            sql, params, total, total_rows = self._pending
+            object.__setattr__(self, '_pending', (sql, params, total + duration, total_rows + rows))
+
+    def _lookup(self, sql: str):
+        if self._cache is not None:
+            self._instrumentation.record_cache(self._cache.lookup(sql))
+
+    def execute(self, sql: str, params=()):
+        self._finish()
+        self._lookup(sql)
+        t0 = time.perf_counter()
+        self._cursor.execute(sql, params)
+        object.__setattr__(self, '_pending', (sql, params, time.perf_counter() - t0, 0))
+        return self
+
+    def executemany(self, sql: str, seq_of_params):
+        self._finish()
+        self._lookup(sql)
+        t0 = time.perf_counter()
+        self._cursor.executemany(sql, seq_of_params)
+        # Ohne Parameter lässt sich kein Plan erstellen
+        self._instrumentation.record_statement(sql, time.perf_counter() - t0, 0, self._conn, None)
+        return self
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._add(time.perf_counter() - t0, row is not None)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size: int = None):
+        t0 = time.perf_counter()
+        rows = self._cursor.fetchmany(size if size is not None else self._cursor.arraysize)
+        self._add(time.perf_counter() - t0, len(rows))
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._add(time.perf_counter() - t0, len(rows))
+        self._finish()
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection:
+    """Verbindungs-Hülle, deren Cursor gemessen werden; alles andere wird durchgereicht.
+
+    Mit cache_size (= cached_statements der Verbindung) werden auch die
+    Treffer ihres Statement-Caches geschätzt.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, instrumentation: Instrumentation, cache_size: int = 0):
+        self._conn = conn
+        self._instrumentation = instrumentation
+        self._cache = StatementCacheMirror(cache_size) if cache_size else None
+        instrumentation.cache_size = max(instrumentation.cache_size, cache_size)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self) -> InstrumentedCursor:
+        return InstrumentedCursor(self._conn.cursor(), self._instrumentation, self._conn, self._cache)
+
+    def execute(self, sql: str, params=()) -> InstrumentedCursor:
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql: str, seq_of_params) -> InstrumentedCursor:
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
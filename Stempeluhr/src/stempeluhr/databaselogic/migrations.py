@@ -0,0 +1,256 @@
+import re
+import sqlite3
+from typing import Callable, Dict, List, Optional, Tuple
+from ..models.time_entry import status_to_code, to_timestamp
+from . import aggregates, archive, employees
+
+
+def _parse_pause_dauer(pause_dauer: Optional[str], status: str) -> Optional[int]:
+    """Liest die Pausendauer aus den alten Textformaten ("1h 5min", "5min", "Pause Ende (5 Min.)")"""
+    text = pause_dauer or ''
+    if not text and status and status.startswith('Pause Ende'):
+        text = status
+    if not text:
+        return None
+    stunden = re.search(r'(\d+)\s*h', text)
+    minuten = re.search(r'(\d+)\s*min', text, re.IGNORECASE)
+    if not stunden and not minuten:
+        return None
+    sekunden = 0
+    if stunden:
+        sekunden += int(stunden.group(1)) * 3600
+    if minuten:
+        sekunden += int(minuten.group(1)) * 60
+    return sekunden
+
+
+def _migrate_v1(cursor: sqlite3.Cursor):
+    """Ursprüngliches Schema: Datum und Uhrzeit als Text"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS stempel (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        vorname TEXT NOT NULL,
+        nachname TEXT NOT NULL,
+        date TEXT NOT NULL,
+        time TEXT NOT NULL,
+        status TEXT NOT NULL,
+        pause_dauer TEXT
+    )
+    """)
+    # Sehr alte Datenbanken haben noch keine pause_dauer Spalte
+    cursor.execute("PRAGMA table_info(stempel)")
+    if not any(column[1] == 'pause_dauer' for column in cursor.fetchall()):
+        cursor.execute("ALTER TABLE stempel ADD COLUMN pause_dauer TEXT")
+
+
+def _migrate_v2(cursor: sqlite3.Cursor):
+    """Zeitstempel als UTC-Sekunden, Statuscode, Pausendauer in Sekunden und Indizes"""
+    cursor.execute("ALTER TABLE stempel RENAME TO stempel_v1")
+    cursor.execute("""
+    CREATE TABLE stempel (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        vorname TEXT NOT NULL,
+        nachname TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        status_code INTEGER NOT NULL,
+        pause_sekunden INTEGER
+    )
+    """)
+
+    # Alte Zeilen haben nicht unbedingt eine id Spalte, die rowid gibt es immer
+    cursor.execute("""
+        SELECT rowid, vorname, nachname, date, time, status, pause_dauer
+        FROM stempel_v1
+    """)
+    insert_cursor = cursor.connection.cursor()
+    while True:
+        rows = cursor.fetchmany(1000)
+        if not rows:
+            break
+        neue_zeilen = []
+        for rowid, vorname, nachname, date, time, status, pause_dauer in rows:
+            try:
+                ts = to_timestamp(date, time)
+            except (TypeError, ValueError) as e:
+                print(f"Eintrag {rowid} übersprungen, ungültiger Zeitstempel: {e}")
+                continue
+            neue_zeilen.append((
+                rowid,
+                vorname or '',
+                nachname or '',
+                ts,
+                status_to_code(status),
+                _parse_pause_dauer(pause_dauer, status)
+            ))
+        insert_cursor.executemany("""
+            INSERT INTO stempel (id, vorname, nachname, ts, status_code, pause_sekunden)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, neue_zeilen)
+
+    cursor.execute("DROP TABLE stempel_v1")
+
+    # Deckender Index für alle Abfragen pro Mitarbeiter, sortiert nach Zeit
+    cursor.execute("""
+        CREATE INDEX idx_stempel_person_ts
+        ON stempel (vorname, nachname, ts, id, status_code, pause_sekunden)
+    """)
+    # Für Abfragen über alle Mitarbeiter (z.B. letzter Benutzer)
+    cursor.execute("CREATE INDEX idx_stempel_ts ON stempel (ts)")
+
+
+def _migrate_v3(cursor: sqlite3.Cursor):
+    """Tages- und Wochensummen für die Übersichten.
+
+    Schema und Befüllung wie in Version 3 ausgeliefert (Summen nach Namen);
+    aggregates arbeitet inzwischen mit Mitarbeiter-IDs, daher steht beides
+    hier. _migrate_v4 baut die Tabellen danach neu auf.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS tagesaggregate (
+        vorname TEXT NOT NULL,
+        nachname TEXT NOT NULL,
+        datum TEXT NOT NULL,
+        arbeit_sekunden INTEGER NOT NULL DEFAULT 0,
+        pause_sekunden INTEGER NOT NULL DEFAULT 0,
+        ueberstunden_sekunden INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (vorname, nachname, datum)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS wochenaggregate (
+        vorname TEXT NOT NULL,
+        nachname TEXT NOT NULL,
+        iso_jahr INTEGER NOT NULL,
+        iso_woche INTEGER NOT NULL,
+        arbeit_sekunden INTEGER NOT NULL DEFAULT 0,
+        pause_sekunden INTEGER NOT NULL DEFAULT 0,
+        ueberstunden_sekunden INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (vorname, nachname, iso_jahr, iso_woche)
+    ) WITHOUT ROWID
+    """)
+
+    personen = cursor.execute("SELECT DISTINCT vorname, nachname FROM stempel").fetchall()
+    for vorname, nachname in personen:
+        events = cursor.execute("""
+            SELECT ts, status_code FROM stempel
+            WHERE vorname = ? AND nachname = ?
+            ORDER BY ts, id
+        """, (vorname, nachname)).fetchall()
+        wochen: Dict[Tuple[int, int], List[int]] = {}
+        for datum, (arbeit, pause) in aggregates.compute_day_totals(events).items():
+            cursor.execute("""
+                INSERT INTO tagesaggregate
+                    (vorname, nachname, datum, arbeit_sekunden, pause_sekunden, ueberstunden_sekunden)
+                VALUES (?, ?, ?, ?, ?, MAX(0, ? - ? - ?))
+            """, (vorname, nachname, datum.isoformat(), arbeit, pause, arbeit, pause, aggregates.SOLL_SEKUNDEN_TAG))
+            summe = wochen.setdefault(datum.isocalendar()[:2], [0, 0])
+            summe[0] += arbeit
+            summe[1] += pause
+        cursor.executemany("""
+            INSERT INTO wochenaggregate
+                (vorname, nachname, iso_jahr, iso_woche, arbeit_sekunden, pause_sekunden, ueberstunden_sekunden)
+            VALUES (?, ?, ?, ?, ?, ?, MAX(0, ? - ? - ?))
+        """, [(vorname, nachname, iso_jahr, iso_woche, arbeit, pause, arbeit, pause, aggregates.SOLL_SEKUNDEN_WOCHE)
+              for (iso_jahr, iso_woche), (arbeit, pause) in wochen.items()])
+
+
+def _migrate_v4(cursor: sqlite3.Cursor):
+    """Mitarbeiter in eigener Tabelle, Stempel und Summen verweisen per ID darauf.
+
+    Namen, die sich nur im Leerraum unterscheiden ("Max " und "Max"), werden
+    zu einem Mitarbeiter zusammengeführt. Die nach Namen geführten Summen aus
+    Version 3 werden verworfen und mit Mitarbeiter-ID neu berechnet.
+    """
+    employees.create_table(cursor)
+    cursor.execute("CREATE TEMP TABLE namen_v3 (vorname TEXT, nachname TEXT, mitarbeiter_id INTEGER)")
+    personen = cursor.execute("SELECT DISTINCT vorname, nachname FROM stempel").fetchall()
+    cursor.executemany("INSERT INTO namen_v3 VALUES (?, ?, ?)", [
+        (vorname, nachname, employees.ensure_employee(cursor, vorname, nachname).id)
+        for vorname, nachname in personen
+    ])
+
+    cursor.execute("ALTER TABLE stempel RENAME TO stempel_v3")
+    cursor.execute("""
+    CREATE TABLE stempel (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        mitarbeiter_id INTEGER NOT NULL REFERENCES mitarbeiter (id),
+        ts INTEGER NOT NULL,
+        status_code INTEGER NOT NULL,
+        pause_sekunden INTEGER
+    )
+    """)
+    cursor.execute("""
+        INSERT INTO stempel (id, mitarbeiter_id, ts, status_code, pause_sekunden)
+        SELECT s.id, n.mitarbeiter_id, s.ts, s.status_code, s.pause_sekunden
+        FROM stempel_v3 s JOIN namen_v3 n ON n.vorname = s.vorname AND n.nachname = s.nachname
+    """)
+    cursor.execute("DROP TABLE stempel_v3")
+    cursor.execute("DROP TABLE namen_v3")
+
+    # Deckender Index pro Mitarbeiter: die Suche ist ein Integer-Vergleich statt zweier Texte
+    cursor.execute("""
+        CREATE INDEX idx_stempel_mitarbeiter_ts
+        ON stempel (mitarbeiter_id, ts, id, status_code, pause_sekunden)
+    """)
+    cursor.execute("CREATE INDEX idx_stempel_ts ON stempel (ts)")
+
+    cursor.execute("DROP TABLE IF EXISTS tagesaggregate")
+    cursor.execute("DROP TABLE IF EXISTS wochenaggregate")
+    aggregates.create_tables(cursor)
+    aggregates.rebuild(cursor)
+
+
+def _migrate_v5(cursor: sqlite3.Cursor):
+    """Verzeichnis der archivierten Jahre (eigene Datenbankdateien je Jahr)"""
+    archive.create_table(cursor)
+
+
+# Schemaversionen mit der Migration, die eine Datenbank auf diese Version bringt (aufsteigend)
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Cursor], None]]] = [
+    (1, _migrate_v1),
+    (2, _migrate_v2),
+    (3, _migrate_v3),
+    (4, _migrate_v4),
+    (5, _migrate_v5),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Liest die Schemaversion aus PRAGMA user_version"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Bringt die Datenbank auf die aktuelle Schemaversion.
+
+    Alle ausstehenden Migrationen laufen in einer einzigen Transaktion, die
+    am Ende PRAGMA user_version setzt. Bricht die Migration ab, wird sie
+    komplett zurückgerollt und beim nächsten Start erneut ausgeführt; bereits
+    erreichte Versionen werden dabei übersprungen.
+    """
+    if get_schema_version(conn) >= SCHEMA_VERSION:
+        return SCHEMA_VERSION
+    if not conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+        # Nur vor der ersten Tabelle möglich: freie Seiten (z.B. nach dem
+        # Archivieren) lassen sich dann mit incremental_vacuum zurückgeben
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        # Ein anderer Prozess könnte die Migration inzwischen erledigt haben
+        aktuelle_version = get_schema_version(conn)
+        for version, migration in MIGRATIONS:
+            if aktuelle_version >= version:
+                continue
+            migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {version}")
+            aktuelle_version = version
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    print(f"Datenbank auf Schemaversion {aktuelle_version} migriert")
+    return aktuelle_version
@@ -0,0 +1,60 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, List, Optional, Tuple
+from ..databaselogic.db_handler import DatabaseHandler
+from .pdf_export import export_monthly_pdf
+
+# Verbindung des Worker-Prozesses (wird im Initializer geöffnet)
+_worker_db: Optional[DatabaseHandler] = None
+
+
+def _init_worker(db_path: str):
+    """Öffnet im Worker-Prozess eine eigene, nur lesende Verbindung"""
+    global _worker_db
+    _worker_db = DatabaseHandler(db_path, read_only=True)
+
+
+def _render(vorname: str, nachname: str, jahr: int, monat: int, output_dir: str,
+            use_cache: bool = True) -> Tuple[str, float]:
+    """Erstellt eine Monatsübersicht mit der Verbindung des Workers; liefert Pfad und Dauer"""
+    t0 = time.perf_counter()
+    pdf_path = export_monthly_pdf(_worker_db, vorname, nachname, jahr, monat, output_dir, use_cache)
+    return pdf_path, time.perf_counter() - t0
+
+
+def generate_reports(db_path: str, personen: List[Tuple[str, str]], jahr: int, monat: int,
+                     output_dir: str, workers: Optional[int] = None,
+                     use_cache: bool = True) -> Iterator[Tuple[str, float]]:
+    """Erstellt die Monatsübersichten mehrerer Mitarbeiter parallel in einem Prozess-Pool.
+
+    Liefert (Pfad, Sekunden) je Datei in der Reihenfolge der Fertigstellung;
+    fehlgeschlagene Exporte werden ausgegeben und übersprungen. Mit workers=1
+    wird ohne Pool im eigenen Prozess gerechnet.
+    """
+    global _worker_db
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(personen) <= 1:
+        _init_worker(db_path)
+        try:
+            for vorname, nachname in personen:
+                try:
+                    yield _render(vorname, nachname, jahr, monat, output_dir, use_cache)
+                except Exception as e:
+                    print(f"Fehler beim Export für {vorname} {nachname}: {e}")
+        finally:
+            _worker_db.close()
+            _worker_db = None
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(personen)), initializer=_init_worker,
+                             initargs=(db_path,)) as pool:
+        futures = {pool.submit(_render, vorname, nachname, jahr, monat, output_dir, use_cache): (vorname, nachname)
+                   for vorname, nachname in personen}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                vorname, nachname = futures[future]
+                print(f"Fehler beim Export für {vorname} {nachname}: {e}")
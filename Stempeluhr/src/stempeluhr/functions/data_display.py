@@ -1,51 +1,53 @@
+from ..models.sessions import annotate_entries
 from ..models.time_entry import TimeEntry
 from ..databaselogic.db_handler import DatabaseHandler
-from typing import List
-from datetime import datetime
+from typing import List, Optional, Tuple
 
-def get_formatted_history(vorname: str = None, nachname: str = None) -> List[tuple]:
+def format_pause_dauer(sekunden: int) -> str:
+    """Formatiert eine Pausendauer in Sekunden, z.B. als 1h 5min oder 5min"""
+    total_minutes = sekunden // 60
+    hours = total_minutes // 60
+    minutes = total_minutes % 60
+    if hours > 0:
+        return f"{hours}h {minutes}min"
+    return f"{minutes}min"
+
+def format_history_entry(entry: TimeEntry, hinweise: Tuple[str, ...] = (), pause_dauer: Optional[int] = None) -> tuple:
+    """Formatiert einen Eintrag als Zeile für die Historien-Tabelle.
+
+    hinweise und pause_dauer kommen aus annotate_entries (Sitzungs-Engine).
+    """
+    pause_text = ""
+    if pause_dauer is None:
+        pause_dauer = entry.pause_dauer
+    if entry.status == "Pause Ende" and pause_dauer is not None:
+        pause_text = f" ({format_pause_dauer(pause_dauer)})"
+    status_text = f"{entry.status}{pause_text}"
+    if hinweise:
+        status_text += f" [{', '.join(hinweise)}]"
+    return (
+        f"{entry.vorname:<15}",  # Linksbündig, 15 Zeichen
+        f"{entry.nachname:<15}",  # Linksbündig, 15 Zeichen
+        f"{entry.date:^10}",      # Zentriert, 10 Zeichen
+        f"{entry.time[:5]:^8}",   # Zentriert, 8 Zeichen (nur HH:MM)
+        f"{status_text:<35}"      # Linksbündig, 35 Zeichen für Status und Pausenzeit
+    )
+
+def get_formatted_history(vorname: str = None, nachname: str = None, db_handler: DatabaseHandler = None) -> List[tuple]:
     """Holt und formatiert die Historie der Stempelzeiten."""
     try:
-        db = DatabaseHandler()
+        db = db_handler or DatabaseHandler()
         entries = db.get_entries(vorname, nachname)
+        # Auffälligkeiten gibt es nur innerhalb der Historie eines Mitarbeiters
+        if vorname and nachname:
+            annotationen = annotate_entries(entries)
+        else:
+            annotationen = [((), None)] * len(entries)
         
         formatted_entries = []
-        pause_times = {}  # Dictionary für Pausenzeiten pro Tag
-        
-        for entry in entries:
+        for entry, (hinweise, pause_dauer) in zip(entries, annotationen):
             try:
-                # Berechne Pausenzeit
-                pause_text = ""
-                current_date = entry.date
-                
-                if entry.status == "Pause Ende":
-                    if current_date in pause_times and pause_times[current_date]:
-                        pause_start = datetime.strptime(pause_times[current_date], "%H:%M:%S")
-                        pause_end = datetime.strptime(entry.time, "%H:%M:%S")
-                        pause_duration = pause_end - pause_start
-                        total_minutes = pause_duration.total_seconds() / 60
-                        hours = int(total_minutes // 60)
-                        minutes = int(total_minutes % 60)
-                        
-                        if hours > 0:
-                            pause_text = f" ({hours}h {minutes}min)"
-                        else:
-                            pause_text = f" ({minutes}min)"
-                        pause_times[current_date] = None  # Reset pause start time for this day
-                
-                elif entry.status == "Pause Start":
-                    pause_times[current_date] = entry.time
-                
-                # Formatiere die Daten für die Tabelle
-                status_text = f"{entry.status}{pause_text}"
-                formatted_entry = (
-                    f"{entry.vorname:<15}",  # Linksbündig, 15 Zeichen
-                    f"{entry.nachname:<15}",  # Linksbündig, 15 Zeichen
-                    f"{entry.date:^10}",      # Zentriert, 10 Zeichen
-                    f"{entry.time[:5]:^8}",   # Zentriert, 8 Zeichen (nur HH:MM)
-                    f"{status_text:<35}"      # Linksbündig, 35 Zeichen für Status und Pausenzeit
-                )
-                formatted_entries.append(formatted_entry)
+                formatted_entries.append(format_history_entry(entry, hinweise, pause_dauer))
             except Exception as e:
                 print(f"Fehler beim Formatieren eines Eintrags: {e}")
                 continue
@@ -56,10 +58,10 @@ def get_formatted_history(vorname: str = None, nachname: str = None) -> List[tup
         print(f"Fehler beim Laden der Historie: {e}")
         return []
 
-def get_last_user(vorname: str = None, nachname: str = None):
+def get_last_user(vorname: str = None, nachname: str = None, db_handler: DatabaseHandler = None):
     """Holt den letzten Benutzer aus der Datenbank"""
     try:
-        db = DatabaseHandler()
+        db = db_handler or DatabaseHandler()
         last_entry = db.get_last_entry(vorname, nachname)
         if last_entry:
             return {
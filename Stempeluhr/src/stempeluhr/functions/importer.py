@@ -0,0 +1,171 @@
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Union
+from ..databaselogic.db_handler import DatabaseHandler
+from ..models.time_entry import STATUS_CODES, STATUS_UNBEKANNT, TimeEntry, from_timestamp, status_to_code
+
+# Einträge pro Transaktion beim Import
+DEFAULT_IMPORT_BATCH_SIZE = 10000
+# Nur die ersten fehlerhaften Datensätze werden einzeln ausgegeben
+MAX_REPORTED_ERRORS = 10
+# Liest auch UTF-8 mit BOM, wie es Tabellenkalkulationen beim CSV-Export schreiben
+DEFAULT_ENCODING = 'utf-8-sig'
+
+# Felder des stempel-Schemas und die Spalten, unter denen sie standardmäßig erwartet werden.
+# Der Zeitpunkt kommt entweder aus date + time, aus datetime (ISO 8601) oder aus ts (Sekunden seit Epoch).
+DEFAULT_MAPPING = {
+    'vorname': 'vorname',
+    'nachname': 'nachname',
+    'date': 'date',
+    'time': 'time',
+    'datetime': 'datetime',
+    'ts': 'ts',
+    'status': 'status',
+    'pause_dauer': 'pause_dauer',
+}
+
+
+class ImportResult(NamedTuple):
+    """Zahlen eines Imports"""
+    read: int
+    saved: int
+    duplicates: int
+    rejected: int
+    invalid: int
+    seconds: float
+
+    @property
+    def per_second(self) -> float:
+        return self.read / self.seconds if self.seconds else 0.0
+
+
+def detect_format(path: str) -> str:
+    """csv oder jsonl anhand der Dateiendung"""
+    ext = os.path.splitext(path)[1].lower()
+    return 'jsonl' if ext in ('.jsonl', '.ndjson', '.json') else 'csv'
+
+
+def read_records(path: str, fmt: Optional[str] = None, delimiter: Optional[str] = None,
+                 encoding: str = DEFAULT_ENCODING) -> Iterator[Union[Dict, str]]:
+    """Liest die Datensätze zeilenweise, ohne die Datei komplett zu laden.
+
+    JSON-Lines-Zeilen kommen noch undekodiert zurück; record_to_entry
+    dekodiert sie, damit eine kaputte Zeile nur diesen Datensatz kostet.
+    """
+    fmt = fmt or detect_format(path)
+    with open(path, encoding=encoding, newline='') as f:
+        if fmt == 'jsonl':
+            for line in f:
+                if line.strip():
+                    yield line
+            return
+        if delimiter is None:
+            # Trennzeichen aus der Kopfzeile erraten (Exporte nutzen oft ";")
+            kopf = f.readline()
+            f.seek(0)
+            delimiter = ';' if kopf.count(';') > kopf.count(',') else ','
+        yield from csv.DictReader(f, delimiter=delimiter)
+
+
+def record_to_entry(record: Union[Dict, str], mapping: Dict[str, str], status_map: Dict[str, str]) -> TimeEntry:
+    """Bildet einen Datensatz (Dict oder JSON-Zeile) auf einen TimeEntry ab.
+
+    Wirft ValueError bei fehlenden oder ungültigen Werten.
+    """
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError("Kein JSON-Objekt")
+
+    def feld(name):
+        wert = record.get(mapping.get(name, name))
+        if isinstance(wert, str):
+            wert = wert.strip()
+        return wert if wert not in ('', None) else None
+
+    vorname, nachname = feld('vorname'), feld('nachname')
+    if not vorname or not nachname:
+        raise ValueError("Vor- oder Nachname fehlt")
+
+    if feld('date') and feld('time'):
+        date, time_str = str(feld('date')), str(feld('time'))
+        if len(time_str) == 5:
+            time_str += ':00'
+        datetime.strptime(f"{date} {time_str}", "%Y-%m-%d %H:%M:%S")
+    elif feld('datetime'):
+        zeitpunkt = datetime.fromisoformat(str(feld('datetime')))
+        if zeitpunkt.tzinfo is not None:
+            # In lokale Zeit umrechnen, wie sie die Stempeluhr speichert
+            zeitpunkt = zeitpunkt.astimezone().replace(tzinfo=None)
+        date, time_str = zeitpunkt.strftime("%Y-%m-%d"), zeitpunkt.strftime("%H:%M:%S")
+    elif feld('ts') is not None:
+        date, time_str = from_timestamp(int(float(feld('ts'))))
+    else:
+        raise ValueError("Zeitpunkt fehlt")
+
+    rohstatus = str(feld('status') or '')
+    status = status_map.get(rohstatus, rohstatus)
+    if status_to_code(status) == STATUS_UNBEKANNT:
+        raise ValueError(f"Unbekannter Status '{rohstatus}'")
+    if status not in STATUS_CODES:
+        # z.B. "Pause Ende (5 Min.)" aus älteren Versionen
+        status = 'Pause Ende'
+
+    pause = feld('pause_dauer')
+    return TimeEntry(str(vorname), str(nachname), date, time_str, status,
+                     int(float(pause)) if pause is not None else None)
+
+
+def import_records(db_handler: DatabaseHandler, records: Iterable[Union[Dict, str]],
+                   mapping: Optional[Dict[str, str]] = None, status_map: Optional[Dict[str, str]] = None,
+                   batch_size: int = DEFAULT_IMPORT_BATCH_SIZE,
+                   validate: bool = False, skip_duplicates: bool = True,
+                   progress: Optional[Callable[[ImportResult], None]] = None) -> ImportResult:
+    """Importiert Datensätze in großen Transaktionen; es liegt immer nur ein Batch im Speicher.
+
+    progress wird nach jedem Batch mit dem Zwischenstand aufgerufen.
+    """
+    mapping = {**DEFAULT_MAPPING, **(mapping or {})}
+    status_map = status_map or {}
+    gelesen = gespeichert = doppelt = abgelehnt = ungueltig = 0
+    t0 = time.perf_counter()
+
+    def entries():
+        nonlocal gelesen, ungueltig
+        for nummer, record in enumerate(records, start=1):
+            gelesen += 1
+            try:
+                yield record_to_entry(record, mapping, status_map)
+            except (TypeError, ValueError) as e:
+                ungueltig += 1
+                if ungueltig <= MAX_REPORTED_ERRORS:
+                    print(f"Datensatz {nummer} übersprungen: {e}")
+
+    def stand() -> ImportResult:
+        return ImportResult(gelesen, gespeichert, doppelt, abgelehnt, ungueltig, time.perf_counter() - t0)
+
+    iterator = entries()
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            break
+        result = db_handler.save_entries(batch, batch_size=len(batch), validate=validate,
+                                         skip_duplicates=skip_duplicates)
+        for entry, grund in result.rejected[:max(0, MAX_REPORTED_ERRORS - abgelehnt)]:
+            print(f"Abgelehnt: {entry.vorname} {entry.nachname} {entry.date} {entry.time} {entry.status}: {grund}")
+        gespeichert += result.saved
+        doppelt += result.duplicates
+        abgelehnt += len(result.rejected)
+        if progress:
+            progress(stand())
+    return stand()
+
+
+def import_file(db_handler: DatabaseHandler, path: str, fmt: Optional[str] = None, delimiter: Optional[str] = None,
+                encoding: str = DEFAULT_ENCODING, **kwargs) -> ImportResult:
+    """Importiert eine CSV- oder JSON-Lines-Datei (weitere Argumente wie import_records)"""
+    return import_records(db_handler, read_records(path, fmt, delimiter, encoding), **kwargs)
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from ..models.employee import normalize_name
+from ..models.time_entry import month_bounds
+
+# Obergrenze für den Cache im Exportordner (Bytes)
+DEFAULT_CACHE_MAX_BYTES = 50 * 1024 * 1024
+CACHE_DIRNAME = ".cache"
+
+
+def _month_key(vorname: str, nachname: str, jahr: int, monat: int) -> str:
+    """Kurzer Schlüssel eines Mitarbeiter-Monats, Präfix der Cache-Dateien.
+
+    Die Namen werden wie im DatabaseHandler vereinheitlicht, damit der
+    Write-Listener dieselben Dateien findet wie der Export.
+    """
+    vorname, nachname = normalize_name(vorname), normalize_name(nachname)
+    return hashlib.sha256(f"{vorname}\0{nachname}\0{jahr}\0{monat}".encode()).hexdigest()[:16]
+
+
+class PdfCache:
+    """Inhaltsadressierter Cache für Monatsübersichten im Exportordner.
+
+    Eine Datei heißt <Monatsschlüssel>-<Digest>.pdf. Der Digest wird aus den
+    Einträgen des Monats, den Wochensummen und der Vorlagenversion gebildet;
+    ändert sich nichts, wird die vorhandene PDF nur kopiert. Schreibt der
+    DatabaseHandler einen Eintrag, werden die PDFs dieses Monats gelöscht.
+    Übersteigt der Cache max_bytes, fliegen die am längsten unbenutzten Dateien.
+    """
+
+    def __init__(self, export_dir: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = os.path.join(export_dir, CACHE_DIRNAME)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def attach(self, db_handler):
+        """Löscht künftig bei jedem Schreibzugriff die betroffenen Monate"""
+        db_handler.add_write_listener(self.on_entry_saved)
+
+    def on_entry_saved(self, vorname: str, nachname: str, ts: int):
+        """Write-Listener: invalidiert den Monat des Eintrags"""
+        tag = datetime.fromtimestamp(ts)
+        self.invalidate(vorname, nachname, tag.year, tag.month)
+        # Ein "Aus" am Monatsersten kann eine Schicht aus dem Vormonat beenden
+        vortag = tag - timedelta(days=1)
+        if vortag.month != tag.month:
+            self.invalidate(vorname, nachname, vortag.year, vortag.month)
+
+    def invalidate(self, vorname: str, nachname: str, jahr: int, monat: int) -> int:
+        """Löscht alle zwischengespeicherten PDFs eines Mitarbeiter-Monats"""
+        prefix = _month_key(vorname, nachname, jahr, monat) + "-"
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    @staticmethod
+    def digest(db_handler, vorname: str, nachname: str, jahr: int, monat: int, template_version: int) -> str:
+        """Digest über alles, was in die Monatsübersicht einfließt"""
+        start, end = month_bounds(jahr, monat)
+        spalten = db_handler.get_entry_columns(vorname, nachname, start, end)
+        h = hashlib.sha256(f"{template_version}\0{vorname}\0{nachname}\0{jahr}\0{monat}\0".encode())
+        for column in (spalten.ts, spalten.status_codes, spalten.pause_sekunden):
+            h.update(column.tobytes())
+        # Die Überstunden hängen auch an Schichten, die über die Monatsgrenze laufen
+        h.update(repr(db_handler.berechne_monatsuebersicht(vorname, nachname, jahr, monat)).encode())
+        return h.hexdigest()
+
+    def path_for(self, vorname: str, nachname: str, jahr: int, monat: int, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{_month_key(vorname, nachname, jahr, monat)}-{digest}.pdf")
+
+    def lookup(self, cache_path: str, output_path: str) -> bool:
+        """Kopiert eine vorhandene PDF an output_path; False, wenn sie nicht im Cache ist"""
+        try:
+            shutil.copyfile(cache_path, output_path)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        # Zugriffszeit für die Verdrängung merken
+        os.utime(cache_path)
+        self.hits += 1
+        return True
+
+    def store(self, cache_path: str, output_path: str):
+        """Übernimmt eine neu erstellte PDF in den Cache und hält die Größengrenze ein"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(output_path, tmp_path)
+            # Atomar, damit parallele Berichtsprozesse keine halben Dateien sehen
+            os.replace(tmp_path, cache_path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self) -> int:
+        """Löscht die am längsten unbenutzten PDFs, bis der Cache unter max_bytes liegt"""
+        dateien: Dict[str, Tuple[float, int]] = {}
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pdf"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            dateien[name] = (stat.st_mtime, stat.st_size)
+
+        gesamt = sum(size for _, size in dateien.values())
+        removed = 0
+        for name, (_, size) in sorted(dateien.items(), key=lambda item: item[1][0]):
+            if gesamt <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                removed += 1
+            except FileNotFoundError:
+                pass
+            gesamt -= size
+        return removed
+
+
+# Ein Cache pro Exportordner und Prozess
+_caches: Dict[str, PdfCache] = {}
+
+
+def get_pdf_cache(export_dir: str, max_bytes: Optional[int] = None) -> PdfCache:
+    """Liefert den Cache eines Exportordners"""
+    key = os.path.abspath(export_dir)
+    cache = _caches.get(key)
+    if cache is None:
+        cache = _caches[key] = PdfCache(export_dir, max_bytes or DEFAULT_CACHE_MAX_BYTES)
+    elif max_bytes is not None:
+        cache.max_bytes = max_bytes
+    return cache
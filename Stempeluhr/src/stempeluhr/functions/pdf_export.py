@@ -3,9 +3,15 @@ from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
-from datetime import datetime, timedelta
+from datetime import datetime
 import calendar
 import os
+from ..models.sessions import UEBER_MITTERNACHT
+from ..models.time_entry import month_bounds
+from .pdf_cache import get_pdf_cache
+
+# Bei Änderungen am Layout erhöhen, damit zwischengespeicherte PDFs neu erstellt werden
+PDF_TEMPLATE_VERSION = 2
 
 def get_weekday_name_de(date_str):
     """Konvertiert ein Datum in den deutschen Wochentag (Mo, Di, etc.)"""
@@ -16,58 +22,81 @@ def get_weekday_name_de(date_str):
     }
     return weekdays[date_obj.weekday()]
 
-def format_time(time_str):
-    """Formatiert die Zeit von HH:MM:SS zu HH:MM"""
-    if time_str:
-        return time_str[:5]
-    return ""
+def format_ts(ts: int, tag) -> str:
+    """Uhrzeit HH:MM eines Zeitstempels, mit (+1) wenn er nach dem Tag der Sitzung liegt"""
+    zeitpunkt = datetime.fromtimestamp(ts)
+    text = zeitpunkt.strftime("%H:%M")
+    tage = (zeitpunkt.date() - tag).days
+    return f"{text} (+{tage})" if tage > 0 else text
+
+def default_export_dir() -> str:
+    """Standardordner für PDF-Exporte"""
+    return os.path.join(os.path.expanduser("~"), "Dokumente", "Stempel", "exports")
+
+def export_filename(vorname: str, nachname: str, jahr: int, monat: int) -> str:
+    """Dateiname der Monatsübersicht eines Mitarbeiters"""
+    return f"Arbeitszeiterfassung_{vorname}_{nachname}_{jahr}_{monat:02d}.pdf"
+
+def export_monthly_pdf(db_handler, vorname: str, nachname: str, jahr: int, monat: int, output_dir: str = None,
+                       use_cache: bool = True) -> str:
+    """Erstellt die Monatsübersicht im Exportordner und liefert den Pfad.
+
+    Unveränderte Monate werden aus dem PDF-Cache des Exportordners kopiert.
+    """
+    output_dir = output_dir or default_export_dir()
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, export_filename(vorname, nachname, jahr, monat))
+    if not use_cache:
+        return create_monthly_pdf(db_handler, vorname, nachname, jahr, monat, output_path)
+
+    cache = get_pdf_cache(output_dir)
+    cache.attach(db_handler)
+    digest = cache.digest(db_handler, vorname, nachname, jahr, monat, PDF_TEMPLATE_VERSION)
+    cache_path = cache.path_for(vorname, nachname, jahr, monat, digest)
+    if cache.lookup(cache_path, output_path):
+        return output_path
+    create_monthly_pdf(db_handler, vorname, nachname, jahr, monat, output_path)
+    cache.store(cache_path, output_path)
+    return output_path
 
 def create_monthly_pdf(db_handler, vorname: str, nachname: str, jahr: int, monat: int, output_path: str):
     """Erstellt eine PDF-Datei mit der Monatsübersicht"""
-    # Hole alle Einträge für den Monat
-    entries = db_handler.get_entries(vorname, nachname)
-    
-    # Filtere Einträge für den gewählten Monat
+    # Sitzungen des Monats aus der Sitzungs-Engine; jeder Stempel wird nur einmal gelesen
+    start, end = month_bounds(jahr, monat)
     month_entries = {}
-    for entry in entries:
-        entry_date = datetime.strptime(entry.date, "%Y-%m-%d")
-        if entry_date.year == jahr and entry_date.month == monat:
-            if entry.date not in month_entries:
-                month_entries[entry.date] = {
-                    'date': entry.date,
-                    'anwesenheit': 'Betrieb',
-                    'tag': get_weekday_name_de(entry.date),
-                    'beginn': None,
-                    'ende': None,
-                    'pausen': [],
-                    'stunden': '00:00'
-                }
-            
-            if entry.status == "Ein":
-                month_entries[entry.date]['beginn'] = format_time(entry.time)
-            elif entry.status == "Aus":
-                month_entries[entry.date]['ende'] = format_time(entry.time)
-            elif entry.status == "Pause Start":
-                month_entries[entry.date]['pausen'].append({'start': format_time(entry.time)})
-            elif entry.status == "Pause Ende" and month_entries[entry.date]['pausen']:
-                month_entries[entry.date]['pausen'][-1]['ende'] = format_time(entry.time)
+    hinweise = []
+    for session in db_handler.get_sessions(vorname, nachname, start, end):
+        date_str = session.datum.isoformat()
+        if date_str not in month_entries:
+            month_entries[date_str] = {
+                'date': date_str,
+                'anwesenheit': 'Betrieb',
+                'tag': get_weekday_name_de(date_str),
+                'beginn': None,
+                'ende': None,
+                'pausen': [],
+                'sekunden': 0
+            }
+        tag = month_entries[date_str]
 
-    # Berechne die Arbeitszeit für jeden Tag
+        # Erster Arbeitsbeginn und letztes Arbeitsende des Tages
+        if session.start is not None and not tag['beginn']:
+            tag['beginn'] = format_ts(session.start, session.datum)
+        if session.ende is not None:
+            tag['ende'] = format_ts(session.ende, session.datum)
+        for pause in session.pausen:
+            if pause.start is not None and pause.ende is not None:
+                tag['pausen'].append(f"{format_ts(pause.start, session.datum)}-{format_ts(pause.ende, session.datum)}")
+        if session.start is not None and session.ende is not None:
+            tag['sekunden'] += session.netto_sekunden
+        for anomalie in session.anomalien:
+            if anomalie != UEBER_MITTERNACHT:
+                hinweise.append(f"{session.datum.day}.{monat}.{jahr}: {anomalie}")
+
+    # Arbeitszeit (ohne Pausen) für jeden Tag
     for date_entry in month_entries.values():
-        if date_entry['beginn'] and date_entry['ende']:
-            beginn = datetime.strptime(date_entry['beginn'], "%H:%M")
-            ende = datetime.strptime(date_entry['ende'], "%H:%M")
-            total_pause = timedelta()
-            
-            for pause in date_entry['pausen']:
-                if 'start' in pause and 'ende' in pause:
-                    pause_start = datetime.strptime(pause['start'], "%H:%M")
-                    pause_ende = datetime.strptime(pause['ende'], "%H:%M")
-                    total_pause += pause_ende - pause_start
-            
-            arbeitszeit = ende - beginn - total_pause
-            stunden = arbeitszeit.total_seconds() / 3600
-            date_entry['stunden'] = f"{int(stunden):02d}:{int((stunden % 1) * 60):02d}"
+        stunden, minuten = divmod(max(0, date_entry['sekunden']) // 60, 60)
+        date_entry['stunden'] = f"{stunden:02d}:{minuten:02d}"
 
     # Erstelle PDF
     doc = SimpleDocTemplate(
@@ -120,10 +149,7 @@ def create_monthly_pdf(db_handler, vorname: str, nachname: str, jahr: int, monat
         })
         
         # Formatiere Pausen
-        pausen_str = ""
-        for pause in entry['pausen']:
-            if 'start' in pause and 'ende' in pause:
-                pausen_str += f"{pause['start']}-{pause['ende']}\n"
+        pausen_str = "\n".join(entry['pausen'])
         
         table_data.append([
             f"{day}.{monat}.{jahr}",
@@ -167,6 +193,11 @@ def create_monthly_pdf(db_handler, vorname: str, nachname: str, jahr: int, monat
         styles['Normal']
     )
     elements.append(ueberstunden_text)
+
+    # Unvollständige Stempelungen, damit sie nachgetragen werden können
+    if hinweise:
+        elements.append(Spacer(1, 12))
+        elements.append(Paragraph("Hinweise: " + "; ".join(hinweise), styles['Normal']))
     
     # Generiere PDF
     doc.build(elements)
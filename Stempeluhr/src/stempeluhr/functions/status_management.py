@@ -1,72 +1,49 @@
-from datetime import datetime
-from ..models.time_entry import TimeEntry
 from ..databaselogic.db_handler import DatabaseHandler
+from ..models.stamp_state import StampState
 
 def get_application_state(db_handler: DatabaseHandler, vorname: str = None, nachname: str = None) -> dict:
     """Holt den aktuellen Status der Anwendung."""
     try:
         if not vorname or not nachname:
-            return {
-                'is_clocked_in': False,
-                'is_in_pause': False,
-                'pause_start_time': None,
-                'pause_button_text': 'Pause anfangen',
-                'pause_button_enabled': False
-            }
+            return StampState().to_dict()
             
-        # Hole den letzten Eintrag
-        last_entry = db_handler.get_last_entry(vorname, nachname)
-        
-        if not last_entry:
-            return {
-                'is_clocked_in': False,
-                'is_in_pause': False,
-                'pause_start_time': None,
-                'pause_button_text': 'Pause anfangen',
-                'pause_button_enabled': False
-            }
-        
-        # Bestimme den Status basierend auf dem letzten Eintrag
-        if last_entry.status == 'Ein':
-            return {
-                'is_clocked_in': True,
-                'is_in_pause': False,
-                'pause_start_time': None,
-                'pause_button_text': 'Pause anfangen',
-                'pause_button_enabled': True
-            }
-        elif last_entry.status == 'Pause Start':
-            return {
-                'is_clocked_in': True,
-                'is_in_pause': True,
-                'pause_start_time': datetime.strptime(f"{last_entry.date} {last_entry.time}", "%Y-%m-%d %H:%M:%S"),
-                'pause_button_text': 'Pause beenden',
-                'pause_button_enabled': True
-            }
-        elif last_entry.status == 'Pause Ende':
-            return {
-                'is_clocked_in': True,
-                'is_in_pause': False,
-                'pause_start_time': None,
-                'pause_button_text': 'Pause anfangen',
-                'pause_button_enabled': True
-            }
-        elif last_entry.status == 'Aus':
-            return {
-                'is_clocked_in': False,
-                'is_in_pause': False,
-                'pause_start_time': None,
-                'pause_button_text': 'Pause anfangen',
-                'pause_button_enabled': False
-            }
-        else:
-            return {
-                'is_clocked_in': False,
-                'is_in_pause': False,
-                'pause_start_time': None,
-                'pause_button_text': 'Pause anfangen',
-                'pause_button_enabled': False
-            }
+        # Zustand aus dem Cache des DatabaseHandler, nur beim ersten Zugriff eine Abfrage
+        return db_handler.get_state(vorname, nachname).to_dict()
     except Exception as e:
         print(f"Fehler beim Laden des Status: {e}")
-        return None 
\ No newline at end of file
+        return None 
+
+
+def get_initial_card_data(db_handler: DatabaseHandler, page_size: int):
+    """Startdaten der Stempelkarte: (vorname, nachname, erste Seite, Status) des letzten Benutzers.
+
+    Kommt mit einer Abfrage aus (siehe DatabaseHandler.get_initial_card);
+    None, wenn die Datenbank noch leer ist.
+    """
+    try:
+        card = db_handler.get_initial_card(page_size)
+        if card is None:
+            return None
+        vorname, nachname, entries, next_key = card
+        # Der Status steht danach bereits im Cache
+        return vorname, nachname, (entries, next_key), get_application_state(db_handler, vorname, nachname)
+    except Exception as e:
+        print(f"Fehler beim Laden der Startdaten: {e}")
+        return None
+
+
+def get_card_data(db_handler: DatabaseHandler, page_size: int, vorname: str = None, nachname: str = None):
+    """Stempelkarte eines Mitarbeiters: (vorname, nachname, erste Seite, Status) wie get_initial_card_data.
+
+    Ohne vorname und nachname die des letzten Benutzers. Alles kommt aus einem
+    Lesevorgang (siehe DatabaseHandler.get_card_snapshot); None, wenn es
+    keinen Benutzer gibt oder ein Fehler auftrat.
+    """
+    employee = None if vorname is None and nachname is None else (vorname or '', nachname or '')
+    snapshot = db_handler.get_card_snapshot(employee, page_size)
+    if snapshot is None or snapshot.employee is None:
+        return None
+    # Für einen unvollständigen Namen gibt es keinen Zustand
+    state = snapshot.state if vorname is None or (vorname and nachname) else StampState()
+    return (snapshot.employee.vorname, snapshot.employee.nachname, (snapshot.entries, snapshot.next_key),
+            state.to_dict())
@@ -0,0 +1,95 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from ..databaselogic import aggregates
+from ..databaselogic.aggregates import AUS, EIN, PAUSE_ENDE, PAUSE_START
+
+
+def _as_date(tag) -> date:
+    return tag.date() if isinstance(tag, datetime) else tag
+
+
+def load_team_columns(db_handler, personen: List[Tuple[str, str]], start: date,
+                      end: date) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Lädt die Einträge aller Personen als NumPy-Spalten (ts, status_code, personen_index).
+
+    Geladen wird mit einer Abfrage ab Beginn von start bis zum ersten "Aus" und
+    "Pause Ende" ab Ende des Zeitraums, damit Schichten über das Periodenende
+    vollständig sind. Die Spalten sind nach Person und dann chronologisch sortiert.
+    """
+    personen_index, spalten = db_handler.get_team_columns(personen, datetime.combine(start, time()),
+                                                          datetime.combine(end, time()))
+    # Die array-Spalten werden ohne Kopie übernommen
+    return (np.frombuffer(spalten.ts, dtype=np.int64), np.frombuffer(spalten.status_codes, dtype=np.int8),
+            np.frombuffer(personen_index, dtype=np.int64))
+
+
+def pair_events(ts: np.ndarray, codes: np.ndarray, personen_index: np.ndarray,
+                beginn_status: int, end_status: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Paart Beginn- und End-Ereignisse wie aggregates.compute_day_totals, aber ohne Python-Schleife.
+
+    Ein End-Ereignis gehört zum direkt vorangehenden Ereignis derselben Art
+    (Ein/Aus bzw. Pause Start/Pause Ende) derselben Person, wenn dieses ein
+    Beginn ist. Liefert (personen_index, beginn_ts, dauer) der Paare.
+    """
+    maske = (codes == beginn_status) | (codes == end_status)
+    t, c, p = ts[maske], codes[maske], personen_index[maske]
+    treffer = (c[1:] == end_status) & (c[:-1] == beginn_status) & (p[1:] == p[:-1])
+    beginn = t[:-1][treffer]
+    return p[:-1][treffer], beginn, t[1:][treffer] - beginn
+
+
+def berechne_teamuebersicht(db_handler, start, end, personen: Optional[List[Tuple[str, str]]] = None) -> List[Dict]:
+    """Arbeitszeit, Pausezeit und Überstunden aller Mitarbeiter im Zeitraum [start, end).
+
+    Wie in berechne_monatsuebersicht zählen Zeiten zum Tag ihres Beginns und
+    Überstunden sind der Teil über 40 Stunden je Kalenderwoche, wobei nur die
+    Tage der Woche im Zeitraum zählen. Liefert eine Zeile pro Mitarbeiter
+    (Stunden), sortiert nach Nachname und Vorname.
+    """
+    start, end = _as_date(start), _as_date(end)
+    if personen is None:
+        personen = db_handler.get_employees()
+    anzahl_tage = (end - start).days
+    if not personen or anzahl_tage <= 0:
+        return []
+
+    # Mitternacht jedes Tages (lokal, inkl. Sommerzeit) und Kalenderwoche jedes Tages
+    tage = [start + timedelta(days=i) for i in range(anzahl_tage + 1)]
+    mitternacht = np.array([aggregates.day_start(tag) for tag in tage], dtype=np.int64)
+    wochen_keys = {}
+    woche_des_tages = np.array([wochen_keys.setdefault(tag.isocalendar()[:2], len(wochen_keys))
+                                for tag in tage[:-1]], dtype=np.int64)
+    anzahl_wochen = len(wochen_keys)
+
+    ts, codes, personen_index = load_team_columns(db_handler, personen, start, end)
+    anzahl = len(personen)
+    # Sekunden pro (Person, Tag) für Arbeit und Pause
+    summen = []
+    for beginn_status, end_status in ((EIN, AUS), (PAUSE_START, PAUSE_ENDE)):
+        person, beginn, dauer = pair_events(ts, codes, personen_index, beginn_status, end_status)
+        im_zeitraum = (beginn >= mitternacht[0]) & (beginn < mitternacht[-1])
+        tag = np.searchsorted(mitternacht, beginn[im_zeitraum], side='right') - 1
+        summen.append(np.bincount(person[im_zeitraum] * anzahl_tage + tag, weights=dauer[im_zeitraum],
+                                  minlength=anzahl * anzahl_tage).astype(np.int64).reshape(anzahl, anzahl_tage))
+    arbeit_tag, pause_tag = summen
+
+    # Wochensummen (nur Tage im Zeitraum) und Überstunden je Woche
+    netto_woche = np.zeros((anzahl, anzahl_wochen), dtype=np.int64)
+    np.add.at(netto_woche, (slice(None), woche_des_tages), arbeit_tag - pause_tag)
+    ueberstunden = np.maximum(0, netto_woche - aggregates.SOLL_SEKUNDEN_WOCHE).sum(axis=1)
+
+    arbeit = arbeit_tag.sum(axis=1)
+    pause = pause_tag.sum(axis=1)
+    zeilen = []
+    for i, (vorname, nachname) in enumerate(personen):
+        zeilen.append({
+            "vorname": vorname,
+            "nachname": nachname,
+            "arbeitszeit": int(arbeit[i]) / 3600,
+            "pausezeit": int(pause[i]) / 3600,
+            "gesamtzeit": int(arbeit[i] - pause[i]) / 3600,
+            "ueberstunden": int(ueberstunden[i]) / 3600,
+        })
+    zeilen.sort(key=lambda z: (z["nachname"], z["vorname"]))
+    return zeilen
@@ -1,5 +1,6 @@
-from datetime import datetime, timedelta
-from ..models.time_entry import TimeEntry
+from datetime import datetime
+from ..models.sessions import Pause
+from ..models.time_entry import TimeEntry, to_timestamp
 from ..databaselogic.db_handler import DatabaseHandler
 from ..utils.alerts import show_alert
 
@@ -37,32 +38,23 @@ def start_break(vorname: str, nachname: str, window, db_handler: DatabaseHandler
 def end_break(vorname: str, nachname: str, window, db_handler: DatabaseHandler) -> bool:
     """Beendet die Pause für einen Benutzer."""
     try:
-        # Hole den letzten Eintrag
-        last_entry = db_handler.get_last_entry(vorname, nachname)
-        if not last_entry or last_entry.status != "Pause Start":
+        # Zustand aus dem Cache, keine zusätzliche Abfrage
+        state = db_handler.get_state(vorname, nachname)
+        if not state.is_in_pause:
             return False
             
-        # Berechne Pausendauer
+        # Berechne Pausendauer in Sekunden
         current_time = datetime.now()
-        pause_start = datetime.strptime(f"{last_entry.date} {last_entry.time}", "%Y-%m-%d %H:%M:%S")
-        pause_end = datetime.strptime(f"{current_time.strftime('%Y-%m-%d')} {current_time.strftime('%H:%M:%S')}", "%Y-%m-%d %H:%M:%S")
-        
-        pause_duration = pause_end - pause_start
-        total_minutes = pause_duration.total_seconds() / 60
-        hours = int(total_minutes // 60)
-        minutes = int(total_minutes % 60)
-        
-        if hours > 0:
-            pause_dauer = f"{hours}h {minutes}min"
-        else:
-            pause_dauer = f"{minutes}min"
+        date = current_time.strftime("%Y-%m-%d")
+        time = current_time.strftime("%H:%M:%S")
+        pause_dauer = Pause(state.last_ts, to_timestamp(date, time)).dauer
             
         # Erstelle neuen Eintrag
         entry = TimeEntry(
             vorname=vorname,
             nachname=nachname,
-            date=current_time.strftime("%Y-%m-%d"),
-            time=current_time.strftime("%H:%M:%S"),
+            date=date,
+            time=time,
             status="Pause Ende"
         )
         
@@ -0,0 +1,17 @@
+from typing import NamedTuple
+
+
+def normalize_name(name: str) -> str:
+    """Vereinheitlicht einen Namen: Leerraum am Rand entfernt, innen zu einem Leerzeichen zusammengefasst"""
+    return ' '.join((name or '').split())
+
+
+class Employee(NamedTuple):
+    """Ein Mitarbeiter mit seiner ID aus der Tabelle mitarbeiter.
+
+    Kann den DatabaseHandler-Methoden statt (vorname, nachname) übergeben
+    werden; dann entfällt das Nachschlagen der ID.
+    """
+    id: int
+    vorname: str
+    nachname: str
@@ -0,0 +1,79 @@
+import threading
+from bisect import bisect_left
+from typing import Iterable, List, Set, Tuple
+from .employee import normalize_name
+
+# Anzahl der Vorschläge pro Eingabe
+DEFAULT_SUGGESTIONS = 5
+
+
+def _key(name: str) -> str:
+    """Suchschlüssel: vereinheitlicht und ohne Groß-/Kleinschreibung"""
+    return normalize_name(name).casefold()
+
+
+class NameIndex:
+    """Sortierter Präfix-Index der Mitarbeiternamen für die Vervollständigung.
+
+    Die Namen liegen zweimal sortiert vor, nach (vorname, nachname) und nach
+    (nachname, vorname). Ein Präfix wird per Binärsuche gefunden, die Treffer
+    liegen dahinter zusammenhängend; pro Tastendruck ist das O(log n + k)
+    ohne Datenbankabfrage.
+    """
+
+    def __init__(self, namen: Iterable[Tuple[str, str]] = ()):
+        # Neue Namen kommen vom Datenbank-Thread, gesucht wird im GUI-Thread
+        self._lock = threading.Lock()
+        self._namen: Set[Tuple[str, str]] = set()
+        self._nach_vorname: List[Tuple[str, str, str, str]] = []
+        self._nach_nachname: List[Tuple[str, str, str, str]] = []
+        for vorname, nachname in namen:
+            self._insert(vorname, nachname, sortiert=False)
+        self._nach_vorname.sort()
+        self._nach_nachname.sort()
+
+    def __len__(self) -> int:
+        return len(self._namen)
+
+    def __contains__(self, name: Tuple[str, str]) -> bool:
+        return (normalize_name(name[0]), normalize_name(name[1])) in self._namen
+
+    def _insert(self, vorname: str, nachname: str, sortiert: bool = True) -> bool:
+        vorname, nachname = normalize_name(vorname), normalize_name(nachname)
+        if (vorname, nachname) in self._namen:
+            return False
+        self._namen.add((vorname, nachname))
+        v, n = vorname.casefold(), nachname.casefold()
+        for liste, eintrag in ((self._nach_vorname, (v, n, vorname, nachname)),
+                               (self._nach_nachname, (n, v, vorname, nachname))):
+            if sortiert:
+                liste.insert(bisect_left(liste, eintrag), eintrag)
+            else:
+                liste.append(eintrag)
+        return True
+
+    def add(self, vorname: str, nachname: str) -> bool:
+        """Nimmt einen Namen auf; False, wenn er schon bekannt war"""
+        with self._lock:
+            return self._insert(vorname, nachname)
+
+    def suggest(self, vorname: str = '', nachname: str = '', limit: int = DEFAULT_SUGGESTIONS) -> List[Tuple[str, str]]:
+        """Bekannte Namen, deren Vor- und Nachname mit der Eingabe beginnen (alphabetisch).
+
+        Ist nur der Nachname angefangen, wird im Index nach Nachnamen gesucht.
+        """
+        v, n = _key(vorname), _key(nachname)
+        if not v and not n:
+            return []
+        treffer = []
+        with self._lock:
+            liste, erstes, zweites = (self._nach_vorname, v, n) if v else (self._nach_nachname, n, '')
+            position = bisect_left(liste, (erstes,))
+            while position < len(liste) and len(treffer) < limit:
+                schluessel, rest, name_vorname, name_nachname = liste[position]
+                if not schluessel.startswith(erstes):
+                    break
+                if rest.startswith(zweites):
+                    treffer.append((name_vorname, name_nachname))
+                position += 1
+        return treffer
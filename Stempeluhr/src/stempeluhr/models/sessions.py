@@ -0,0 +1,246 @@
+from collections import defaultdict, deque
+from datetime import date, datetime
+from typing import Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from .time_entry import STATUS_CODES, TimeEntry, status_to_code, to_timestamp
+
+EIN = STATUS_CODES['Ein']
+AUS = STATUS_CODES['Aus']
+PAUSE_START = STATUS_CODES['Pause Start']
+PAUSE_ENDE = STATUS_CODES['Pause Ende']
+
+# Auffälligkeiten einer Sitzung
+AUS_FEHLT = 'Aus fehlt'
+EIN_FEHLT = 'Ein fehlt'
+PAUSE_ENDE_FEHLT = 'Pause Ende fehlt'
+PAUSE_START_FEHLT = 'Pause Start fehlt'
+PAUSE_AUSSERHALB = 'Pause außerhalb der Arbeitszeit'
+UEBER_MITTERNACHT = 'über Mitternacht'
+
+
+def local_date(ts: int) -> date:
+    """Lokales Datum eines Zeitstempels; Arbeits- und Pausenzeit zählen zum Tag ihres Beginns"""
+    return datetime.fromtimestamp(ts).date()
+
+
+class Pause(NamedTuple):
+    """Eine Pause; start oder ende fehlen bei unvollständigen Pausen"""
+    start: Optional[int]
+    ende: Optional[int]
+
+    @property
+    def dauer(self) -> int:
+        """Sekunden; unvollständige Pausen zählen nicht"""
+        if self.start is None or self.ende is None:
+            return 0
+        return max(0, self.ende - self.start)
+
+
+class Session(NamedTuple):
+    """Eine Arbeitssitzung von "Ein" bis "Aus" mit ihren Pausen.
+
+    Pausen außerhalb jeder Sitzung ergeben eine Sitzung ohne start und ende.
+    """
+    start: Optional[int]
+    ende: Optional[int]
+    pausen: Tuple[Pause, ...] = ()
+    anomalien: Tuple[str, ...] = ()
+
+    @property
+    def datum(self) -> date:
+        """Tag des Beginns (bei unvollständigen Sitzungen der erste bekannte Zeitpunkt)"""
+        if self.start is not None:
+            return local_date(self.start)
+        for pause in self.pausen:
+            return local_date(pause.start if pause.start is not None else pause.ende)
+        return local_date(self.ende)
+
+    @property
+    def dauer(self) -> int:
+        """Sekunden von "Ein" bis "Aus" (0, wenn eines fehlt)"""
+        if self.start is None or self.ende is None:
+            return 0
+        return self.ende - self.start
+
+    @property
+    def pause_sekunden(self) -> int:
+        return sum(pause.dauer for pause in self.pausen)
+
+    @property
+    def netto_sekunden(self) -> int:
+        return self.dauer - self.pause_sekunden
+
+    @property
+    def ist_offen(self) -> bool:
+        """True, wenn die Sitzung am Ende der Daten noch läuft"""
+        return self.start is not None and self.ende is None and AUS_FEHLT not in self.anomalien
+
+
+class _Entwurf:
+    """Sitzung im Aufbau"""
+    __slots__ = ('start', 'ende', 'pausen', 'anomalien', 'geschlossen')
+
+    def __init__(self, start: Optional[int], ende: Optional[int] = None, anomalie: Optional[str] = None,
+                 geschlossen: bool = False):
+        self.start = start
+        self.ende = ende
+        self.pausen: List[Pause] = []
+        self.anomalien: List[str] = [anomalie] if anomalie else []
+        self.geschlossen = geschlossen
+
+    def session(self) -> Session:
+        return Session(self.start, self.ende, tuple(self.pausen), tuple(self.anomalien))
+
+
+class SessionBuilder:
+    """Setzt chronologisch sortierte Stempel in einem Durchlauf zu Sitzungen zusammen.
+
+    Gepaart wird wie bei den Tagessummen: ein "Aus" beendet die Sitzung des
+    letzten "Ein", eine Pause reicht vom letzten "Pause Start" bis zum nächsten
+    "Pause Ende", unabhängig von Ein und Aus. Eine Pause gehört zur Sitzung, in
+    der sie beginnt. Fertige Sitzungen werden in der Reihenfolge ihres Beginns
+    ausgegeben; nur solange eine Pause offen ist, wartet ihre Sitzung.
+
+    Mit anfang_bekannt=False (z.B. wenn die Daten mitten in der Historie
+    beginnen) werden Auffälligkeiten, die vom Eintrag davor abhängen, erst nach
+    dem ersten passenden Stempel gemeldet.
+    """
+
+    def __init__(self, anfang_bekannt: bool = True):
+        self._sitzung: Optional[_Entwurf] = None
+        self._pause_start: Optional[int] = None
+        self._pause_owner: Optional[_Entwurf] = None
+        self._warteschlange: Deque[_Entwurf] = deque()
+        self._arbeit_bekannt = anfang_bekannt
+        self._pause_bekannt = anfang_bekannt
+        # Zuletzt abgeschlossene Pause (für die Pausendauer eines "Pause Ende")
+        self.letzte_pause: Optional[Pause] = None
+
+    def _neu(self, start: Optional[int], ende: Optional[int] = None, anomalie: Optional[str] = None,
+             geschlossen: bool = False) -> _Entwurf:
+        entwurf = _Entwurf(start, ende, anomalie, geschlossen)
+        self._warteschlange.append(entwurf)
+        return entwurf
+
+    def add(self, ts: int, status_code: int) -> Tuple[str, ...]:
+        """Verarbeitet einen Stempel; liefert die Auffälligkeiten, die er aufdeckt"""
+        hinweise = []
+        if status_code == EIN:
+            if self._sitzung is not None:
+                self._sitzung.anomalien.append(AUS_FEHLT)
+                self._sitzung.geschlossen = True
+                hinweise.append(AUS_FEHLT)
+            self._sitzung = self._neu(ts)
+            self._arbeit_bekannt = True
+        elif status_code == AUS:
+            sitzung = self._sitzung
+            if sitzung is not None:
+                sitzung.ende = ts
+                sitzung.geschlossen = True
+                if local_date(ts) != local_date(sitzung.start):
+                    sitzung.anomalien.append(UEBER_MITTERNACHT)
+                self._sitzung = None
+            else:
+                anomalie = EIN_FEHLT if self._arbeit_bekannt else None
+                self._neu(None, ts, anomalie, geschlossen=True)
+                if anomalie:
+                    hinweise.append(anomalie)
+            self._arbeit_bekannt = True
+        elif status_code == PAUSE_START:
+            if self._pause_start is not None:
+                # Die vorige Pause wurde nie beendet
+                self._pause_owner.pausen.append(Pause(self._pause_start, None))
+                self._pause_owner.anomalien.append(PAUSE_ENDE_FEHLT)
+                hinweise.append(PAUSE_ENDE_FEHLT)
+            owner = self._sitzung
+            if owner is None:
+                anomalie = PAUSE_AUSSERHALB if self._arbeit_bekannt else None
+                owner = self._neu(None, anomalie=anomalie, geschlossen=True)
+                if anomalie:
+                    hinweise.append(anomalie)
+            self._pause_start = ts
+            self._pause_owner = owner
+            self._pause_bekannt = True
+        elif status_code == PAUSE_ENDE:
+            if self._pause_start is not None:
+                self.letzte_pause = Pause(self._pause_start, ts)
+                self._pause_owner.pausen.append(self.letzte_pause)
+            else:
+                self.letzte_pause = Pause(None, ts)
+                owner = self._sitzung or self._neu(None, geschlossen=True)
+                owner.pausen.append(self.letzte_pause)
+                if self._pause_bekannt:
+                    owner.anomalien.append(PAUSE_START_FEHLT)
+                    hinweise.append(PAUSE_START_FEHLT)
+            self._pause_start = None
+            self._pause_owner = None
+            self._pause_bekannt = True
+        return tuple(hinweise)
+
+    def pop_sessions(self) -> List[Session]:
+        """Gibt die fertigen Sitzungen ab und vergisst sie"""
+        fertig = []
+        while self._warteschlange:
+            entwurf = self._warteschlange[0]
+            if not entwurf.geschlossen or entwurf is self._pause_owner:
+                break
+            self._warteschlange.popleft()
+            fertig.append(entwurf.session())
+        return fertig
+
+    def finish(self) -> List[Session]:
+        """Schließt alles Offene ab (laufende Sitzung bzw. Pause ohne Ende) und gibt den Rest aus"""
+        if self._pause_start is not None:
+            self._pause_owner.pausen.append(Pause(self._pause_start, None))
+            self._pause_start = None
+            self._pause_owner = None
+        if self._sitzung is not None:
+            self._sitzung.geschlossen = True
+            self._sitzung = None
+        return self.pop_sessions()
+
+
+def iter_sessions(events: Iterable[Tuple[int, int]], anfang_bekannt: bool = True) -> Iterator[Session]:
+    """Sitzungen aus chronologisch sortierten (ts, status_code) Stempeln, in O(n)"""
+    builder = SessionBuilder(anfang_bekannt)
+    for ts, status_code in events:
+        builder.add(ts, status_code)
+        yield from builder.pop_sessions()
+    yield from builder.finish()
+
+
+def day_totals(sessions: Iterable[Session]) -> Dict[date, list]:
+    """Arbeits- und Pausenzeit pro Tag als {datum: [arbeit, pause]} in Sekunden.
+
+    Die Arbeitszeit (brutto) zählt zum Tag des "Ein", jede Pause zum Tag ihres Beginns.
+    """
+    totals = defaultdict(lambda: [0, 0])
+    for session in sessions:
+        if session.start is not None and session.ende is not None:
+            totals[local_date(session.start)][0] += session.ende - session.start
+        for pause in session.pausen:
+            if pause.start is not None and pause.ende is not None:
+                totals[local_date(pause.start)][1] += pause.ende - pause.start
+    return totals
+
+
+def annotate_entries(entries: Sequence[TimeEntry],
+                     anfang_bekannt: bool = True) -> List[Tuple[Tuple[str, ...], Optional[int]]]:
+    """Auffälligkeiten und Pausendauer zu jedem Eintrag einer Historie (neueste zuerst).
+
+    Liefert in derselben Reihenfolge (hinweise, pause_dauer); die Pausendauer
+    ist die gespeicherte oder, falls sie fehlt, die aus dem "Pause Start" davor.
+    """
+    builder = SessionBuilder(anfang_bekannt)
+    ergebnis = []
+    for entry in reversed(entries):
+        ts = entry.ts if entry.ts is not None else to_timestamp(entry.date, entry.time)
+        status_code = status_to_code(entry.status)
+        hinweise = builder.add(ts, status_code)
+        pause_dauer = entry.pause_dauer
+        if status_code == PAUSE_ENDE and pause_dauer is None and builder.letzte_pause.start is not None:
+            pause_dauer = builder.letzte_pause.dauer
+        ergebnis.append((hinweise, pause_dauer))
+        # Nur die Hinweise werden gebraucht, fertige Sitzungen nicht aufheben
+        builder.pop_sessions()
+    ergebnis.reverse()
+    return ergebnis
@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import Optional
+from .time_entry import TimeEntry, to_timestamp
+
+
+# Erlaubte Folgestatus wie in der Oberfläche (None: noch kein Eintrag)
+ALLOWED_TRANSITIONS = {
+    None: {'Ein'},
+    'Aus': {'Ein'},
+    'Ein': {'Pause Start', 'Aus'},
+    'Pause Start': {'Pause Ende'},
+    'Pause Ende': {'Pause Start', 'Aus'},
+}
+
+
+def transition_error(previous: Optional[str], status: str) -> Optional[str]:
+    """Fehlermeldung, wenn status nicht auf previous folgen darf, sonst None"""
+    if status not in ALLOWED_TRANSITIONS.get(previous, ()):
+        return f"'{status}' ist nach '{previous or 'keinem Eintrag'}' nicht erlaubt"
+    return None
+
+
+class StampState:
+    """Aktueller Zustand der Stempeluhr eines Mitarbeiters, abgeleitet aus seinem letzten Eintrag"""
+    __slots__ = ('last_entry', 'last_ts', 'is_clocked_in', 'is_in_pause', 'pause_start_time')
+
+    def __init__(self, last_entry: Optional[TimeEntry] = None):
+        self.last_entry = last_entry
+        self.last_ts = None
+        self.is_clocked_in = False
+        self.is_in_pause = False
+        self.pause_start_time = None
+        if last_entry is None:
+            return
+
+        # Aus der Datenbank geladene Einträge bringen den Zeitstempel bereits mit
+        self.last_ts = last_entry.ts if last_entry.ts is not None else to_timestamp(last_entry.date, last_entry.time)
+        if last_entry.status in ('Ein', 'Pause Ende'):
+            self.is_clocked_in = True
+        elif last_entry.status == 'Pause Start':
+            self.is_clocked_in = True
+            self.is_in_pause = True
+            self.pause_start_time = datetime.fromtimestamp(self.last_ts)
+
+    def to_dict(self) -> dict:
+        """Status im Format von get_application_state"""
+        return {
+            'is_clocked_in': self.is_clocked_in,
+            'is_in_pause': self.is_in_pause,
+            'pause_start_time': self.pause_start_time,
+            'pause_button_text': 'Pause beenden' if self.is_in_pause else 'Pause anfangen',
+            'pause_button_enabled': self.is_clocked_in
+        }
@@ -1,7 +1,104 @@
-class TimeEntry:
-    def __init__(self, vorname: str, nachname: str, date: str, time: str, status: str):
-        self.vorname = vorname
-        self.nachname = nachname
-        self.date = date
-        self.time = time
-        self.status = status 
\ No newline at end of file
+from array import array
+from datetime import datetime
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+# Kompakte Statuscodes, wie sie in der Datenbank gespeichert werden
+STATUS_CODES = {
+    'Ein': 1,
+    'Aus': 2,
+    'Pause Start': 3,
+    'Pause Ende': 4,
+}
+STATUS_UNBEKANNT = 0
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+STATUS_NAMES[STATUS_UNBEKANNT] = 'Unbekannt'
+
+
+def status_to_code(status: str) -> int:
+    """Wandelt einen Statustext in den kompakten Statuscode um"""
+    code = STATUS_CODES.get(status)
+    if code is not None:
+        return code
+    # Ältere Versionen haben die Pausendauer an den Status angehängt ("Pause Ende (5 Min.)")
+    if status and status.startswith('Pause Ende'):
+        return STATUS_CODES['Pause Ende']
+    return STATUS_UNBEKANNT
+
+
+def to_timestamp(date: str, time: str) -> int:
+    """Wandelt lokales Datum (YYYY-MM-DD) und Uhrzeit (HH:MM:SS) in Sekunden seit Epoch (UTC) um"""
+    return int(datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M:%S").timestamp())
+
+
+def from_timestamp(ts: int) -> Tuple[str, str]:
+    """Wandelt Sekunden seit Epoch (UTC) in lokales Datum und Uhrzeit um"""
+    local = datetime.fromtimestamp(ts)
+    return local.strftime("%Y-%m-%d"), local.strftime("%H:%M:%S")
+
+
+def month_bounds(jahr: int, monat: int) -> Tuple[datetime, datetime]:
+    """Liefert Beginn des Monats und Beginn des Folgemonats (lokale Zeit)"""
+    start = datetime(jahr, monat, 1)
+    if monat == 12:
+        return start, datetime(jahr + 1, 1, 1)
+    return start, datetime(jahr, monat + 1, 1)
+
+
+def quarter_bounds(jahr: int, quartal: int) -> Tuple[datetime, datetime]:
+    """Liefert Beginn des Quartals (1-4) und Beginn des Folgequartals"""
+    start, _ = month_bounds(jahr, 3 * quartal - 2)
+    _, end = month_bounds(jahr, 3 * quartal)
+    return start, end
+
+
+def year_bounds(jahr: int) -> Tuple[datetime, datetime]:
+    """Liefert Beginn des Jahres und Beginn des Folgejahres"""
+    return datetime(jahr, 1, 1), datetime(jahr + 1, 1, 1)
+
+
+class TimeEntry(NamedTuple):
+    """Ein Stempeleintrag.
+
+    Als NamedTuple ohne __dict__ belegt ein geladener Eintrag rund 310 Bytes
+    (Tupel mit 8 Feldern 120 Bytes, Datum und Uhrzeit je ca. 58 Bytes, ts und
+    id als int; Namen und Status teilen sich alle Einträge). Die frühere Klasse
+    mit __dict__ brauchte ohne ts und id rund 375 Bytes, siehe
+    benchmarks/bench_time_entry.py.
+    """
+    vorname: str
+    nachname: str
+    date: str
+    time: str
+    status: str
+    # Pausendauer in Sekunden (nur bei "Pause Ende")
+    pause_dauer: Optional[int] = None
+    # Sekunden seit Epoch (UTC) und Datenbank-id, sofern aus der Datenbank geladen
+    ts: Optional[int] = None
+    id: Optional[int] = None
+
+
+class TimeEntryColumns:
+    """Einträge als parallele Arrays für Auswertungen (ca. 26 Bytes pro Eintrag).
+
+    ts, status_codes, pause_sekunden (-1 = keine Angabe) und ids haben
+    dieselbe Länge und sind chronologisch sortiert.
+    """
+    __slots__ = ('ts', 'status_codes', 'pause_sekunden', 'ids')
+
+    def __init__(self, ts: array = None, status_codes: array = None,
+                 pause_sekunden: array = None, ids: array = None):
+        self.ts = ts if ts is not None else array('q')
+        self.status_codes = status_codes if status_codes is not None else array('b')
+        self.pause_sekunden = pause_sekunden if pause_sekunden is not None else array('l')
+        self.ids = ids if ids is not None else array('q')
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple[int, int, int, int]]) -> 'TimeEntryColumns':
+        """Erzeugt die Spalten aus (ts, status_code, pause_sekunden, id) Zeilen"""
+        if not rows:
+            return cls()
+        ts, status_codes, pause_sekunden, ids = zip(*rows)
+        return cls(array('q', ts), array('b', status_codes), array('l', pause_sekunden), array('q', ids))
+
+    def __len__(self) -> int:
+        return len(self.ts)
@@ -0,0 +1,275 @@
+import asyncio
+import json
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from .databaselogic.async_db_handler import AsyncDatabaseHandler
+from .databaselogic.db_handler import DatabaseHandler
+from .functions.time_tracking import clock_in, clock_out, end_break, start_break
+from .models.stamp_state import StampState, transition_error
+from .models.time_entry import TimeEntry
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Stempel, die der Schreiber höchstens auf einmal an den Datenbank-Thread gibt
+MAX_WRITE_BATCH = 256
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_BODY_BYTES = 64 * 1024
+# Warteschlange für eingehende Verbindungen (viele Terminals verbinden sich gleichzeitig)
+LISTEN_BACKLOG = 1024
+
+# Pfad -> (Status, Funktion aus time_tracking)
+STAMP_ACTIONS = {
+    '/clock-in': ('Ein', clock_in),
+    '/clock-out': ('Aus', clock_out),
+    '/pause-start': ('Pause Start', start_break),
+    '/pause-end': ('Pause Ende', end_break),
+}
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+Response = Tuple[int, Dict]
+
+
+class HttpError(Exception):
+    """Fehler, der als JSON-Antwort mit HTTP-Status an den Client geht"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def state_to_json(state: StampState) -> Dict:
+    """Stempelzustand als JSON-fähiges Dict"""
+    data = state.to_dict()
+    if data['pause_start_time'] is not None:
+        data['pause_start_time'] = data['pause_start_time'].isoformat()
+    data['last_entry'] = state.last_entry._asdict() if state.last_entry else None
+    return data
+
+
+def entry_to_json(entry: TimeEntry) -> Dict:
+    return entry._asdict()
+
+
+class StempelServer:
+    """Lokaler HTTP/JSON-Dienst, über den mehrere Terminals einen Prozess teilen.
+
+    Alle Stempel laufen durch eine Warteschlange zu einem einzigen Schreiber.
+    Er prüft die Statusfolge gegen den Zustands-Cache des DatabaseHandler und
+    speichert über die Funktionen aus time_tracking. Schreiben und Lesen
+    laufen auf dem einen Thread des AsyncDatabaseHandler, die Ereignisschleife
+    wartet nie auf die Datenbank.
+
+    Endpunkte:
+        POST /clock-in, /clock-out, /pause-start, /pause-end  {"vorname": ..., "nachname": ...}
+        GET  /state?vorname=&nachname=
+        GET  /history?vorname=&nachname=&limit=&before_ts=&before_id=
+    """
+
+    def __init__(self, db_handler: DatabaseHandler, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.db_handler = db_handler
+        self.async_db = AsyncDatabaseHandler(db_handler)
+        self.host = host
+        self.port = port
+        self.stamps = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> int:
+        """Startet Server und Schreiber; liefert den tatsächlichen Port (wichtig bei port=0)"""
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._write_loop())
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port,
+                                                  backlog=LISTEN_BACKLOG)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Stempeluhr-Dienst läuft auf http://{self.host}:{self.port}")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """Nimmt keine Verbindungen mehr an und beendet den Schreiber"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
+        self.async_db.close()
+
+    # Schreiber
+
+    async def stamp(self, path: str, vorname: str, nachname: str) -> Response:
+        """Reiht einen Stempel beim Schreiber ein und wartet auf das Ergebnis"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((path, vorname, nachname, future))
+        return await future
+
+    async def _write_loop(self):
+        while True:
+            jobs = [await self._queue.get()]
+            # Was inzwischen aufgelaufen ist, geht in einem Rutsch an den Datenbank-Thread
+            while len(jobs) < MAX_WRITE_BATCH and not self._queue.empty():
+                jobs.append(self._queue.get_nowait())
+            try:
+                results = await self.async_db.run(self._apply_stamps, [job[:3] for job in jobs])
+            except Exception as e:
+                print(f"Fehler beim Stempeln: {e}")
+                results = [(500, {'error': str(e)})] * len(jobs)
+            for (_, _, _, future), result in zip(jobs, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _apply_stamps(self, jobs: List[Tuple[str, str, str]]) -> List[Response]:
+        """Läuft auf dem Datenbank-Thread: prüft und speichert die Stempel der Reihe nach"""
+        results = []
+        for path, vorname, nachname in jobs:
+            status, action = STAMP_ACTIONS[path]
+            state = self.db_handler.get_state(vorname, nachname)
+            fehler = transition_error(state.last_entry.status if state.last_entry else None, status)
+            if fehler:
+                results.append((409, {'error': fehler, 'state': state_to_json(state)}))
+                continue
+            # Ohne Fenster: die Namen wurden bereits geprüft, es gibt keine Meldungen
+            if not action(vorname, nachname, None, self.db_handler):
+                results.append((500, {'error': 'Eintrag konnte nicht gespeichert werden'}))
+                continue
+            self.stamps += 1
+            results.append((200, state_to_json(self.db_handler.get_state(vorname, nachname))))
+        return results
+
+    # HTTP
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Bedient eine Verbindung; HTTP/1.1 hält sie für weitere Anfragen offen"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version, headers, body = await self._read_request(request_line, reader)
+                except HttpError as e:
+                    # Nach einer kaputten Anfrage ist die Position im Datenstrom unklar
+                    self._write_response(writer, e.status, {'error': str(e)}, False)
+                    await writer.drain()
+                    break
+                verbindung = headers.get('connection', '').lower()
+                keep_alive = verbindung == 'keep-alive' if version == 'HTTP/1.0' else verbindung != 'close'
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except HttpError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except Exception as e:
+                    print(f"Fehler im Stempeluhr-Dienst: {e}")
+                    status, payload = 500, {'error': 'Interner Fehler'}
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(request_line: bytes, reader: asyncio.StreamReader):
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise HttpError(400, 'Ungültige Anfragezeile')
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HttpError(400, 'Ungültige Content-Length')
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, 'Anfrage zu groß')
+        body = await reader.readexactly(length) if length > 0 else b''
+        return method.upper(), target, version.upper(), headers, body
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, payload: Dict, keep_alive: bool):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + data)
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Response:
+        """Beantwortet eine Anfrage; wirft HttpError bei ungültigen Anfragen"""
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = url.path.rstrip('/') or '/'
+
+        if path in STAMP_ACTIONS:
+            if method != 'POST':
+                raise HttpError(405, 'Nur POST erlaubt')
+            if body:
+                try:
+                    query.update(json.loads(body))
+                except (ValueError, TypeError):
+                    raise HttpError(400, 'Ungültiges JSON')
+            vorname, nachname = self._names(query)
+            return await self.stamp(path, vorname, nachname)
+
+        if path == '/state':
+            if method != 'GET':
+                raise HttpError(405, 'Nur GET erlaubt')
+            vorname, nachname = self._names(query)
+            return 200, state_to_json(await self.async_db.get_state(vorname, nachname))
+
+        if path == '/history':
+            if method != 'GET':
+                raise HttpError(405, 'Nur GET erlaubt')
+            vorname, nachname = self._names(query)
+            try:
+                limit = min(MAX_PAGE_SIZE, max(1, int(query.get('limit', DEFAULT_PAGE_SIZE))))
+                before = None
+                if 'before_ts' in query and 'before_id' in query:
+                    before = (int(query['before_ts']), int(query['before_id']))
+            except ValueError:
+                raise HttpError(400, 'limit, before_ts und before_id müssen Zahlen sein')
+            entries, next_key = await self.async_db.get_entries_page(vorname, nachname, limit, before)
+            return 200, {
+                'entries': [entry_to_json(entry) for entry in entries],
+                'next': {'before_ts': next_key[0], 'before_id': next_key[1]} if next_key else None,
+            }
+
+        raise HttpError(404, f"Unbekannter Pfad {url.path}")
+
+    @staticmethod
+    def _names(params: Dict) -> Tuple[str, str]:
+        vorname = str(params.get('vorname') or '').strip()
+        nachname = str(params.get('nachname') or '').strip()
+        if not vorname or not nachname:
+            raise HttpError(400, 'Bitte Vor- und Nachnamen angeben')
+        return vorname, nachname
+
+
+def serve(db_handler: DatabaseHandler, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """Startet den Dienst und blockiert bis Strg+C"""
+    try:
+        asyncio.run(StempelServer(db_handler, host, port).serve_forever())
+    except KeyboardInterrupt:
+        print("Stempeluhr-Dienst beendet")
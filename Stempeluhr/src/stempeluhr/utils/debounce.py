@@ -0,0 +1,57 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+# Wartezeit nach dem letzten Tastendruck, bevor neu geladen wird (Sekunden)
+DEFAULT_DEBOUNCE_DELAY = 0.3
+
+
+class Debouncer:
+    """Führt eine Coroutine erst aus, wenn für `delay` Sekunden kein neuer Aufruf kam.
+
+    Jeder Aufruf von trigger() bricht einen noch wartenden oder laufenden
+    Durchlauf ab. Die Coroutine bekommt eine Generationsnummer übergeben und
+    kann mit is_current() prüfen, ob ihr Ergebnis noch aktuell ist, bevor sie
+    es anwendet.
+    """
+
+    def __init__(self, callback: Callable[..., Awaitable], delay: float = DEFAULT_DEBOUNCE_DELAY):
+        self.callback = callback
+        self.delay = delay
+        self.generation = 0
+        self._task: Optional[asyncio.Task] = None
+        # Zähler für die Telemetrie
+        self.triggered = 0
+        self.started = 0
+        self.cancelled_in_flight = 0
+
+    @property
+    def saved(self) -> int:
+        """Anzahl der Aufrufe, die dank Entprellung nie ausgeführt wurden"""
+        return self.triggered - self.started
+
+    def is_current(self, generation: int) -> bool:
+        """True, wenn seit dieser Generation kein neuer Aufruf kam"""
+        return generation == self.generation
+
+    def trigger(self, *args) -> asyncio.Task:
+        """Plant einen neuen Durchlauf und verwirft den vorherigen"""
+        self.triggered += 1
+        self.generation += 1
+        self.cancel()
+        # Läuft immer in der Ereignisschleife von Toga
+        self._task = asyncio.get_running_loop().create_task(self._run(self.generation, args))
+        return self._task
+
+    def cancel(self):
+        """Bricht einen wartenden oder laufenden Durchlauf ab"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def _run(self, generation: int, args: tuple):
+        await asyncio.sleep(self.delay)
+        self.started += 1
+        try:
+            await self.callback(generation, *args)
+        except asyncio.CancelledError:
+            self.cancelled_in_flight += 1
+            raise
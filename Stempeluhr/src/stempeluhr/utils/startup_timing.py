@@ -0,0 +1,37 @@
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class StartupTimer:
+    """Misst die Dauer der einzelnen Startphasen (Millisekunden).
+
+    Jede Phase reicht vom vorherigen mark() (bzw. vom Erstellen des Timers)
+    bis zu ihrem eigenen mark().
+    """
+
+    def __init__(self, start: Optional[float] = None, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self._start = clock() if start is None else start
+        self._last = self._start
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> float:
+        """Schließt eine Phase ab und liefert ihre Dauer"""
+        now = self._clock()
+        dauer = (now - self._last) * 1000
+        self.phases.append((phase, dauer))
+        self._last = now
+        return dauer
+
+    @property
+    def total_ms(self) -> float:
+        """Zeit vom Start bis zur zuletzt abgeschlossenen Phase"""
+        return (self._last - self._start) * 1000
+
+    def breakdown(self) -> Dict[str, float]:
+        """Dauer je Phase, in der Reihenfolge des Starts"""
+        return {phase: round(dauer, 1) for phase, dauer in self.phases}
+
+    def report(self) -> str:
+        phasen = ", ".join(f"{phase} {dauer:.0f} ms" for phase, dauer in self.phases)
+        return f"Start nach {self.total_ms:.0f} ms ({phasen})"
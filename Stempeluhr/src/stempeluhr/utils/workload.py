@@ -0,0 +1,91 @@
+import random
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+from ..databaselogic import aggregates
+from ..databaselogic.employees import ensure_employee
+from ..models.time_entry import STATUS_CODES
+
+VORNAMEN = ["Tanja", "Max", "Anna", "Lukas", "Sophie", "Jonas", "Marie", "Felix", "Laura", "Paul",
+            "Lea", "Tim", "Julia", "Finn", "Sarah", "Leon", "Lena", "Noah", "Emma", "Ben"]
+NACHNAMEN = ["Kretschmann", "Muster", "Schmidt", "Müller", "Schneider", "Fischer", "Weber", "Meyer",
+             "Wagner", "Becker", "Schulz", "Hoffmann", "Koch", "Richter", "Klein", "Wolf"]
+
+EIN = STATUS_CODES['Ein']
+AUS = STATUS_CODES['Aus']
+PAUSE_START = STATUS_CODES['Pause Start']
+PAUSE_ENDE = STATUS_CODES['Pause Ende']
+
+
+def employee_names(anzahl: int) -> List[Tuple[str, str]]:
+    """Liefert anzahl eindeutige (vorname, nachname) Paare"""
+    namen = []
+    kombinationen = len(VORNAMEN) * len(NACHNAMEN)
+    for i in range(anzahl):
+        nachname = NACHNAMEN[(i // len(VORNAMEN)) % len(NACHNAMEN)]
+        if i >= kombinationen:
+            nachname += str(i // kombinationen)
+        namen.append((VORNAMEN[i % len(VORNAMEN)], nachname))
+    return namen
+
+
+def generate_day(rng: random.Random, tag: date, forgot_clock_out_rate: float,
+                 second_pause_rate: float) -> List[Tuple[int, int, Optional[int]]]:
+    """Stempel eines Arbeitstags als (ts, status_code, pause_sekunden)"""
+    def ts(stunden: float) -> int:
+        return int((datetime(tag.year, tag.month, tag.day) + timedelta(hours=stunden)).timestamp())
+
+    beginn = rng.uniform(6.5, 9.5)
+    events = [(ts(beginn), EIN, None)]
+    pausen = [rng.uniform(11.5, 13.5)]
+    if rng.random() < second_pause_rate:
+        pausen.append(rng.uniform(15.0, 16.0))
+    for pause_start in pausen:
+        dauer = rng.choice([15, 20, 30, 30, 30, 45, 60]) * 60
+        events.append((ts(pause_start), PAUSE_START, None))
+        events.append((ts(pause_start) + dauer, PAUSE_ENDE, dauer))
+    # Vergessenes Ausstempeln: der Tag endet ohne "Aus"
+    if rng.random() >= forgot_clock_out_rate:
+        ende = max(beginn + rng.uniform(7.5, 10.0), pausen[-1] + 1.5)
+        events.append((ts(ende), AUS, None))
+    return events
+
+
+def generate_workload(db_handler, employees: int = 10, years: float = 1, start: date = date(2024, 1, 1),
+                      seed: int = 0, absence_rate: float = 0.08, forgot_clock_out_rate: float = 0.02,
+                      second_pause_rate: float = 0.2) -> int:
+    """Füllt eine (leere) Datenbank mit realistischen Stempelzeiten.
+
+    Für jeden Mitarbeiter werden Montag bis Freitag Kommen, Pausen und Gehen
+    gestempelt; einzelne Tage fehlen (Urlaub, Krankheit), an anderen wurde das
+    Ausstempeln vergessen. Bei gleichem seed entstehen dieselben Daten.
+    Liefert die Anzahl der geschriebenen Einträge.
+    """
+    rng = random.Random(seed)
+    tage = [start + timedelta(days=i) for i in range(int(years * 365))]
+    arbeitstage = [tag for tag in tage if tag.weekday() < 5]
+    conn = db_handler.conn
+    anzahl = 0
+    with db_handler.lock:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for vorname, nachname in employee_names(employees):
+                mitarbeiter_id = ensure_employee(cursor, vorname, nachname).id
+                rows = []
+                for tag in arbeitstage:
+                    if rng.random() < absence_rate:
+                        continue
+                    rows.extend((mitarbeiter_id, ts, code, pause)
+                                for ts, code, pause in generate_day(rng, tag, forgot_clock_out_rate, second_pause_rate))
+                cursor.executemany("""
+                    INSERT INTO stempel (mitarbeiter_id, ts, status_code, pause_sekunden)
+                    VALUES (?, ?, ?, ?)
+                """, rows)
+                anzahl += len(rows)
+            aggregates.rebuild(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        db_handler.invalidate_caches()
+    return anzahl
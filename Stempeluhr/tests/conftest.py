@@ -0,0 +1,16 @@
+import pytest
+
+from stempeluhr.databaselogic.db_handler import DatabaseHandler
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "stempeluhr.db")
+
+
+@pytest.fixture
+def db(db_path):
+    """Leere Datenbank pro Test; Testdateien mit eigenen Testdaten erweitern diese Fixture"""
+    handler = DatabaseHandler(db_path)
+    yield handler
+    handler.close()
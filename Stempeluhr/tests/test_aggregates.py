@@ -0,0 +1,58 @@
+from stempeluhr.models.time_entry import TimeEntry
+
+
+def stamp(db, date, time, status, vorname="Tanja", nachname="Kretschmann"):
+    assert db.save_entry(TimeEntry(vorname, nachname, date, time, status))
+
+
+def aggregate_rows(db):
+    tage = db.conn.execute("""
+        SELECT vorname, nachname, datum, arbeit_sekunden, pause_sekunden, ueberstunden_sekunden
+        FROM tagesaggregate JOIN mitarbeiter ON mitarbeiter.id = mitarbeiter_id ORDER BY 1, 2, 3
+    """).fetchall()
+    wochen = db.conn.execute("""
+        SELECT vorname, nachname, iso_jahr, iso_woche, arbeit_sekunden, pause_sekunden, ueberstunden_sekunden
+        FROM wochenaggregate JOIN mitarbeiter ON mitarbeiter.id = mitarbeiter_id ORDER BY 1, 2, 3, 4
+    """).fetchall()
+    return tage, wochen
+
+
+def test_save_entry_maintains_day_and_week(db):
+    stamp(db, "2025-03-03", "08:00:00", "Ein")
+    stamp(db, "2025-03-03", "12:00:00", "Pause Start")
+    stamp(db, "2025-03-03", "12:30:00", "Pause Ende")
+    stamp(db, "2025-03-03", "18:00:00", "Aus")
+
+    tage, wochen = aggregate_rows(db)
+    assert tage == [("Tanja", "Kretschmann", "2025-03-03", 10 * 3600, 1800, 3600 + 1800)]
+    assert wochen == [("Tanja", "Kretschmann", 2025, 10, 10 * 3600, 1800, 0)]
+    assert db.berechne_wochenuebersicht("Tanja", "Kretschmann", 2025, 10)["gesamtzeit"] == 9.5
+
+
+def test_incremental_matches_rebuild_with_out_of_order_stamps(db):
+    stamp(db, "2025-03-03", "08:00:00", "Ein")
+    stamp(db, "2025-03-03", "16:00:00", "Aus")
+    stamp(db, "2025-03-04", "08:00:00", "Ein")
+    stamp(db, "2025-03-04", "17:00:00", "Aus")
+    # Nachgetragenes "Aus" vor dem letzten "Aus" ändert die Paarung
+    stamp(db, "2025-03-04", "12:00:00", "Aus")
+    stamp(db, "2025-03-05", "09:00:00", "Ein", vorname="Max", nachname="Muster")
+    stamp(db, "2025-03-05", "10:00:00", "Aus", vorname="Max", nachname="Muster")
+
+    inkrementell = aggregate_rows(db)
+    db.rebuild_aggregates()
+    assert aggregate_rows(db) == inkrementell
+    tanja_tage = {row[2]: row[3] for row in inkrementell[0] if row[0] == "Tanja"}
+    assert tanja_tage == {"2025-03-03": 8 * 3600, "2025-03-04": 4 * 3600}
+
+
+def test_monatsuebersicht_splits_weeks_at_month_boundary(db):
+    # KW 9 reicht vom 24.02. bis 02.03.2025
+    stamp(db, "2025-02-28", "08:00:00", "Ein")
+    stamp(db, "2025-02-28", "10:00:00", "Aus")
+    stamp(db, "2025-03-01", "08:00:00", "Ein")
+    stamp(db, "2025-03-01", "11:00:00", "Aus")
+
+    maerz = db.berechne_monatsuebersicht("Tanja", "Kretschmann", 2025, 3)
+    assert [(w["woche"], w["arbeitszeit"]) for w in maerz] == [(9, 3.0)]
+    assert db.berechne_wochenuebersicht("Tanja", "Kretschmann", 2025, 9)["arbeitszeit"] == 5.0
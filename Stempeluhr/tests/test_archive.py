@@ -0,0 +1,108 @@
+import os
+
+import pytest
+
+from stempeluhr.cli import main
+from stempeluhr.databaselogic.archive import OpenSessionsError
+from stempeluhr.models.time_entry import TimeEntry, month_bounds
+
+
+@pytest.fixture
+def db(db):
+    for tag in ["2023-12-28", "2023-12-29", "2024-01-02", "2024-01-03"]:
+        assert db.save_entry(TimeEntry("Tanja", "Kretschmann", tag, "08:00:00", "Ein"))
+        assert db.save_entry(TimeEntry("Tanja", "Kretschmann", tag, "16:00:00", "Aus"))
+    return db
+
+
+def attached(db):
+    return [row[1] for row in db.read_conn.execute("PRAGMA database_list")]
+
+
+def test_archive_and_restore_year(db):
+    alle = db.get_entries("Tanja", "Kretschmann")
+    dezember = db.berechne_monatsuebersicht("Tanja", "Kretschmann", 2023, 12)
+
+    assert db.archive_year(2023) == 4
+    pfad = db.archived_years()[2023]
+    assert os.path.basename(pfad) == "stempeluhr_2023.db" and os.path.exists(pfad)
+    assert db.conn.execute("SELECT COUNT(*) FROM stempel").fetchone()[0] == 4
+    assert db.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    # Die erste Seite kommt aus der laufenden Datenbank, erst danach wird das Archiv angehängt
+    seite, weiter = db.get_entries_page("Tanja", "Kretschmann", 3)
+    assert "archiv_2023" not in attached(db)
+    rest, ende = db.get_entries_page("Tanja", "Kretschmann", 10, weiter)
+    assert seite + rest == alle and ende is None
+    assert "archiv_2023" in attached(db)
+
+    assert len(db.get_sessions("Tanja", "Kretschmann", *month_bounds(2023, 12))) == 2
+    assert db.berechne_monatsuebersicht("Tanja", "Kretschmann", 2023, 12) == dezember
+    db.rebuild_aggregates()
+    assert db.berechne_monatsuebersicht("Tanja", "Kretschmann", 2023, 12) == dezember
+    # Archivierte Jahre sind abgeschlossen
+    assert not db.save_entry(TimeEntry("Tanja", "Kretschmann", "2023-12-30", "08:00:00", "Ein"))
+
+    assert db.restore_year(2023) == 4
+    assert not os.path.exists(pfad) and db.archived_years() == {}
+    assert db.get_entries("Tanja", "Kretschmann") == alle
+
+
+def test_card_snapshot_reads_archive_in_its_transaction(db):
+    alle = db.get_entries("Tanja", "Kretschmann")
+    assert db.archive_year(2023) == 4
+    statements = []
+    db.snapshot_conn.set_trace_callback(statements.append)
+    db.read_conn.set_trace_callback(statements.append)
+    snapshot = db.get_card_snapshot(("Tanja", "Kretschmann"), 10)
+    db.snapshot_conn.set_trace_callback(None)
+    db.read_conn.set_trace_callback(None)
+
+    assert snapshot.entries == alle and snapshot.next_key is None
+    # Angehängt wird vor BEGIN; laufende Tabelle und Archiv liest dieselbe Transaktion
+    begin, commit = statements.index("BEGIN"), statements.index("COMMIT")
+    assert any("ATTACH" in sql for sql in statements[:begin])
+    assert any("archiv_2023.stempel" in sql for sql in statements[begin:commit])
+    assert not any("stempel" in sql for sql in statements[commit + 1:])
+    # Die gemeinsame Leseverbindung bleibt außerhalb der Transaktion
+    assert "archiv_2023" not in attached(db) and not db.read_conn.in_transaction
+
+    assert db.restore_year(2023) == 4
+    assert db.get_card_snapshot(("Tanja", "Kretschmann"), 10).entries == alle
+
+
+def test_open_shift_blocks_archive(db, capsys):
+    assert db.save_entry(TimeEntry("Max", "Muster", "2023-12-31", "22:00:00", "Ein"))
+    with pytest.raises(OpenSessionsError, match="Max Muster") as fehler:
+        db.archive_year(2023)
+    assert [(vorname, nachname) for _, vorname, nachname, _ in fehler.value.offen] == [("Max", "Muster")]
+    assert db.archived_years() == {}
+    assert not os.path.exists(os.path.join(os.path.dirname(db.db_path), "stempeluhr_2023.db"))
+    assert len(db.get_entries()) == 9
+
+    assert main(["--db", db.db_path, "archive", "2023"]) == 1
+    ausgabe = capsys.readouterr().out
+    assert "Max Muster seit 31.12.2023 22:00" in ausgabe and "--force" in ausgabe
+
+
+def test_force_carries_open_shift_over(db):
+    assert db.save_entry(TimeEntry("Max", "Muster", "2023-12-31", "22:00:00", "Ein"))
+    assert db.archive_year(2023, force=True) == 4
+    # Das offene "Ein" bleibt in der Datenbank und wird im neuen Jahr geschlossen
+    assert [e.status for e in db.get_entries("Max", "Muster")] == ["Ein"]
+    assert db.save_entry(TimeEntry("Max", "Muster", "2024-01-01", "06:00:00", "Aus"))
+    assert db.berechne_monatsuebersicht("Max", "Muster", 2023, 12)[-1]["arbeitszeit"] == 8
+    assert len(db.get_sessions("Max", "Muster", *month_bounds(2023, 12))) == 1
+    assert len(db.get_entries("Tanja", "Kretschmann")) == 8
+
+    assert db.restore_year(2023) == 4
+    assert len(db.get_entries()) == 10
+
+
+def test_archive_cli(db, capsys):
+    assert main(["--db", db.db_path, "archive", "2023"]) == 0
+    assert main(["--db", db.db_path, "archive", "2023"]) == 1
+    assert "bereits archiviert" in capsys.readouterr().out
+    assert main(["--db", db.db_path, "vacuum"]) == 0
+    assert main(["--db", db.db_path, "restore", "2023"]) == 0
+    assert "4 Einträge aus 2023 wiederhergestellt" in capsys.readouterr().out
@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+import pytest
+
+from stempeluhr.databaselogic.async_db_handler import AsyncDatabaseHandler
+from stempeluhr.models.time_entry import TimeEntry
+
+
+@pytest.fixture
+def async_db(db):
+    async_db = AsyncDatabaseHandler(db)
+    yield async_db
+    async_db.close()
+
+
+def test_queries_run_on_worker_thread(async_db):
+    async def ablauf():
+        entry = TimeEntry("Tanja", "Kretschmann", "2025-03-03", "08:00:00", "Ein")
+        assert await async_db.save_entry(entry)
+        last = await async_db.get_last_entry("Tanja", "Kretschmann")
+        thread = await async_db.run(threading.current_thread)
+        return last, thread
+
+    last, thread = asyncio.run(ablauf())
+    assert last.status == "Ein"
+    assert thread is not threading.main_thread()
+    assert thread.name.startswith("stempeluhr-db")
+
+
+def test_event_loop_stays_responsive(async_db):
+    gate = threading.Event()
+
+    async def ablauf():
+        blockiert = asyncio.ensure_future(async_db.run(gate.wait, 5))
+        # Die Schleife läuft weiter, während der Datenbank-Thread wartet
+        await asyncio.sleep(0.01)
+        assert not blockiert.done()
+        gate.set()
+        return await blockiert
+
+    assert asyncio.run(ablauf()) is True
@@ -0,0 +1,40 @@
+import sqlite3
+
+import pytest
+
+from stempeluhr.cli import main
+from stempeluhr.databaselogic.db_handler import DatabaseHandler
+from stempeluhr.models.time_entry import TimeEntry
+
+pytest.importorskip("reportlab")
+
+
+@pytest.fixture
+def db(db):
+    for vorname, nachname in [("Tanja", "Kretschmann"), ("Max", "Muster")]:
+        assert db.save_entry(TimeEntry(vorname, nachname, "2025-03-03", "08:00:00", "Ein"))
+        assert db.save_entry(TimeEntry(vorname, nachname, "2025-03-03", "16:00:00", "Aus"))
+    return db
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_report_all_employees(db, tmp_path, workers, capsys):
+    output_dir = tmp_path / "exports"
+    assert main(["--db", db.db_path, "report", "--year", "2025", "--month", "3",
+                 "--all-employees", "--workers", workers, "--output-dir", str(output_dir)]) == 0
+    assert sorted(p.name for p in output_dir.glob("*.pdf")) == [
+        "Arbeitszeiterfassung_Max_Muster_2025_03.pdf",
+        "Arbeitszeiterfassung_Tanja_Kretschmann_2025_03.pdf",
+    ]
+    assert "2 von 2 PDFs" in capsys.readouterr().out
+
+
+def test_read_only_handler_cannot_write(db):
+    reader = DatabaseHandler(db.db_path, read_only=True)
+    try:
+        assert reader is not db
+        assert len(reader.get_entries()) == 4
+        with pytest.raises(sqlite3.OperationalError):
+            reader.conn.execute("DELETE FROM stempel")
+    finally:
+        reader.close()
@@ -0,0 +1,70 @@
+import multiprocessing
+import sqlite3
+import threading
+
+from stempeluhr.databaselogic.db_handler import DatabaseHandler
+from stempeluhr.models.time_entry import TimeEntry
+
+PROZESSE = 4
+STEMPEL = 30
+
+
+def _stamp_worker(db_path, nummer, start):
+    """Stempelt in einem eigenen Prozess abwechselnd Ein/Aus für zwei Mitarbeiter"""
+    db = DatabaseHandler(db_path)
+    start.wait()
+    fehler = 0
+    for i in range(STEMPEL):
+        status = "Ein" if i % 2 == 0 else "Aus"
+        time = f"{8 + i // 2 % 10:02d}:{nummer:02d}:{i % 60:02d}"
+        for vorname in (f"Terminal{nummer}", "Geteilt"):
+            if not db.save_entry(TimeEntry(vorname, "Test", f"2025-03-{1 + i // 20:02d}", time, status)):
+                fehler += 1
+    db.close()
+    return fehler
+
+
+def test_stamps_from_several_processes_are_not_lost(tmp_path):
+    db_path = str(tmp_path / "stempeluhr.db")
+    db = DatabaseHandler(db_path)
+    try:
+        assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert not db.get_state("Terminal0", "Test").is_clocked_in
+
+        ctx = multiprocessing.get_context("spawn")
+        start = ctx.Manager().Event()
+        with ctx.Pool(PROZESSE) as pool:
+            results = [pool.apply_async(_stamp_worker, (db_path, nummer, start)) for nummer in range(PROZESSE)]
+            start.set()
+            assert [r.get(timeout=60) for r in results] == [0] * PROZESSE
+
+        assert db.conn.execute("SELECT COUNT(*) FROM stempel").fetchone()[0] == 2 * PROZESSE * STEMPEL
+        assert len(db.get_entries("Geteilt", "Test")) == PROZESSE * STEMPEL
+        # Der Zustands-Cache bemerkt die Schreibzugriffe der anderen Prozesse
+        assert db.get_state("Terminal0", "Test").last_entry.status == "Aus"
+
+        # Die inkrementell gepflegten Summen stimmen mit einer Neuberechnung überein
+        vorher = db.conn.execute("SELECT * FROM tagesaggregate ORDER BY 1, 2, 3").fetchall()
+        db.rebuild_aggregates()
+        assert db.conn.execute("SELECT * FROM tagesaggregate ORDER BY 1, 2, 3").fetchall() == vorher
+    finally:
+        db.close()
+
+
+def test_locked_database_is_retried(tmp_path, monkeypatch, capsys):
+    db_path = str(tmp_path / "stempeluhr.db")
+    db = DatabaseHandler(db_path, busy_timeout_ms=10)
+    monkeypatch.setattr("stempeluhr.databaselogic.db_handler.RETRY_BASE_DELAY", 0.02)
+    # Eine fremde Verbindung hält die Schreibsperre länger als den Busy-Timeout
+    fremd = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+    fremd.execute("BEGIN IMMEDIATE")
+    timer = threading.Timer(0.05, fremd.rollback)
+    timer.start()
+    try:
+        assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-03", "08:00:00", "Ein"))
+        assert "neuer Versuch 1/" in capsys.readouterr().out
+        assert db.get_state("Tanja", "Kretschmann").is_clocked_in
+    finally:
+        timer.join()
+        fremd.close()
+        db.close()
@@ -0,0 +1,288 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from stempeluhr.databaselogic.db_handler import DatabaseHandler
+from stempeluhr.databaselogic import migrations
+from stempeluhr.databaselogic.migrations import SCHEMA_VERSION, get_schema_version
+from stempeluhr.models.time_entry import TimeEntry, from_timestamp, to_timestamp
+
+
+def create_legacy_db(path):
+    """Legt eine Datenbank im alten Textformat (ohne id Spalte) an."""
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE stempel (vorname TEXT, nachname TEXT, date TEXT, time TEXT, status TEXT)
+    """)
+    conn.executemany("INSERT INTO stempel VALUES (?, ?, ?, ?, ?)", [
+        ("Tanja", "Kretschmann", "2025-03-19", "08:00:00", "Ein"),
+        ("Tanja", "Kretschmann", "2025-03-19", "12:00:00", "Pause Start"),
+        ("Tanja", "Kretschmann", "2025-03-19", "12:30:00", "Pause Ende (30 Min.)"),
+        ("Tanja", "Kretschmann", "2025-03-19", "16:00:00", "Aus"),
+        ("Max", "Muster", "2025-03-20", "09:00:00", "Ein"),
+    ])
+    conn.commit()
+    conn.close()
+
+
+def test_migration_from_legacy_schema(db_path):
+    create_legacy_db(db_path)
+    handler = DatabaseHandler(db_path)
+    try:
+        assert get_schema_version(handler.conn) == SCHEMA_VERSION
+        entries = handler.get_entries("Tanja", "Kretschmann")
+        assert [(e.date, e.time, e.status) for e in entries] == [
+            ("2025-03-19", "16:00:00", "Aus"),
+            ("2025-03-19", "12:30:00", "Pause Ende"),
+            ("2025-03-19", "12:00:00", "Pause Start"),
+            ("2025-03-19", "08:00:00", "Ein"),
+        ]
+        pause = handler.conn.execute(
+            "SELECT pause_sekunden FROM stempel WHERE status_code = 4"
+        ).fetchone()[0]
+        assert pause == 30 * 60
+    finally:
+        handler.close()
+
+
+def test_migration_is_skipped_when_current(db_path):
+    create_legacy_db(db_path)
+    DatabaseHandler(db_path).close()
+    handler = DatabaseHandler(db_path)
+    try:
+        assert len(handler.get_entries()) == 5
+    finally:
+        handler.close()
+
+
+def test_failed_migration_rolls_back(db_path, monkeypatch):
+    create_legacy_db(db_path)
+
+    def kaputt(cursor):
+        raise RuntimeError("Abbruch")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", [(1, migrations._migrate_v1), (2, kaputt)])
+    monkeypatch.setattr(migrations, "SCHEMA_VERSION", 2)
+    with pytest.raises(RuntimeError):
+        DatabaseHandler(db_path)
+    DatabaseHandler._instances.clear()
+
+    conn = sqlite3.connect(db_path)
+    assert get_schema_version(conn) == 0
+    assert conn.execute("SELECT COUNT(*) FROM stempel").fetchone()[0] == 5
+    conn.close()
+
+    monkeypatch.undo()
+    handler = DatabaseHandler(db_path)
+    try:
+        assert get_schema_version(handler.conn) == SCHEMA_VERSION
+        assert len(handler.get_entries()) == 5
+    finally:
+        handler.close()
+
+
+def test_save_and_load_roundtrip(db):
+    assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-19", "08:00:00", "Ein"))
+    assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-19", "08:00:00", "Aus"))
+    last = db.get_last_entry("Tanja", "Kretschmann")
+    assert (last.date, last.time, last.status) == ("2025-03-19", "08:00:00", "Aus")
+    assert db.get_last_entry("Max", "Muster") is None
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT ts, status_code, pause_sekunden FROM stempel "
+    "WHERE mitarbeiter_id = 1 ORDER BY ts DESC, id DESC",
+    "SELECT vorname, nachname, ts, status_code, pause_sekunden "
+    "FROM stempel JOIN mitarbeiter ON mitarbeiter.id = stempel.mitarbeiter_id "
+    "ORDER BY stempel.ts DESC, stempel.id DESC LIMIT 1",
+])
+def test_queries_use_index_without_sorting(db, sql):
+    plan = " ".join(row[-1] for row in db.conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+    assert "USING" in plan and "INDEX" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def stamp(db, date, time, status, vorname="Tanja", nachname="Kretschmann"):
+    assert db.save_entry(TimeEntry(vorname, nachname, date, time, status))
+
+
+def test_entries_between_filters_range_in_order(db):
+    stamp(db, "2025-02-28", "08:00:00", "Ein")
+    stamp(db, "2025-03-01", "09:00:00", "Ein")
+    stamp(db, "2025-03-31", "17:00:00", "Aus")
+    stamp(db, "2025-04-01", "00:00:00", "Ein")
+    stamp(db, "2025-03-15", "09:00:00", "Ein", vorname="Max", nachname="Muster")
+
+    entries = db.get_entries_between(
+        "Tanja", "Kretschmann", datetime(2025, 3, 1), datetime(2025, 4, 1)
+    )
+    assert [(e.date, e.status) for e in entries] == [("2025-03-01", "Ein"), ("2025-03-31", "Aus")]
+    streamed = db.iter_entries_between(
+        "Tanja", "Kretschmann", datetime(2025, 3, 1), datetime(2025, 4, 1), batch_size=1
+    )
+    assert [e.date for e in streamed] == ["2025-03-01", "2025-03-31"]
+
+
+def test_monatsuebersicht(db):
+    # KW 10: 9 Stunden anwesend, 30 Minuten Pause
+    stamp(db, "2025-03-03", "08:00:00", "Ein")
+    stamp(db, "2025-03-03", "12:00:00", "Pause Start")
+    stamp(db, "2025-03-03", "12:30:00", "Pause Ende")
+    stamp(db, "2025-03-03", "17:00:00", "Aus")
+    # Außerhalb des Monats
+    stamp(db, "2025-04-01", "08:00:00", "Ein")
+    stamp(db, "2025-04-01", "10:00:00", "Aus")
+
+    wochen = db.berechne_monatsuebersicht("Tanja", "Kretschmann", 2025, 3)
+    assert wochen == [{
+        "woche": 10,
+        "arbeitszeit": 9.0,
+        "pausezeit": 0.5,
+        "gesamtzeit": 8.5,
+        "ueberstunden": 0,
+    }]
+
+
+def test_entries_page_keyset_pagination(db):
+    for minute in range(5):
+        stamp(db, "2025-03-03", f"08:0{minute}:00", "Ein")
+    # Gleicher Zeitstempel, Reihenfolge über die id
+    stamp(db, "2025-03-03", "08:04:00", "Aus")
+
+    seiten = []
+    key = None
+    while True:
+        entries, key = db.get_entries_page("Tanja", "Kretschmann", 2, before=key)
+        seiten.append([(e.time, e.status) for e in entries])
+        if key is None:
+            break
+    assert seiten == [
+        [("08:04:00", "Aus"), ("08:04:00", "Ein")],
+        [("08:03:00", "Ein"), ("08:02:00", "Ein")],
+        [("08:01:00", "Ein"), ("08:00:00", "Ein")],
+        [],
+    ]
+
+
+def test_state_cache_answers_without_queries(db):
+    statements = []
+
+    def trace(sql):
+        # Die Prüfung auf Schreibzugriffe anderer Prozesse liest keine Tabellen
+        if sql != "PRAGMA data_version":
+            statements.append(sql)
+    db.conn.set_trace_callback(trace)
+    db.read_conn.set_trace_callback(trace)
+
+    state = db.get_state("Tanja", "Kretschmann")
+    assert not state.is_clocked_in
+    assert len(statements) == 1  # einmaliges Laden beim ersten Zugriff
+
+    stamp(db, "2025-03-03", "08:00:00", "Ein")
+    stamp(db, "2025-03-03", "12:00:00", "Pause Start")
+    statements.clear()
+    state = db.get_state("Tanja", "Kretschmann")
+    assert state.is_in_pause
+    assert state.pause_start_time == datetime(2025, 3, 3, 12, 0)
+    assert db.get_last_entry("Tanja", "Kretschmann").status == "Pause Start"
+    assert statements == []
+
+
+def test_state_cache_reloads_after_backfill(db):
+    stamp(db, "2025-03-03", "08:00:00", "Ein")
+    stamp(db, "2025-03-03", "17:00:00", "Aus")
+    # Nachgetragener Eintrag ist nicht der neueste
+    stamp(db, "2025-03-03", "12:00:00", "Pause Start")
+    state = db.get_state("Tanja", "Kretschmann")
+    assert state.last_entry.status == "Aus"
+    assert not state.is_clocked_in
+
+
+def test_loaded_entries_are_compact_and_complete(db):
+    # 30.03.2025 ist die Umstellung auf Sommerzeit
+    stamp(db, "2025-03-29", "23:30:00", "Ein")
+    stamp(db, "2025-03-30", "04:00:00", "Pause Start")
+    assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-30", "04:30:00", "Pause Ende"), 1800)
+
+    entries = db.get_entries("Tanja", "Kretschmann") + db.get_entries()
+    assert all(not hasattr(entry, "__dict__") for entry in entries)
+    assert all(entry.vorname is entries[0].vorname for entry in entries)
+    for entry in entries:
+        assert from_timestamp(entry.ts) == (entry.date, entry.time)
+    assert entries[0].status == "Pause Ende" and entries[0].pause_dauer == 1800
+
+    spalten = db.get_entry_columns("Tanja", "Kretschmann")
+    assert list(spalten.ts) == [entry.ts for entry in reversed(entries[:3])]
+    assert list(spalten.status_codes) == [1, 3, 4]
+    assert list(spalten.pause_sekunden) == [-1, -1, 1800]
+
+
+def test_migration_merges_names_differing_in_whitespace(db_path):
+    create_legacy_db(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO stempel VALUES ('Max ', ' Muster', '2025-03-20', '17:00:00', 'Aus')")
+    conn.commit()
+    conn.close()
+    handler = DatabaseHandler(db_path)
+    try:
+        assert handler.get_employees() == [("Tanja", "Kretschmann"), ("Max", "Muster")]
+        assert handler.conn.execute("SELECT COUNT(*) FROM mitarbeiter").fetchone()[0] == 2
+        assert [e.status for e in handler.get_entries("Max", "Muster")] == ["Aus", "Ein"]
+        assert handler.berechne_wochenuebersicht("Max", "Muster", 2025, 12)["arbeitszeit"] == 8
+    finally:
+        handler.close()
+
+
+def create_v3_db(path):
+    """Legt eine Datenbank mit Schemaversion 3 an (Stempel und Summen nach Namen)"""
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    for _, migration in migrations.MIGRATIONS[:3]:
+        migration(cursor)
+    conn.executemany("INSERT INTO stempel (vorname, nachname, ts, status_code) VALUES (?, ?, ?, ?)", [
+        ("Tanja", "Kretschmann", to_timestamp("2025-03-19", "08:00:00"), 1),
+        ("Tanja", "Kretschmann", to_timestamp("2025-03-19", "16:00:00"), 2),
+        ("Max ", "Muster", to_timestamp("2025-03-20", "09:00:00"), 1),
+        ("Max", "Muster", to_timestamp("2025-03-20", "17:00:00"), 2),
+    ])
+    # Summen wie eine Version-3-Installation sie geführt hat
+    conn.execute("INSERT INTO tagesaggregate (vorname, nachname, datum, arbeit_sekunden) "
+                 "VALUES ('Tanja', 'Kretschmann', '2025-03-19', 28800)")
+    conn.execute("PRAGMA user_version = 3")
+    conn.commit()
+    conn.close()
+
+
+def schema(conn):
+    return conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
+
+
+def test_migration_from_v3_matches_new_database(db, tmp_path):
+    pfad = str(tmp_path / "v3.db")
+    create_v3_db(pfad)
+    handler = DatabaseHandler(pfad)
+    try:
+        assert get_schema_version(handler.conn) == SCHEMA_VERSION
+        assert schema(handler.conn) == schema(db.conn)
+        assert handler.get_employees() == [("Tanja", "Kretschmann"), ("Max", "Muster")]
+        assert handler.berechne_wochenuebersicht("Max", "Muster", 2025, 12)["arbeitszeit"] == 8
+        assert handler.berechne_wochenuebersicht("Tanja", "Kretschmann", 2025, 12)["arbeitszeit"] == 8
+        summen = handler.conn.execute("SELECT * FROM tagesaggregate ORDER BY 1, 2").fetchall()
+        handler.rebuild_aggregates()
+        assert handler.conn.execute("SELECT * FROM tagesaggregate ORDER BY 1, 2").fetchall() == summen
+    finally:
+        handler.close()
+
+
+def test_employee_handle_and_normalized_names(db):
+    stamp(db, "2025-03-19", "08:00:00", "Ein", vorname="Max ", nachname="Muster")
+    stamp(db, "2025-03-19", "12:00:00", "Pause Start", vorname="Max", nachname="  Muster")
+    max_muster = db.get_employee("Max", "Muster")
+    assert max_muster.vorname == "Max" and max_muster.nachname == "Muster"
+    assert db.get_employee("Erika", "Muster") is None
+    assert db.get_state(max_muster).is_in_pause
+    assert db.get_state(" Max", "Muster ") is db.get_state(max_muster)
+    entries, _ = db.get_entries_page(max_muster, None, 10)
+    assert [(e.vorname, e.status) for e in entries] == [("Max", "Pause Start"), ("Max", "Ein")]
+    assert db.get_entries("Erika", "Muster") == []
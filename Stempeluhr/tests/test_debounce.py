@@ -0,0 +1,42 @@
+import asyncio
+
+from stempeluhr.utils.debounce import Debouncer
+
+
+def test_only_last_trigger_runs():
+    aufrufe = []
+
+    async def reload(generation, name):
+        aufrufe.append(name)
+
+    async def tippen():
+        debouncer = Debouncer(reload, delay=0.01)
+        for i in range(1, len("Kretschmann") + 1):
+            debouncer.trigger("Kretschmann"[:i])
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.05)
+        return debouncer
+
+    debouncer = asyncio.run(tippen())
+    assert aufrufe == ["Kretschmann"]
+    assert debouncer.saved == 10
+
+
+def test_newer_trigger_cancels_running_reload_and_marks_stale():
+    ergebnisse = []
+
+    async def reload(generation):
+        await asyncio.sleep(0.05)
+        ergebnisse.append((generation, debouncer.is_current(generation)))
+
+    async def ablauf():
+        debouncer.trigger()
+        await asyncio.sleep(0.02)  # Neuladen läuft bereits
+        debouncer.trigger()
+        await asyncio.sleep(0.1)
+
+    debouncer = Debouncer(reload, delay=0.01)
+    asyncio.run(ablauf())
+    assert ergebnisse == [(2, True)]
+    assert debouncer.cancelled_in_flight == 1
+    assert debouncer.saved == 0
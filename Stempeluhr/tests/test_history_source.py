@@ -0,0 +1,53 @@
+import pytest
+
+from stempeluhr.components.history_source import HistorySource
+from stempeluhr.models.time_entry import TimeEntry
+
+ACCESSORS = ["vorname", "nachname", "datum", "uhrzeit", "status_pause"]
+
+
+@pytest.fixture
+def db(db):
+    for tag in range(1, 26):
+        db.save_entry(TimeEntry("Tanja", "Kretschmann", f"2025-03-{tag:02d}", "08:00:00", "Ein"))
+    db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-26", "12:30:00", "Pause Ende"), 1800)
+    return db
+
+
+def test_loads_only_first_page(db):
+    source = HistorySource(ACCESSORS, db, "Tanja", "Kretschmann", page_size=10, prefetch=0)
+    assert len(source) == 10
+    assert source[0].status_pause.strip() == "Pause Ende (30min)"
+    assert [row.datum.strip() for row in source][-1] == "2025-03-17"
+
+
+def test_fetches_next_page_near_end(db):
+    source = HistorySource(ACCESSORS, db, "Tanja", "Kretschmann", page_size=10, prefetch=2)
+    source[8]
+    assert len(source) == 20
+    source[19]
+    assert len(source) == 26
+    assert source.exhausted
+
+
+def test_without_name_stays_empty(db):
+    source = HistorySource(ACCESSORS, db, "", "", page_size=10)
+    assert len(source) == 0
+    assert source.exhausted
+
+
+def test_prepend_saved_entries_without_query(db):
+    source = HistorySource(ACCESSORS, db, "Tanja", "Kretschmann", page_size=10, prefetch=0)
+    instrumentation = db.enable_instrumentation()
+    for uhrzeit, status in [("08:00:00", "Pause Start"), ("08:45:00", "Pause Ende")]:
+        assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-27", uhrzeit, status))
+        assert source.prepend_entry(db.get_state("Tanja", "Kretschmann").last_entry)
+    # Nur die beiden INSERTs (mit Summen), kein SELECT auf die Historie
+    assert not any(sql.startswith("SELECT strftime") for sql in instrumentation.snapshot()["statements"])
+    db.disable_instrumentation()
+
+    # Die Pausendauer ergibt sich aus dem eingefügten "Pause Start"
+    assert len(source) == 12 and source[0].status_pause.strip() == "Pause Ende (45min)"
+    assert source.shows(" Tanja", "Kretschmann ") and not source.shows("Max", "Muster")
+    # Ältere Einträge werden nicht oben eingefügt
+    assert not source.prepend_entry(source._entries[-1])
@@ -0,0 +1,80 @@
+import json
+
+from stempeluhr.cli import main
+from stempeluhr.functions.importer import import_file
+from stempeluhr.models.time_entry import to_timestamp
+
+
+def test_csv_import_with_mapping_and_dedupe(db, tmp_path):
+    quelle = tmp_path / "alt.csv"
+    quelle.write_text(
+        "Vorname;Name;Tag;Uhrzeit;Art\n"
+        "Tanja;Kretschmann;2025-03-03;08:00;K\n"
+        "Tanja;Kretschmann;2025-03-03;12:00;PS\n"
+        "Tanja;Kretschmann;2025-03-03;12:30;PE\n"
+        "Tanja;Kretschmann;2025-03-03;16:00;G\n"
+        "Tanja;;2025-03-03;17:00;G\n"
+        "Max;Muster;2025-03-03;09:00;X\n",
+        encoding="utf-8",
+    )
+    optionen = dict(
+        mapping={"vorname": "Vorname", "nachname": "Name", "date": "Tag", "time": "Uhrzeit", "status": "Art"},
+        status_map={"K": "Ein", "G": "Aus", "PS": "Pause Start", "PE": "Pause Ende"},
+        batch_size=2,
+    )
+    stände = []
+    result = import_file(db, str(quelle), progress=stände.append, **optionen)
+    assert (result.read, result.saved, result.duplicates, result.invalid) == (6, 4, 0, 2)
+    assert [s.saved for s in stände] == [2, 4]
+
+    entries = db.get_entries("Tanja", "Kretschmann")
+    assert [e.status for e in entries] == ["Aus", "Pause Ende", "Pause Start", "Ein"]
+    assert entries[1].pause_dauer == 1800
+    assert db.berechne_monatsuebersicht("Tanja", "Kretschmann", 2025, 3)[0]["gesamtzeit"] == 7.5
+
+    # Ein zweiter Import derselben Datei schreibt nichts doppelt
+    result = import_file(db, str(quelle), **optionen)
+    assert (result.saved, result.duplicates) == (0, 4)
+    assert len(db.get_entries()) == 4
+
+
+def test_jsonl_import_via_cli(db, tmp_path, capsys):
+    quelle = tmp_path / "alt.jsonl"
+    zeilen = [
+        {"vorname": "Tanja", "nachname": "Kretschmann", "ts": to_timestamp("2025-03-03", "08:00:00"), "status": "Ein"},
+        {"vorname": "Tanja", "nachname": "Kretschmann", "datetime": "2025-03-03T16:00:00", "status": "Aus"},
+        {"vorname": "Tanja", "nachname": "Kretschmann", "datetime": "2025-03-03T17:00:00", "status": "Aus"},
+    ]
+    quelle.write_text("\n".join(json.dumps(z) for z in zeilen) + "\n", encoding="utf-8")
+    assert main(["--db", db.db_path, "import", str(quelle), "--validate"]) == 1
+    out = capsys.readouterr().out
+    assert "2 gespeichert" in out and "1 abgelehnt" in out
+    assert [e.time for e in db.get_entries()] == ["16:00:00", "08:00:00"]
+
+
+def test_broken_jsonl_lines_are_skipped(db, tmp_path, capsys):
+    quelle = tmp_path / "alt.jsonl"
+    quelle.write_text(
+        '{"vorname": "Tanja", "nachname": "Kretschmann", "datetime": "2025-03-03T08:00:00", "status": "Ein"}\n'
+        '{"vorname": "Tanja", "nachname": \n'
+        '["Tanja", "Kretschmann"]\n'
+        '{"vorname": "Tanja", "nachname": "Kretschmann", "datetime": "2025-03-03T16:00:00", "status": "Aus"}\n',
+        encoding="utf-8",
+    )
+    result = import_file(db, str(quelle), batch_size=1)
+    assert (result.read, result.saved, result.invalid) == (4, 2, 2)
+    out = capsys.readouterr().out
+    assert "Datensatz 2 übersprungen" in out and "Datensatz 3 übersprungen: Kein JSON-Objekt" in out
+    assert [e.status for e in db.get_entries()] == ["Aus", "Ein"]
+
+
+def test_csv_with_bom_via_cli(db, tmp_path, capsys):
+    quelle = tmp_path / "export.csv"
+    quelle.write_text(
+        "vorname;nachname;date;time;status\n"
+        "Tanja;Kretschmann;2025-03-03;08:00;Ein\n",
+        encoding="utf-8-sig",
+    )
+    assert main(["--db", db.db_path, "import", str(quelle)]) == 0
+    assert "1 gespeichert" in capsys.readouterr().out
+    assert [e.status for e in db.get_entries()] == ["Ein"]
@@ -0,0 +1,39 @@
+import json
+import sqlite3
+
+from stempeluhr.models.time_entry import TimeEntry, month_bounds
+
+
+def test_instrumentation_records_methods_and_statements(db, tmp_path):
+    slow_log = tmp_path / "slow.log"
+    instrumentation = db.enable_instrumentation(slow_ms=0, slow_log_path=str(slow_log))
+    assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-03", "08:00:00", "Ein"))
+    assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-03", "16:00:00", "Aus"))
+    assert len(db.get_entries("Tanja", "Kretschmann")) == 2
+    assert len(list(db.iter_entries_between("Tanja", "Kretschmann", *month_bounds(2025, 3)))) == 2
+
+    snapshot = instrumentation.snapshot()
+    assert snapshot["methods"]["save_entry"]["calls"] == 2
+    assert snapshot["methods"]["get_entries"]["rows"] == 2
+    assert snapshot["methods"]["iter_entries_between"]["rows"] == 2
+    select = [s for sql, s in snapshot["statements"].items()
+              if sql.startswith("SELECT strftime") and "ORDER BY ts DESC, id DESC" in sql and "LIMIT" not in sql]
+    assert select and select[0]["calls"] == 1 and select[0]["rows"] == 2
+
+    # Mit slow_ms=0 ist jede Anweisung langsam und hat einen Plan
+    assert any("idx_stempel_mitarbeiter_ts" in " ".join(e["plan"]) for e in snapshot["slow"])
+    assert slow_log.read_text(encoding="utf-8").count("\n") == len(snapshot["slow"])
+
+    dump = tmp_path / "stats.json"
+    instrumentation.dump(str(dump))
+    assert json.loads(dump.read_text(encoding="utf-8"))["methods"]["save_entry"]["calls"] == 2
+
+
+def test_disable_restores_plain_handler(db):
+    db.enable_instrumentation()
+    db.get_entries()
+    assert db.disable_instrumentation().methods["get_entries"].calls == 1
+    assert type(db.conn) is sqlite3.Connection
+    assert "get_entries" not in vars(db)
+    assert db.instrumentation is None
+
@@ -0,0 +1,43 @@
+import sqlite3
+
+from stempeluhr.models.name_index import NameIndex
+from stempeluhr.models.time_entry import TimeEntry
+
+
+def test_prefix_suggestions():
+    index = NameIndex([("Max", "Muster"), ("Maria", "Meier"), ("Tanja", "Kretschmann"), ("max", "Mustermann")])
+    assert index.suggest("ma") == [("Maria", "Meier"), ("Max", "Muster"), ("max", "Mustermann")]
+    assert index.suggest("MAX ", "muster") == [("Max", "Muster"), ("max", "Mustermann")]
+    assert index.suggest("", "kr") == [("Tanja", "Kretschmann")]
+    assert index.suggest("ma", limit=1) == [("Maria", "Meier")]
+    assert index.suggest("") == [] and index.suggest("x") == []
+    assert not index.add(" Max", "Muster") and index.add("Mara", "Berg")
+    assert index.suggest("mar") == [("Mara", "Berg"), ("Maria", "Meier")]
+
+
+def test_save_entry_keeps_index_current(db):
+    assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-03", "08:00:00", "Ein"))
+    assert db.suggest_employees("ta") == [("Tanja", "Kretschmann")]
+
+    instrumentation = db.enable_instrumentation()
+    assert db.save_entry(TimeEntry("Tamara", "Berg", "2025-03-03", "09:00:00", "Ein"))
+    assert db.suggest_employees("ta") == [("Tamara", "Berg"), ("Tanja", "Kretschmann")]
+    assert db.suggest_employees("", "be") == [("Tamara", "Berg")]
+    # Vorschläge kommen aus dem Speicher, ohne Abfrage auf mitarbeiter
+    statements = instrumentation.snapshot()["statements"]
+    assert not any("FROM mitarbeiter" in sql and "ORDER BY nachname" in sql for sql in statements)
+    db.disable_instrumentation()
+
+
+def test_external_write_replaces_index_snapshot(db):
+    assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-03", "08:00:00", "Ein"))
+    index = db.name_index()
+    assert db.name_index() is index
+    # Ein anderes Terminal legt einen Mitarbeiter an
+    fremd = sqlite3.connect(db.db_path)
+    fremd.execute("INSERT INTO mitarbeiter (vorname, nachname) VALUES ('Tamara', 'Berg')")
+    fremd.commit()
+    fremd.close()
+    # Die Oberfläche sucht weiter im alten Index, bis der Datenbank-Thread den neuen holt
+    assert index.suggest("ta") == [("Tanja", "Kretschmann")]
+    assert db.name_index().suggest("ta") == [("Tamara", "Berg"), ("Tanja", "Kretschmann")]
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from stempeluhr.functions.pdf_cache import PdfCache, get_pdf_cache
+from stempeluhr.models.time_entry import TimeEntry
+
+pytest.importorskip("reportlab")
+from stempeluhr.functions.pdf_export import export_monthly_pdf  # noqa: E402
+
+
+@pytest.fixture
+def db(db):
+    assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-03", "08:00:00", "Ein"))
+    assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-03", "16:00:00", "Aus"))
+    return db
+
+
+def cache_files(cache):
+    return sorted(os.listdir(cache.cache_dir))
+
+
+def test_unchanged_month_is_served_from_cache(db, tmp_path):
+    export_dir = str(tmp_path / "exports")
+    cache = get_pdf_cache(export_dir)
+    export_monthly_pdf(db, "Tanja", "Kretschmann", 2025, 3, export_dir)
+    export_monthly_pdf(db, "Tanja", "Kretschmann", 2025, 3, export_dir)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(cache_files(cache)) == 1
+
+    # Ein Eintrag in einem anderen Monat lässt den März unberührt
+    assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-04-02", "08:00:00", "Ein"))
+    assert len(cache_files(cache)) == 1
+
+    # Ein Eintrag im März invalidiert ihn
+    assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-04", "08:00:00", "Ein"))
+    assert cache_files(cache) == []
+    path = export_monthly_pdf(db, "Tanja", "Kretschmann", 2025, 3, export_dir)
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert os.path.exists(path)
+
+
+def test_write_invalidates_export_with_unnormalized_name(db, tmp_path):
+    export_dir = str(tmp_path / "exports")
+    cache = get_pdf_cache(export_dir)
+    export_monthly_pdf(db, " Tanja ", "Kretschmann", 2025, 3, export_dir)
+    assert len(cache_files(cache)) == 1
+    # Der Listener bekommt die vereinheitlichten Namen
+    assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-04", "08:00:00", "Ein"))
+    assert cache_files(cache) == []
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    cache = PdfCache(str(tmp_path), max_bytes=250)
+    for i, name in enumerate(["a", "b", "c"]):
+        source = tmp_path / f"{name}.pdf"
+        source.write_bytes(b"x" * 100)
+        cache_path = os.path.join(cache.cache_dir, f"{name}.pdf")
+        cache.store(cache_path, str(source))
+        os.utime(cache_path, (1000 + i, 1000 + i))
+    cache.evict()
+    assert cache_files(cache) == ["b.pdf", "c.pdf"]
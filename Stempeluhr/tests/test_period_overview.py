@@ -0,0 +1,50 @@
+from datetime import date
+
+from stempeluhr.models.time_entry import TimeEntry, quarter_bounds
+from stempeluhr.utils.workload import employee_names, generate_workload
+
+
+def sekunden(stunden: float) -> int:
+    return round(stunden * 3600)
+
+
+def work_day(db, tag: str, von: str = "08:00:00", bis: str = "18:00:00"):
+    assert db.save_entry(TimeEntry("Tanja", "Kretschmann", tag, von, "Ein"))
+    assert db.save_entry(TimeEntry("Tanja", "Kretschmann", tag, bis, "Aus"))
+
+
+def test_quarter_bounds():
+    assert quarter_bounds(2025, 1)[0].date() == date(2025, 1, 1)
+    assert quarter_bounds(2025, 4)[1].date() == date(2026, 1, 1)
+
+
+def test_iso_week_over_year_boundary(db):
+    # KW 1/2025 läuft von Montag 30.12.2024 bis Sonntag 5.1.2025, je 10 Stunden
+    for tag in ["2024-12-30", "2024-12-31", "2025-01-02", "2025-01-03", "2025-01-04"]:
+        work_day(db, tag)
+
+    uebersicht = db.berechne_zeitraumuebersicht("Tanja", "Kretschmann", date(2025, 1, 1), date(2026, 1, 1))
+    erste = uebersicht["wochen"][0]
+    assert (erste["iso_jahr"], erste["woche"], erste["von"], erste["bis"]) == (2025, 1, "2024-12-30", "2025-01-05")
+    # Die Woche ist vollständig, auch mit den Tagen aus dem Vorjahr
+    assert erste["arbeitszeit"] == 50 and erste["ueberstunden"] == 10
+    assert len(uebersicht["wochen"]) == 53 and len(uebersicht["monate"]) == 12
+    # Monat und Summe zählen nur die Tage im Zeitraum
+    assert uebersicht["monate"][0]["arbeitszeit"] == 30 and uebersicht["monate"][0]["ueberstunden"] == 0
+    assert uebersicht["summe"]["arbeitszeit"] == 30
+
+
+def test_months_match_monatsuebersicht(db):
+    generate_workload(db, employees=2, years=1, start=date(2024, 1, 1), seed=2)
+    for vorname, nachname in employee_names(2):
+        uebersicht = db.berechne_zeitraumuebersicht(vorname, nachname, date(2024, 1, 1), date(2025, 1, 1))
+        for monat in uebersicht["monate"]:
+            wochen = db.berechne_monatsuebersicht(vorname, nachname, monat["jahr"], monat["monat"])
+            for feld in ("arbeitszeit", "pausezeit", "ueberstunden"):
+                assert sekunden(monat[feld]) == sum(sekunden(w[feld]) for w in wochen)
+        # Jede ISO-Woche entspricht der Wochensumme aus wochenaggregate
+        for woche in uebersicht["wochen"]:
+            erwartet = db.berechne_wochenuebersicht(vorname, nachname, woche["iso_jahr"], woche["woche"])
+            assert sekunden(woche["arbeitszeit"]) == sekunden(erwartet["arbeitszeit"] if erwartet else 0)
+        assert sekunden(uebersicht["summe"]["arbeitszeit"]) == sum(sekunden(m["arbeitszeit"])
+                                                                   for m in uebersicht["monate"])
@@ -0,0 +1,96 @@
+import random
+from datetime import date, datetime, timedelta
+
+from stempeluhr.models.time_entry import STATUS_NAMES, TimeEntry, from_timestamp
+from stempeluhr.utils.workload import generate_day
+
+
+def aggregate_rows(db):
+    tage = db.conn.execute("SELECT * FROM tagesaggregate ORDER BY 1, 2, 3").fetchall()
+    wochen = db.conn.execute("SELECT * FROM wochenaggregate ORDER BY 1, 2, 3, 4").fetchall()
+    return tage, wochen
+
+
+def workload_entries(tage=40, seed=3):
+    """Stempel mehrerer Wochen inklusive vergessenem Ausstempeln"""
+    rng = random.Random(seed)
+    entries = []
+    for i in range(tage):
+        tag = date(2025, 2, 24) + timedelta(days=i)
+        if tag.weekday() >= 5:
+            continue
+        for ts, code, pause in generate_day(rng, tag, forgot_clock_out_rate=0.2, second_pause_rate=0.3):
+            entries.append(TimeEntry("Tanja", "Kretschmann", *from_timestamp(ts), STATUS_NAMES[code], pause))
+    return entries
+
+
+def test_bulk_matches_rebuild_and_uses_one_commit_per_batch(db):
+    entries = workload_entries()
+    commits = []
+    db.conn.set_trace_callback(lambda sql: commits.append(sql) if sql == "COMMIT" else None)
+    result = db.save_entries(entries, batch_size=50, validate=False)
+    db.conn.set_trace_callback(None)
+    assert result.saved == len(entries) and result.rejected == []
+    assert len(commits) == -(-len(entries) // 50)
+
+    inkrementell = aggregate_rows(db)
+    db.rebuild_aggregates()
+    assert aggregate_rows(db) == inkrementell
+    assert db.get_state("Tanja", "Kretschmann").last_entry[:5] == entries[-1][:5]
+
+
+def test_backfill_into_existing_history_keeps_aggregates_consistent(db):
+    entries = workload_entries()
+    # Zuerst jeden zweiten Tag, danach die Lücken in gemischter Reihenfolge nachtragen
+    tage = sorted({e.date for e in entries})
+    erste = [e for e in entries if tage.index(e.date) % 2 == 0]
+    rest = [e for e in entries if tage.index(e.date) % 2 == 1]
+    random.Random(1).shuffle(rest)
+    db.save_entries(erste, validate=False)
+    db.save_entries(rest, batch_size=7, validate=False)
+
+    inkrementell = aggregate_rows(db)
+    db.rebuild_aggregates()
+    assert aggregate_rows(db) == inkrementell
+    assert len(db.get_entries()) == len(entries)
+
+
+def test_invalid_transitions_are_rejected(db):
+    assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-03", "08:00:00", "Ein"))
+    result = db.save_entries([
+        TimeEntry("Tanja", "Kretschmann", "2025-03-03", "09:00:00", "Ein"),  # bereits eingestempelt
+        TimeEntry("Tanja", "Kretschmann", "2025-03-03", "12:00:00", "Pause Start"),
+        TimeEntry("Tanja", "Kretschmann", "2025-03-03", "12:45:00", "Pause Ende"),
+        TimeEntry("Max", "Muster", "2025-03-03", "10:00:00", "Aus"),  # nie eingestempelt
+        TimeEntry("Tanja", "Kretschmann", "2025-03-03", "17:00:00", "Aus"),
+    ])
+    assert result.saved == 3
+    assert [(e.time, e.vorname) for e, _ in result.rejected] == [("09:00:00", "Tanja"), ("10:00:00", "Max")]
+
+    letzter = db.get_state("Tanja", "Kretschmann").last_entry
+    assert letzter.status == "Aus"
+    pause = db.get_entries("Tanja", "Kretschmann")[1]
+    assert pause.status == "Pause Ende" and pause.pause_dauer == 45 * 60
+
+
+def test_backfill_is_validated_against_stored_entries_in_between(db):
+    for zeit, status in [("08:00:00", "Ein"), ("12:00:00", "Aus"), ("13:00:00", "Ein"), ("17:00:00", "Aus")]:
+        assert db.save_entry(TimeEntry("Tanja", "Kretschmann", "2025-03-03", zeit, status))
+    result = db.save_entries([
+        TimeEntry("Tanja", "Kretschmann", "2025-03-03", "09:00:00", "Pause Start"),
+        TimeEntry("Tanja", "Kretschmann", "2025-03-03", "09:30:00", "Pause Ende"),
+        # Zwischen dem gespeicherten Aus und Ein: Ein ohne Aus davor ergäbe Ein/Ein
+        TimeEntry("Tanja", "Kretschmann", "2025-03-03", "12:30:00", "Ein"),
+        # Nach dem letzten Batch-Eintrag folgt das gespeicherte Aus um 17:00
+        TimeEntry("Tanja", "Kretschmann", "2025-03-03", "14:00:00", "Pause Start"),
+    ])
+    assert result.saved == 2
+    assert sorted(e.time for e, _ in result.rejected) == ["12:30:00", "14:00:00"]
+    eintraege = db.get_entries("Tanja", "Kretschmann")[::-1]
+    assert [(e.time, e.status) for e in eintraege] == [
+        ("08:00:00", "Ein"), ("09:00:00", "Pause Start"), ("09:30:00", "Pause Ende"),
+        ("12:00:00", "Aus"), ("13:00:00", "Ein"), ("17:00:00", "Aus"),
+    ]
+    assert eintraege[2].pause_dauer == 30 * 60
+    assert [len(s.pausen) for s in db.get_sessions("Tanja", "Kretschmann", datetime(2025, 3, 3),
+                                                     datetime(2025, 3, 4))] == [1, 0]
@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("toga")
+
+from stempeluhr.server import StempelServer
+
+
+async def request(reader, writer, method, path, body=None):
+    """Eine Anfrage über eine offene Keep-Alive-Verbindung"""
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) != b"\r\n":
+        name, _, value = line.decode().partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status, json.loads(await reader.readexactly(int(headers["content-length"])))
+
+
+def run_with_server(db, ablauf):
+    async def main():
+        server = StempelServer(db, port=0)
+        port = await server.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            return await ablauf(server, reader, writer)
+        finally:
+            writer.close()
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_stamp_cycle_and_history(db):
+    person = {"vorname": "Tanja", "nachname": "Kretschmann"}
+
+    async def ablauf(server, reader, writer):
+        results = [await request(reader, writer, "POST", path, person)
+                   for path in ("/clock-in", "/pause-start", "/pause-end", "/clock-out")]
+        state = await request(reader, writer, "GET", "/state?vorname=Tanja&nachname=Kretschmann")
+        page = await request(reader, writer, "GET", "/history?vorname=Tanja&nachname=Kretschmann&limit=3")
+        return results, state, page
+
+    results, state, page = run_with_server(db, ablauf)
+    assert [status for status, _ in results] == [200, 200, 200, 200]
+    assert results[1][1]["is_in_pause"] and results[1][1]["pause_start_time"]
+    assert state == (200, results[-1][1])
+    assert state[1]["last_entry"]["status"] == "Aus"
+
+    status, body = page
+    assert status == 200
+    assert [e["status"] for e in body["entries"]] == ["Aus", "Pause Ende", "Pause Start"]
+    assert body["next"] == {"before_ts": body["entries"][-1]["ts"], "before_id": body["entries"][-1]["id"]}
+    assert [e.status for e in db.get_entries("Tanja", "Kretschmann")] == ["Aus", "Pause Ende", "Pause Start", "Ein"]
+
+
+def test_invalid_transitions_and_requests(db):
+    async def ablauf(server, reader, writer):
+        return [
+            await request(reader, writer, "POST", "/clock-out", {"vorname": "Max", "nachname": "Muster"}),
+            await request(reader, writer, "POST", "/clock-in", {"vorname": "Max"}),
+            await request(reader, writer, "GET", "/clock-in?vorname=Max&nachname=Muster"),
+            await request(reader, writer, "GET", "/unbekannt"),
+            await request(reader, writer, "GET", "/history?vorname=Max&nachname=Muster&limit=x"),
+        ]
+
+    statuses = [status for status, _ in run_with_server(db, ablauf)]
+    assert statuses == [409, 400, 405, 404, 400]
+    assert db.get_entries() == []
+
+
+def test_concurrent_clients_are_serialized(db):
+    """Viele gleichzeitige Clients: jeder Stempel wird genau einmal und in gültiger Folge gespeichert"""
+    personen = [{"vorname": f"V{i}", "nachname": "Test"} for i in range(20)]
+
+    async def client(port, person):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            return [(await request(reader, writer, "POST", path, person))[0]
+                    for path in ("/clock-in", "/clock-in", "/clock-out")]
+        finally:
+            writer.close()
+
+    async def ablauf(server, reader, writer):
+        results = await asyncio.gather(*(client(server.port, person) for person in personen))
+        return results, server.stamps
+
+    results, stamps = run_with_server(db, ablauf)
+    assert all(r == [200, 409, 200] for r in results)
+    assert stamps == 40
+    assert len(db.get_entries()) == 40
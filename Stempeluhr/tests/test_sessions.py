@@ -0,0 +1,90 @@
+import random
+from collections import defaultdict
+from datetime import datetime
+
+from stempeluhr.functions.data_display import get_formatted_history
+from stempeluhr.models.sessions import (
+    AUS, AUS_FEHLT, EIN, EIN_FEHLT, PAUSE_AUSSERHALB, PAUSE_ENDE, PAUSE_ENDE_FEHLT, PAUSE_START, PAUSE_START_FEHLT,
+    UEBER_MITTERNACHT, Pause, SessionBuilder, day_totals, iter_sessions, local_date
+)
+from stempeluhr.models.time_entry import TimeEntry, month_bounds
+
+
+def ts(text: str) -> int:
+    return int(datetime.strptime(text, "%Y-%m-%d %H:%M").timestamp())
+
+
+def reference_day_totals(events):
+    """Paarung der Tagessummen vor der Sitzungs-Engine"""
+    totals = defaultdict(lambda: [0, 0])
+    offen = {EIN: None, PAUSE_START: None}
+    partner = {AUS: EIN, PAUSE_ENDE: PAUSE_START}
+    for zeit, status in events:
+        if status in offen:
+            offen[status] = zeit
+        elif status in partner:
+            beginn = offen[partner[status]]
+            if beginn is not None:
+                totals[local_date(beginn)][0 if status == AUS else 1] += zeit - beginn
+            offen[partner[status]] = None
+    return totals
+
+
+def test_session_with_pauses_over_midnight():
+    events = [(ts("2025-03-03 22:00"), EIN), (ts("2025-03-04 00:30"), PAUSE_START),
+              (ts("2025-03-04 01:00"), PAUSE_ENDE), (ts("2025-03-04 02:00"), PAUSE_START),
+              (ts("2025-03-04 02:15"), PAUSE_ENDE), (ts("2025-03-04 06:00"), AUS)]
+    session, = iter_sessions(events)
+    assert session.datum.isoformat() == "2025-03-03"
+    assert session.pausen == (Pause(events[1][0], events[2][0]), Pause(events[3][0], events[4][0]))
+    assert session.dauer == 8 * 3600 and session.pause_sekunden == 45 * 60
+    assert session.netto_sekunden == 8 * 3600 - 45 * 60
+    assert session.anomalien == (UEBER_MITTERNACHT,)
+
+
+def test_anomalies_are_flagged():
+    events = [(ts("2025-03-03 08:00"), EIN), (ts("2025-03-04 08:00"), EIN), (ts("2025-03-04 12:00"), PAUSE_START),
+              (ts("2025-03-04 12:05"), PAUSE_START), (ts("2025-03-04 12:30"), PAUSE_ENDE),
+              (ts("2025-03-04 16:00"), AUS), (ts("2025-03-04 17:00"), AUS), (ts("2025-03-04 18:00"), PAUSE_ENDE),
+              (ts("2025-03-04 19:00"), PAUSE_START)]
+    builder = SessionBuilder()
+    hinweise = [builder.add(zeit, status) for zeit, status in events]
+    sessions = builder.pop_sessions() + builder.finish()
+    assert hinweise == [(), (AUS_FEHLT,), (), (PAUSE_ENDE_FEHLT,), (), (), (EIN_FEHLT,), (PAUSE_START_FEHLT,),
+                        (PAUSE_AUSSERHALB,)]
+    assert [s.anomalien for s in sessions] == [(AUS_FEHLT,), (PAUSE_ENDE_FEHLT,), (EIN_FEHLT,),
+                                               (PAUSE_START_FEHLT,), (PAUSE_AUSSERHALB,)]
+    assert sessions[1].pause_sekunden == 25 * 60
+    # Die letzte Pause läuft noch
+    assert sessions[-1].pausen == (Pause(events[-1][0], None),)
+
+
+def test_unknown_start_suppresses_predecessor_anomalies():
+    events = [(ts("2025-03-03 06:00"), AUS), (ts("2025-03-03 08:00"), PAUSE_ENDE), (ts("2025-03-03 09:00"), AUS)]
+    builder = SessionBuilder(anfang_bekannt=False)
+    assert [builder.add(zeit, status) for zeit, status in events] == [(), (), (EIN_FEHLT,)]
+
+
+def test_day_totals_match_previous_pairing_on_random_streams():
+    rng = random.Random(7)
+    for _ in range(20):
+        events = sorted((rng.randrange(1_700_000_000, 1_700_000_000 + 10 * 86400), rng.choice([EIN, AUS, PAUSE_START, PAUSE_ENDE]))
+                        for _ in range(300))
+        assert dict(day_totals(iter_sessions(events))) == dict(reference_day_totals(events))
+
+
+def test_sessions_and_history_from_database(db):
+    for date_str, time_str, status in [("2025-03-31", "22:00:00", "Ein"), ("2025-04-01", "01:00:00", "Pause Start"),
+                                       ("2025-04-01", "01:30:00", "Pause Ende"), ("2025-04-01", "06:00:00", "Aus"),
+                                       ("2025-04-01", "07:00:00", "Aus")]:
+        assert db.save_entry(TimeEntry("Max", "Muster", date_str, time_str, status))
+
+    maerz = db.get_sessions("Max", "Muster", *month_bounds(2025, 3))
+    assert len(maerz) == 1 and maerz[0].netto_sekunden == 7.5 * 3600
+    # Im April beginnt nur das überzählige "Aus"
+    april = db.get_sessions("Max", "Muster", *month_bounds(2025, 4))
+    assert [s.anomalien for s in april] == [(EIN_FEHLT,)]
+
+    history = get_formatted_history("Max", "Muster", db)
+    assert history[0][4].strip() == "Aus [Ein fehlt]"
+    assert history[2][4].strip() == "Pause Ende (30min)"
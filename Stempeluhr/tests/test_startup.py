@@ -0,0 +1,68 @@
+from stempeluhr.functions.status_management import get_card_data, get_initial_card_data
+from stempeluhr.models.time_entry import TimeEntry
+from stempeluhr.utils.startup_timing import StartupTimer
+
+
+def test_initial_card_needs_one_query(db):
+    assert get_initial_card_data(db, 10) is None
+    for tag in range(1, 13):
+        assert db.save_entry(TimeEntry("Tanja", "Kretschmann", f"2025-03-{tag:02d}", "08:00:00", "Ein"))
+        assert db.save_entry(TimeEntry("Tanja", "Kretschmann", f"2025-03-{tag:02d}", "16:00:00", "Aus"))
+    assert db.save_entry(TimeEntry("Max", "Muster", "2025-03-12", "17:00:00", "Ein"))
+    assert db.save_entry(TimeEntry("Max", "Muster", "2025-03-12", "18:00:00", "Pause Start"))
+    db.invalidate_caches()
+
+    instrumentation = db.enable_instrumentation()
+    vorname, nachname, (entries, next_key), state = get_initial_card_data(db, 10)
+    assert (vorname, nachname) == ("Max", "Muster")
+    assert [e.status for e in entries] == ["Pause Start", "Ein"] and next_key is None
+    assert state["is_in_pause"] and state["pause_button_text"] == "Pause beenden"
+    # Status und letzter Benutzer kommen danach aus dem Cache
+    assert db.get_last_entry().status == "Pause Start"
+    selects = [s for sql, s in instrumentation.snapshot()["statements"].items() if "FROM stempel" in sql]
+    assert sum(s["calls"] for s in selects) == 1
+    db.disable_instrumentation()
+
+
+def test_initial_card_pages_like_history(db):
+    for tag in range(1, 13):
+        assert db.save_entry(TimeEntry("Tanja", "Kretschmann", f"2025-03-{tag:02d}", "08:00:00", "Ein"))
+    vorname, nachname, entries, next_key = db.get_initial_card(5)
+    assert db.get_entries_page(vorname, nachname, 5) == (entries, next_key)
+
+
+def test_card_snapshot_in_one_read(db):
+    assert db.get_card_snapshot(None, 10).employee is None
+    for tag in range(1, 13):
+        assert db.save_entry(TimeEntry("Tanja", "Kretschmann", f"2025-03-{tag:02d}", "08:00:00", "Ein"))
+        assert db.save_entry(TimeEntry("Tanja", "Kretschmann", f"2025-03-{tag:02d}", "16:00:00", "Aus"))
+    assert db.save_entry(TimeEntry("Max", "Muster", "2025-03-12", "17:00:00", "Ein"))
+    db.invalidate_caches()
+
+    instrumentation = db.enable_instrumentation()
+    snapshot = db.get_card_snapshot(("Tanja", "Kretschmann"), 10)
+    assert snapshot.last_entry.nachname == "Muster" and snapshot.employee.nachname == "Kretschmann"
+    assert len(snapshot.entries) == 10 and snapshot.next_key == (snapshot.entries[-1].ts, snapshot.entries[-1].id)
+    assert not snapshot.state.is_clocked_in
+    # Zustand und letzter Benutzer kommen danach aus dem Cache
+    assert db.get_state("Tanja", "Kretschmann") is snapshot.state and db.get_last_entry() == snapshot.last_entry
+    statements = instrumentation.snapshot()["statements"]
+    assert statements["BEGIN"]["calls"] == 1
+    assert sum(s["calls"] for sql, s in statements.items() if "FROM stempel" in sql) == 2
+
+    vorname, nachname, (entries, next_key), state = get_card_data(db, 10)
+    assert (vorname, nachname) == ("Max", "Muster") and state["is_clocked_in"] and next_key is None
+    # Dieselben Anweisungen werden nicht erneut übersetzt
+    cache = instrumentation.snapshot()["statement_cache"]
+    assert cache["size"] == 256 and cache["hits"] >= 3 and 0 < cache["hit_rate"] < 1
+    db.disable_instrumentation()
+
+
+def test_startup_timer_breakdown():
+    zeiten = iter([10.0, 10.25])
+    timer = StartupTimer(start=9.5, clock=lambda: next(zeiten))
+    timer.mark("Importe")
+    timer.mark("Datenbank")
+    assert timer.breakdown() == {"Importe": 500.0, "Datenbank": 250.0}
+    assert timer.total_ms == 750.0
+    assert timer.report().startswith("Start nach 750 ms")
@@ -0,0 +1,72 @@
+import random
+from collections import defaultdict
+from datetime import date
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from stempeluhr.databaselogic import aggregates
+from stempeluhr.functions.team_overview import berechne_teamuebersicht, pair_events
+from stempeluhr.models.time_entry import TimeEntry
+from stempeluhr.utils.workload import generate_workload
+
+
+def sekunden(stunden: float) -> int:
+    return round(stunden * 3600)
+
+
+def test_pairing_matches_compute_day_totals():
+    """Auch unsaubere Folgen (doppeltes Ein, Aus ohne Ein) werden gleich gepaart"""
+    rng = random.Random(3)
+    codes = list(aggregates._PARTNER) + list(aggregates._PARTNER.values())
+    events = sorted((rng.randrange(1_700_000_000, 1_700_000_000 + 30 * 86400), rng.choice(codes))
+                    for _ in range(2000))
+    erwartet = aggregates.compute_day_totals(events)
+
+    ts = np.array([e[0] for e in events], dtype=np.int64)
+    status = np.array([e[1] for e in events], dtype=np.int8)
+    personen = np.zeros(len(events), dtype=np.int64)
+    totals = defaultdict(lambda: [0, 0])
+    for index, (beginn_status, end_status) in enumerate(((aggregates.EIN, aggregates.AUS),
+                                                         (aggregates.PAUSE_START, aggregates.PAUSE_ENDE))):
+        _, beginn, dauer = pair_events(ts, status, personen, beginn_status, end_status)
+        for b, d in zip(beginn.tolist(), dauer.tolist()):
+            totals[aggregates.local_date(b)][index] += d
+    assert dict(totals) == dict(erwartet)
+
+
+def test_matches_monatsuebersicht_on_benchmark_data(db):
+    generate_workload(db, employees=6, years=1, start=date(2024, 1, 1), seed=0)
+    for monat in range(1, 13):
+        ende = date(2025, 1, 1) if monat == 12 else date(2024, monat + 1, 1)
+        team = berechne_teamuebersicht(db, date(2024, monat, 1), ende)
+        assert len(team) == 6
+        for zeile in team:
+            wochen = db.berechne_monatsuebersicht(zeile["vorname"], zeile["nachname"], 2024, monat)
+            for feld in ("arbeitszeit", "pausezeit", "gesamtzeit", "ueberstunden"):
+                assert sekunden(zeile[feld]) == sum(sekunden(w[feld]) for w in wochen), (monat, zeile, feld)
+
+
+def test_shift_over_period_end_counts_for_start_day(db):
+    for date_str, time_str, status in [("2025-03-31", "22:00:00", "Ein"), ("2025-04-01", "06:00:00", "Aus"),
+                                       ("2025-04-01", "08:00:00", "Ein")]:
+        assert db.save_entry(TimeEntry("Max", "Muster", date_str, time_str, status))
+
+    maerz, = berechne_teamuebersicht(db, date(2025, 3, 1), date(2025, 4, 1))
+    april, = berechne_teamuebersicht(db, date(2025, 4, 1), date(2025, 5, 1))
+    assert maerz["arbeitszeit"] == 8
+    # Das offene "Ein" im April zählt noch nicht
+    assert april["arbeitszeit"] == 0
+    assert berechne_teamuebersicht(db, date(2025, 4, 1), date(2025, 4, 1)) == []
+
+
+def test_team_is_loaded_with_one_query(db):
+    generate_workload(db, employees=5, years=0.25, start=date(2024, 1, 1), seed=2)
+    instrumentation = db.enable_instrumentation()
+    berechne_teamuebersicht(db, date(2024, 2, 1), date(2024, 3, 1))
+    snapshot = instrumentation.snapshot()
+    db.disable_instrumentation()
+    assert snapshot["methods"]["get_team_columns"]["calls"] == 1
+    stempel = [sql for sql in snapshot["statements"] if "JOIN stempel" in sql or "FROM stempel" in sql]
+    assert len(stempel) == 1 and snapshot["statements"][stempel[0]]["calls"] == 1
@@ -0,0 +1,36 @@
+from datetime import date
+
+from stempeluhr.databaselogic.db_handler import DatabaseHandler
+from stempeluhr.utils.workload import employee_names, generate_workload
+
+
+def test_employee_names_are_unique():
+    assert len(set(employee_names(1000))) == 1000
+
+
+def test_generate_workload(db):
+    anzahl = generate_workload(db, employees=3, years=0.25, start=date(2024, 1, 1), seed=1,
+                               forgot_clock_out_rate=0.1)
+    entries = db.get_entries()
+    assert len(entries) == anzahl
+    assert {(e.vorname, e.nachname) for e in entries} == set(employee_names(3))
+    # Nur Werktage, Pausen mit Dauer, einige Tage ohne "Aus"
+    assert all(date.fromisoformat(e.date).weekday() < 5 for e in entries)
+    assert all(e.pause_dauer for e in entries if e.status == "Pause Ende")
+    ein = sum(e.status == "Ein" for e in entries)
+    aus = sum(e.status == "Aus" for e in entries)
+    assert 0 < aus < ein
+    # Die Summen wurden mit aufgebaut
+    assert db.berechne_monatsuebersicht(*employee_names(1)[0], 2024, 2)
+
+
+def test_generate_workload_is_deterministic(tmp_path):
+    ergebnisse = []
+    for name in ("a.db", "b.db"):
+        handler = DatabaseHandler(str(tmp_path / name))
+        try:
+            generate_workload(handler, employees=2, years=0.1, seed=7)
+            ergebnisse.append(handler.get_entries())
+        finally:
+            handler.close()
+    assert [e[:-1] for e in ergebnisse[0]] == [e[:-1] for e in ergebnisse[1]]